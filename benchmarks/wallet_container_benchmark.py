@@ -0,0 +1,105 @@
+"""
+Read-latency benchmark of the binary wallet container format (.dnrw) against the JSON wallet format.
+
+For every wallet size, a synthetic encrypted wallet is written in both formats, and the time to read a
+single wallet entry from disk is measured:
+- JSON: the wallet file is parsed, and the entry is base64-decoded, as the wallet client does for JSON
+  wallets.
+- Container: the container is loaded with lazily read entry sections, as the wallet client does for
+  wallet containers, and the entry is read through the offset table.
+
+The entries are random blobs of the size of a real encrypted wallet entry, so no password or key
+derivation is involved and only the storage format is measured.
+
+Usage:
+    python benchmarks/wallet_container_benchmark.py [-entries 256,1000,10000] [-runs 50]
+"""
+import os
+import sys
+import json
+import time
+import base64
+import random
+import argparse
+import tempfile
+import statistics
+
+# Get the absolute path of the repository root
+dir_path = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+# Insert folder paths for modules
+sys.path.insert(0, dir_path)
+
+from denaro.wallet.utils.wallet_container_util import WalletContainer
+
+# The size of the ciphertext of an encrypted wallet entry
+ENTRY_SIZE = 693
+
+
+def make_wallet(entry_count):
+    """
+    Returns the data of a synthetic encrypted wallet with 'entry_count' entries.
+    """
+    entries = [base64.b64encode(os.urandom(ENTRY_SIZE)).decode('utf-8') for _ in range(entry_count)]
+    return {
+        "wallet_header": {"version": "0.2.3", "wallet_type": "deterministic", "encrypted": True, "tfa_enabled": None, "entries": entry_count, "imported_entries": 0},
+        "wallet_data": {
+            "wallet_type": "deterministic",
+            "version": "0.2.3",
+            "entry_data": {"key_data": [base64.b64encode(os.urandom(ENTRY_SIZE)).decode('utf-8')], "entries": entries},
+            "hmac": base64.b64encode(os.urandom(32)).decode('utf-8'),
+            "verifier": base64.b64encode(os.urandom(32)).decode('utf-8')
+        }
+    }
+
+
+def read_json_entry(filename, index):
+    with open(filename, 'r') as f:
+        data = json.load(f)
+    return base64.b64decode(data["wallet_data"]["entry_data"]["entries"][index])
+
+
+def read_container_entry(filename, index):
+    data = WalletContainer.load(filename, lazy=True)
+    return base64.b64decode(data["wallet_data"]["entry_data"]["entries"][index])
+
+
+def measure(read, filename, entry_count, runs):
+    """
+    Returns the median and the 95th percentile of the time to read a random entry, in milliseconds.
+    """
+    timings = []
+    for _ in range(runs):
+        index = random.randrange(entry_count)
+        started = time.perf_counter()
+        read(filename, index)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the single-entry read latency of JSON wallets and wallet containers.")
+    parser.add_argument('-entries', default="256,1000,10000", help="Comma-separated wallet sizes in entries.")
+    parser.add_argument('-runs', type=int, default=50, help="Reads per wallet size and format.")
+    args = parser.parse_args()
+
+    print(f"{'Entries':>8} | {'JSON median':>12} | {'JSON p95':>10} | {'.dnrw median':>12} | {'.dnrw p95':>10} | {'Speedup':>7}")
+    with tempfile.TemporaryDirectory() as directory:
+        for entry_count in [int(value) for value in args.entries.split(',')]:
+            data = make_wallet(entry_count)
+            json_filename = os.path.join(directory, f"wallet_{entry_count}.json")
+            container_filename = os.path.join(directory, f"wallet_{entry_count}{WalletContainer.EXTENSION}")
+            with open(json_filename, 'w') as f:
+                json.dump(data, f, indent=4)
+            WalletContainer.save(container_filename, data)
+            # Both formats must hold the same entries
+            assert read_json_entry(json_filename, entry_count - 1) == read_container_entry(container_filename, entry_count - 1)
+
+            json_median, json_p95 = measure(read_json_entry, json_filename, entry_count, args.runs)
+            container_median, container_p95 = measure(read_container_entry, container_filename, entry_count, args.runs)
+            print(f"{entry_count:>8} | {json_median:>9.3f} ms | {json_p95:>7.3f} ms | {container_median:>9.3f} ms | {container_p95:>7.3f} ms | {json_median / container_median:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
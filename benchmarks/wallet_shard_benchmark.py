@@ -0,0 +1,144 @@
+"""
+Benchmark of the sharded wallet layout against the flat JSON wallet layout.
+
+For every wallet size, a synthetic encrypted wallet is written in both layouts, and the following
+operations are timed:
+- Load: the wallet file is read, and for sharded wallets the tail shards are attached, as _load_data does.
+- Read entry: the wallet is loaded, and a random entry is read.
+- Add entry: the wallet is loaded, an entry is appended, and the wallet is saved. Flat wallets are
+  rewritten as a whole, while sharded wallets rewrite the tail shard and the manifest.
+- Stream: every entry is read in order, which is linear in both layouts and is included for reference.
+
+The entries are random blobs of the size of a real encrypted wallet entry, so no password or key
+derivation is involved and only the storage layout is measured.
+
+Usage:
+    python benchmarks/wallet_shard_benchmark.py [-entries 1000,10000,100000] [-runs 5]
+"""
+import os
+import sys
+import json
+import time
+import base64
+import random
+import argparse
+import tempfile
+import statistics
+
+# Get the absolute path of the repository root
+dir_path = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+# Insert folder paths for modules
+sys.path.insert(0, dir_path)
+
+from denaro.wallet.utils.wallet_shard_util import ShardedWallet
+from denaro.wallet.utils.data_manipulation_util import DataManipulation
+
+# The size of the ciphertext of an encrypted wallet entry
+ENTRY_SIZE = 693
+
+
+def make_entry():
+    return base64.b64encode(os.urandom(ENTRY_SIZE)).decode('utf-8')
+
+
+def make_wallet(entry_count):
+    """
+    Returns the data of a synthetic encrypted wallet with 'entry_count' entries.
+    """
+    return {
+        "wallet_data": {
+            "wallet_type": "deterministic",
+            "version": "0.2.3",
+            "entry_data": {"key_data": [make_entry()], "entries": [make_entry() for _ in range(entry_count)], "imported_entries": []},
+            "hmac": base64.b64encode(os.urandom(32)).decode('utf-8'),
+            "verifier": base64.b64encode(os.urandom(32)).decode('utf-8'),
+            "totp_secret": make_entry()
+        }
+    }
+
+
+def load_flat(filename):
+    with open(filename, 'r') as f:
+        return json.load(f)
+
+
+def load_sharded(filename):
+    with open(filename, 'r') as f:
+        return ShardedWallet.attach(filename, json.load(f))
+
+
+def read_flat_entry(filename, index):
+    return load_flat(filename)["wallet_data"]["entry_data"]["entries"][index]
+
+
+def read_sharded_entry(filename, index):
+    return load_sharded(filename)["wallet_data"]["entry_data"]["entries"][index]
+
+
+def add_flat_entry(filename, _):
+    data = load_flat(filename)
+    data["wallet_data"]["entry_data"]["entries"].append(make_entry())
+    DataManipulation._save_data(filename, data)
+
+
+def add_sharded_entry(filename, _):
+    data = load_sharded(filename)
+    data["wallet_data"]["entry_data"]["entries"].append(make_entry())
+    ShardedWallet.flush(filename, data)
+    DataManipulation._save_data(filename, data)
+
+
+def stream_flat(filename, _):
+    for _ in load_flat(filename)["wallet_data"]["entry_data"]["entries"]:
+        pass
+
+
+def stream_sharded(filename, _):
+    for _ in load_sharded(filename)["wallet_data"]["entry_data"]["entries"]:
+        pass
+
+
+def measure(operation, filename, entry_count, runs):
+    """
+    Returns the median time of an operation in milliseconds.
+    """
+    timings = []
+    for _ in range(runs):
+        index = random.randrange(entry_count)
+        started = time.perf_counter()
+        operation(filename, index)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the flat and the sharded wallet layouts.")
+    parser.add_argument('-entries', default="1000,10000,100000", help="Comma-separated wallet sizes in entries.")
+    parser.add_argument('-runs', type=int, default=5, help="Runs per operation, wallet size and layout.")
+    args = parser.parse_args()
+
+    operations = [
+        ("Load", lambda filename, _: load_flat(filename), lambda filename, _: load_sharded(filename)),
+        ("Read entry", read_flat_entry, read_sharded_entry),
+        ("Add entry", add_flat_entry, add_sharded_entry),
+        ("Stream", stream_flat, stream_sharded),
+    ]
+    print(f"{'Entries':>8} | {'Operation':<10} | {'Flat':>12} | {'Sharded':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for entry_count in [int(value) for value in args.entries.split(',')]:
+            flat_filename = os.path.join(directory, f"flat_{entry_count}.json")
+            sharded_filename = os.path.join(directory, f"sharded_{entry_count}.json")
+            DataManipulation._save_data(flat_filename, make_wallet(entry_count))
+            sharded_data = ShardedWallet.migrate(sharded_filename, make_wallet(entry_count))
+            ShardedWallet.flush(sharded_filename, sharded_data)
+            DataManipulation._save_data(sharded_filename, sharded_data)
+
+            for name, flat_operation, sharded_operation in operations:
+                flat_time = measure(flat_operation, flat_filename, entry_count, args.runs)
+                sharded_time = measure(sharded_operation, sharded_filename, entry_count, args.runs)
+                print(f"{entry_count:>8} | {name:<10} | {flat_time:>9.2f} ms | {sharded_time:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
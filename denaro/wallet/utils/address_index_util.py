@@ -0,0 +1,78 @@
+import hashlib
+import hmac as hmac_module
+from . import wallet_shard_util
+
+class AddressIndex:
+    """
+    Handles the keyed address index of encrypted wallets.
+
+    The index maps a keyed hash of each address to the position of its wallet
+    entry, so that an entry can be located without decrypting the others. The
+    key is derived from the wallet's HMAC key, so the index reveals nothing
+    about the addresses without the password. The index is only a hint: an
+    entry found through it is always checked against the requested address.
+    """
+    KEY_CONTEXT = b"denaro-address-index"
+    TAG_LENGTH = 16
+
+    @staticmethod
+    def derive_key(hmac_key):
+        """
+        Derive the address index key from the HMAC key of an unlocked wallet.
+        """
+        return hmac_module.new(hmac_key, AddressIndex.KEY_CONTEXT, hashlib.sha256).digest()
+
+    @staticmethod
+    def tag(index_key, address):
+        """
+        Returns the keyed hash of an address, as stored in the address index.
+        """
+        return hmac_module.new(index_key, address.encode('utf-8'), hashlib.sha256).digest()[:AddressIndex.TAG_LENGTH].hex()
+
+    @staticmethod
+    def add(data, index_key, section, position, address):
+        """
+        Adds the entry at the given position of a section to the address index of the wallet data.
+        """
+        address_tag = AddressIndex.tag(index_key, address)
+        data["wallet_data"].setdefault("address_index", {})[address_tag] = [section, position]
+        return address_tag
+
+    @staticmethod
+    def lookup(data, index_key, address):
+        """
+        Overview:
+            Looks up the wallet entry of an address in the address index.
+
+            Parameters:
+            - data: The wallet data.
+            - index_key: The address index key.
+            - address: The address to look up.
+
+            Returns:
+            - tuple: The section and position of the entry, or None if the address is not indexed.
+        """
+        address_tag = AddressIndex.tag(index_key, address)
+        location = data["wallet_data"].get("address_index", {}).get(address_tag)
+        entries = data["wallet_data"]["entry_data"].get("entries")
+        # The address index of a sharded wallet is stored in index buckets next to the shards
+        if not location and wallet_shard_util.ShardedWallet.is_lazy(entries):
+            location = wallet_shard_util.ShardedWallet.lookup_address_tag(entries.filename, address_tag)
+        if not location:
+            return None
+        section, position = location
+        if section not in ("entries", "imported_entries") or not 0 <= position < len(data["wallet_data"]["entry_data"].get(section, [])):
+            return None
+        return section, position
+
+    @staticmethod
+    def strip(wallet_data, base):
+        """
+        Removes index items of journaled entries, given the entry counts stored in the wallet file.
+        """
+        address_index = wallet_data.get("address_index")
+        if address_index is None:
+            return wallet_data
+        limits = {"entries": base[0], "imported_entries": base[1] or 0}
+        wallet_data["address_index"] = {address_tag: location for address_tag, location in address_index.items() if location[1] < limits.get(location[0], 0)}
+        return wallet_data
@@ -0,0 +1,169 @@
+import os
+import json
+import base64
+import random
+import hashlib
+import hmac as hmac_module
+import logging
+from Crypto.Cipher import AES
+from . import wallet_lock_util
+
+class AddressSidecar:
+    """
+    Handles the encrypted address list that sits next to an encrypted wallet file.
+
+    '<wallet>.addresses' holds the id and address of every wallet entry,
+    encrypted as a whole with AES-GCM. The key is derived from the wallet's
+    HMAC key, so reading the list costs a single Scrypt derivation instead of
+    decrypting the private material of every entry. The entry counts of the
+    wallet are stored with the list and authenticated by it, so a list that
+    does not match the wallet is detected and ignored. The list can always be
+    rebuilt from the wallet entries.
+    """
+    SUFFIX = ".addresses"
+    KEY_CONTEXT = b"denaro-address-sidecar"
+    VERSION = 1
+    SECTIONS = ["entries", "imported_entries"]
+
+    @staticmethod
+    def path(filename):
+        return f"{filename}{AddressSidecar.SUFFIX}"
+
+    @staticmethod
+    def derive_key(hmac_key):
+        """
+        Derive the address list key from the HMAC key of an unlocked wallet.
+        """
+        return hmac_module.new(hmac_key, AddressSidecar.KEY_CONTEXT, hashlib.sha256).digest()
+
+    @staticmethod
+    def counts(data):
+        """
+        Returns the number of generated and imported entries of loaded wallet data.
+        """
+        entry_data = data["wallet_data"]["entry_data"]
+        return [len(entry_data.get(section, [])) for section in AddressSidecar.SECTIONS]
+
+    @staticmethod
+    def read(filename, hmac_key, counts=None):
+        """
+        Overview:
+            Reads and decrypts the address list of a wallet.
+
+            Parameters:
+            - filename: The path of the wallet file.
+            - hmac_key: The HMAC key of the wallet.
+            - counts (list, optional): The entry counts of the wallet. A list with different counts is ignored.
+
+            Returns:
+            - dict: Maps 'entries' and 'imported_entries' to lists of [id, address] pairs, or None if the
+              list does not exist, can not be decrypted, or does not match the entry counts.
+        """
+        path = AddressSidecar.path(filename)
+        if not os.path.exists(path):
+            return None
+        try:
+            with wallet_lock_util.WalletLock.shared(filename):
+                with open(path, 'r') as f:
+                    stored = json.load(f)
+            if stored.get("version") != AddressSidecar.VERSION:
+                return None
+            cipher = AES.new(AddressSidecar.derive_key(hmac_key), AES.MODE_GCM, nonce=base64.b64decode(stored["nonce"]))
+            cipher.update(json.dumps(stored["counts"]).encode())
+            addresses = json.loads(cipher.decrypt_and_verify(base64.b64decode(stored["ciphertext"]), base64.b64decode(stored["tag"])).decode('utf-8'))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.info(f"Unable to read the address list of {filename}: {e}")
+            return None
+        if counts is not None and stored["counts"] != list(counts):
+            logging.info(f"The address list of {filename} does not match the wallet entries.")
+            return None
+        return addresses
+
+    @staticmethod
+    def write(filename, hmac_key, addresses):
+        """
+        Overview:
+            Encrypts and writes the address list of a wallet, replacing any previous list.
+
+            Parameters:
+            - filename: The path of the wallet file.
+            - hmac_key: The HMAC key of the wallet.
+            - addresses (dict): Maps 'entries' and 'imported_entries' to lists of [id, address] pairs.
+        """
+        addresses = {section: [list(item) for item in addresses.get(section, [])] for section in AddressSidecar.SECTIONS}
+        counts = [len(addresses[section]) for section in AddressSidecar.SECTIONS]
+        cipher = AES.new(AddressSidecar.derive_key(hmac_key), AES.MODE_GCM)
+        cipher.update(json.dumps(counts).encode())
+        ciphertext, tag = cipher.encrypt_and_digest(json.dumps(addresses).encode('utf-8'))
+        stored = {
+            "version": AddressSidecar.VERSION,
+            "counts": counts,
+            "nonce": base64.b64encode(cipher.nonce).decode(),
+            "ciphertext": base64.b64encode(ciphertext).decode(),
+            "tag": base64.b64encode(tag).decode()
+        }
+        path = AddressSidecar.path(filename)
+        with wallet_lock_util.WalletLock.exclusive(filename):
+            with open(f"{path}.tmp", 'w') as f:
+                json.dump(stored, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(f"{path}.tmp", path)
+
+    @staticmethod
+    def append(filename, hmac_key, section, items, counts):
+        """
+        Overview:
+            Adds new entries to the address list of a wallet. A wallet without entries starts a new list.
+            A missing or out of date list is left as it is, since it can only be rebuilt from the wallet
+            entries.
+
+            Parameters:
+            - filename: The path of the wallet file.
+            - hmac_key: The HMAC key of the wallet.
+            - section: 'entries' or 'imported_entries'.
+            - items (list): The [id, address] pairs of the new entries.
+            - counts (list): The entry counts of the wallet before the new entries were added.
+
+            Returns:
+            - bool: True if the address list was updated.
+        """
+        with wallet_lock_util.WalletLock.exclusive(filename):
+            if not any(counts):
+                addresses = {name: [] for name in AddressSidecar.SECTIONS}
+            else:
+                addresses = AddressSidecar.read(filename, hmac_key, counts)
+            if addresses is None:
+                return False
+            addresses[section].extend(items)
+            AddressSidecar.write(filename, hmac_key, addresses)
+        return True
+
+    @staticmethod
+    def remove(filename):
+        """
+        Overwrites the address list of a wallet with random data and removes it.
+        """
+        path = AddressSidecar.path(filename)
+        if not os.path.exists(path):
+            return
+        try:
+            file_size = os.path.getsize(path)
+            if file_size > 0:
+                with open(path, "r+b") as file:
+                    file.write(bytearray(random.getrandbits(8) for _ in range(file_size)))
+                    file.flush()
+                    os.fsync(file.fileno())
+            os.remove(path)
+        except OSError as e:
+            logging.error(f"Unable to remove the address list: {e}")
+
+    @staticmethod
+    def copy(filename, destination):
+        """
+        Copies the address list of a wallet next to a copy of the wallet file.
+        """
+        path = AddressSidecar.path(filename)
+        if os.path.exists(path):
+            with open(path, 'rb') as f_in, open(AddressSidecar.path(destination), 'wb') as f_out:
+                f_out.write(f_in.read())
@@ -0,0 +1,150 @@
+import logging
+import requests
+from . import http_transport_util
+from . import balance_cache_util
+
+class AddressWatcher:
+    """
+    Watches the balances of a set of addresses by following the chain tip of a node.
+
+    The chain tip is polled with '/get_mining_info', a single small request,
+    instead of asking for the balance of every address. The interval between
+    polls starts at MIN_INTERVAL_SECONDS, grows by BACKOFF_FACTOR up to
+    MAX_INTERVAL_SECONDS while the tip stays put, and returns to the shortest
+    interval once the tip moves or while an address has a pending balance.
+
+    When the tip moves, the new blocks are read from '/get_block' and only the
+    addresses that appear in their transactions, together with the addresses
+    that had a pending balance, are refreshed. If the blocks can not be read,
+    or more than MAX_SCANNED_BLOCKS were added since the last poll, every
+    address is refreshed instead. Balances that changed are reported through
+    the 'on_change' callback.
+
+    Balances are fetched by the 'refresh' callable, which takes a list of
+    addresses and returns a dict mapping the addresses it could fetch to
+    (balance, pending_balance), so the watcher does not depend on how the
+    caller requests, caches or stores balances.
+    """
+    MIN_INTERVAL_SECONDS = 2
+    MAX_INTERVAL_SECONDS = 30
+    BACKOFF_FACTOR = 1.5
+    MAX_SCANNED_BLOCKS = 10
+
+    def __init__(self, node, addresses, refresh, on_change, timeout=None):
+        """
+        :param node: The node URL.
+        :param addresses: The addresses to watch.
+        :param refresh: Called with a list of addresses, returns a dict mapping addresses to (balance, pending_balance).
+        :param on_change: Called with the address, its balance, its pending balance and its previous
+            (balance, pending_balance), or None for the first balance of the address.
+        :param timeout: The timeout of each request in seconds.
+        """
+        self.node = node
+        self.addresses = list(dict.fromkeys(addresses))
+        self.refresh = refresh
+        self.on_change = on_change
+        self.timeout = timeout
+        self.tip = None
+        self.interval = self.MIN_INTERVAL_SECONDS
+        self.balances = {}
+        # Requests made by the watcher, to compare with refreshing every address on every poll
+        self.stats = {"polls": 0, "block_requests": 0, "refreshed_addresses": 0, "full_refreshes": 0}
+
+    def _pending(self):
+        return [address for address, (_, pending_balance) in self.balances.items() if pending_balance]
+
+    def _refresh(self, addresses):
+        if not addresses:
+            return
+        self.stats["refreshed_addresses"] += len(addresses)
+        for address, balance in self.refresh(addresses).items():
+            previous = self.balances.get(address)
+            self.balances[address] = tuple(balance)
+            if previous != self.balances[address]:
+                self.on_change(address, *self.balances[address], previous)
+
+    def start(self, balances=None):
+        """
+        Overview:
+            Looks up the chain tip and sets the balances that later changes are compared with.
+
+            Parameters:
+            - balances (dict, optional): Maps addresses to their current (balance, pending_balance), e.g. from
+              a balance check that just completed. Addresses without a balance are refreshed, and reported
+              through 'on_change' with no previous balance.
+        """
+        self.tip = balance_cache_util.BalanceCache.chain_tip(self.node, self.timeout, max_age=0)
+        self.balances = {address: tuple(balance) for address, balance in (balances or {}).items() if address in self.addresses}
+        self._refresh([address for address in self.addresses if address not in self.balances])
+
+    def poll(self):
+        """
+        Overview:
+            Looks up the chain tip once, refreshes the addresses affected by the blocks added since the last
+            poll, and adjusts the polling interval.
+
+            Returns:
+            - bool: True if the chain tip moved.
+        """
+        self.stats["polls"] += 1
+        tip = balance_cache_util.BalanceCache.chain_tip(self.node, self.timeout, max_age=0)
+        if tip is None or tip == self.tip:
+            pending = self._pending()
+            # Pending transactions are confirmed in one of the next blocks, so the tip is followed closely
+            self.interval = self.MIN_INTERVAL_SECONDS if pending else min(self.MAX_INTERVAL_SECONDS, self.interval * self.BACKOFF_FACTOR)
+            return False
+        touched = self._touched_addresses(self.tip, tip)
+        if touched is None:
+            self.stats["full_refreshes"] += 1
+            addresses = self.addresses
+        else:
+            pending = set(self._pending())
+            addresses = [address for address in self.addresses if address in touched or address in pending]
+        self.tip = tip
+        self._refresh(addresses)
+        self.interval = self.MIN_INTERVAL_SECONDS
+        return True
+
+    def watch(self, stop_signal, balances=None):
+        """
+        Overview:
+            Watches the addresses until the stop signal is set.
+
+            Parameters:
+            - stop_signal (threading.Event): Stops watching once it is set.
+            - balances (dict, optional): Passed on to start.
+        """
+        self.start(balances)
+        while not stop_signal.wait(self.interval):
+            self.poll()
+
+    def _touched_addresses(self, old_tip, new_tip):
+        """
+        Returns the watched addresses that appear in the inputs or outputs of the blocks after old_tip up to
+        new_tip, or None if they can not be determined.
+        """
+        if not isinstance(old_tip, int) or not isinstance(new_tip, int):
+            return None
+        # A chain reorganization, or too many blocks to read one by one
+        if new_tip <= old_tip or new_tip - old_tip > self.MAX_SCANNED_BLOCKS:
+            return None
+        watched = set(self.addresses)
+        touched = set()
+        for block_id in range(old_tip + 1, new_tip + 1):
+            self.stats["block_requests"] += 1
+            try:
+                request = http_transport_util.HttpTransport.get(f"{self.node}/get_block", params={'block': block_id, 'full_transactions': True}, timeout=self.timeout)
+                request.raise_for_status()
+                response = request.json()
+                transactions = response['result']['transactions']
+            except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+                logging.info(f"Unable to read block {block_id} from {self.node}: {e}")
+                return None
+            for transaction in transactions:
+                # Transactions are only given as hex without 'full_transactions'
+                if not isinstance(transaction, dict):
+                    return None
+                for item in transaction.get('inputs', []) + transaction.get('outputs', []):
+                    if item.get('address') in watched:
+                        touched.add(item['address'])
+        return touched
@@ -0,0 +1,261 @@
+import os
+import json
+import time
+import zlib
+import hashlib
+import logging
+import datetime
+from . import wallet_journal_util
+from . import wallet_shard_util
+from . import wallet_lock_util
+from . import address_sidecar_util
+
+class BackupStore:
+    """
+    Handles the content-addressed wallet backup store.
+
+    A backup snapshot splits the wallet file, its journal and its shards into
+    content-defined chunks. Each chunk is stored once, compressed and named by
+    its SHA-256 digest, so a snapshot of a wallet that barely changed only
+    adds the few chunks that differ. A snapshot manifest lists the chunks of
+    every file, and any snapshot can be restored.
+
+    Layout of '<backup directory>/store':
+    - chunks/<first two hex digits>/<sha256>: zlib compressed chunks.
+    - snapshots/<wallet filename>/<snapshot id>.json: snapshot manifests.
+    """
+    STORE_DIRECTORY = "store"
+    DEFAULT_DIRECTORY = "./wallets/wallet_backups"
+    # Content-defined chunking bounds, with an average chunk size of about 8 KiB
+    MIN_CHUNK_SIZE = 2048
+    MAX_CHUNK_SIZE = 65536
+    CHUNK_MASK = ((1 << 13) - 1) << 51
+    # Gear hash table for content-defined chunking
+    GEAR = [int.from_bytes(hashlib.sha256(bytes([value])).digest()[:8], 'big') for value in range(256)]
+
+    @staticmethod
+    def store_directory(directory=None):
+        return os.path.join(directory or BackupStore.DEFAULT_DIRECTORY, BackupStore.STORE_DIRECTORY)
+
+    @staticmethod
+    def _chunk(content):
+        """
+        Splits content into chunks at positions chosen by a rolling gear hash, so that an insertion only
+        changes the chunks around it.
+        """
+        gear = BackupStore.GEAR
+        mask = BackupStore.CHUNK_MASK
+        length = len(content)
+        start = 0
+        while start < length:
+            end = min(start + BackupStore.MAX_CHUNK_SIZE, length)
+            cut = end
+            rolling_hash = 0
+            for position in range(start + BackupStore.MIN_CHUNK_SIZE, end):
+                rolling_hash = ((rolling_hash << 1) + gear[content[position]]) & 0xFFFFFFFFFFFFFFFF
+                if not rolling_hash & mask:
+                    cut = position + 1
+                    break
+            yield content[start:cut]
+            start = cut
+
+    @staticmethod
+    def _chunk_path(store, digest):
+        return os.path.join(store, "chunks", digest[:2], digest)
+
+    @staticmethod
+    def _write_chunk(store, chunk):
+        """
+        Stores a chunk unless it is already present. Returns its digest and the number of bytes written.
+        """
+        digest = hashlib.sha256(chunk).hexdigest()
+        path = BackupStore._chunk_path(store, digest)
+        if os.path.exists(path):
+            return digest, 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressed = zlib.compress(chunk, 9)
+        with open(f"{path}.tmp", 'wb') as f:
+            f.write(compressed)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{path}.tmp", path)
+        return digest, len(compressed)
+
+    @staticmethod
+    def _read_chunk(store, digest):
+        with open(BackupStore._chunk_path(store, digest), 'rb') as f:
+            chunk = zlib.decompress(f.read())
+        if hashlib.sha256(chunk).hexdigest() != digest:
+            raise ValueError(f"Backup chunk {digest} is corrupted")
+        return chunk
+
+    @staticmethod
+    def _wallet_files(filename):
+        """
+        Returns the names and paths of the files that make up a wallet: the wallet file, its journal, its address
+        list and its shards.
+        """
+        files = [("wallet", filename)]
+        journal_path = wallet_journal_util.WalletJournal.journal_path(filename)
+        if os.path.exists(journal_path):
+            files.append(("journal", journal_path))
+        addresses_path = address_sidecar_util.AddressSidecar.path(filename)
+        if os.path.exists(addresses_path):
+            files.append(("addresses", addresses_path))
+        shard_directory = wallet_shard_util.ShardedWallet.shard_directory(filename)
+        if os.path.isdir(shard_directory):
+            for name in sorted(os.listdir(shard_directory)):
+                if not name.endswith(".tmp"):
+                    files.append((f"shards/{name}", os.path.join(shard_directory, name)))
+        return files
+
+    @staticmethod
+    def _snapshot_directory(store, filename):
+        return os.path.join(store, "snapshots", os.path.basename(filename))
+
+    @staticmethod
+    def create(filename, directory=None):
+        """
+        Overview:
+            Creates a backup snapshot of a wallet. The wallet is read under its shared lock, so the snapshot
+            is consistent with concurrent writers.
+
+            Parameters:
+            - filename: The path of the wallet file.
+            - directory (str, optional): The backup directory. Defaults to './wallets/wallet_backups'.
+
+            Returns:
+            - dict: The snapshot manifest, with the number of new chunks and bytes stored by this snapshot.
+        """
+        store = BackupStore.store_directory(directory)
+        snapshot_directory = BackupStore._snapshot_directory(store, filename)
+        os.makedirs(snapshot_directory, exist_ok=True)
+
+        snapshot_id = datetime.datetime.fromtimestamp(int(time.time())).strftime('%Y-%m-%d_%H-%M-%S')
+        suffix = 1
+        while os.path.exists(os.path.join(snapshot_directory, f"{snapshot_id}.json")):
+            suffix += 1
+            snapshot_id = f"{datetime.datetime.fromtimestamp(int(time.time())).strftime('%Y-%m-%d_%H-%M-%S')}_{suffix}"
+
+        manifest = {"snapshot": snapshot_id, "wallet": os.path.basename(filename), "source": os.path.abspath(filename), "created": int(time.time()), "files": []}
+        new_chunks = 0
+        stored_bytes = 0
+        with wallet_lock_util.WalletLock.shared(filename):
+            for name, path in BackupStore._wallet_files(filename):
+                with open(path, 'rb') as f:
+                    content = f.read()
+                chunks = []
+                for chunk in BackupStore._chunk(content):
+                    digest, written = BackupStore._write_chunk(store, chunk)
+                    chunks.append(digest)
+                    if written:
+                        new_chunks += 1
+                        stored_bytes += written
+                manifest["files"].append({"name": name, "size": len(content), "sha256": hashlib.sha256(content).hexdigest(), "chunks": chunks})
+
+        # The manifest is written last, so an interrupted backup leaves no snapshot behind
+        manifest_path = os.path.join(snapshot_directory, f"{snapshot_id}.json")
+        with open(f"{manifest_path}.tmp", 'w') as f:
+            json.dump(manifest, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+        manifest["new_chunks"] = new_chunks
+        manifest["stored_bytes"] = stored_bytes
+        return manifest
+
+    @staticmethod
+    def list_snapshots(filename, directory=None):
+        """
+        Overview:
+            Lists the backup snapshots of a wallet, oldest first.
+
+            Parameters:
+            - filename: The path of the wallet file.
+            - directory (str, optional): The backup directory.
+
+            Returns:
+            - list: The snapshot manifests.
+        """
+        snapshot_directory = BackupStore._snapshot_directory(BackupStore.store_directory(directory), filename)
+        if not os.path.isdir(snapshot_directory):
+            return []
+        snapshots = []
+        for name in os.listdir(snapshot_directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(snapshot_directory, name), 'r') as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError) as e:
+                logging.error(f"Unable to read backup snapshot {name}: {e}")
+        return sorted(snapshots, key=lambda snapshot: (snapshot["created"], snapshot["snapshot"]))
+
+    @staticmethod
+    def restore(filename, snapshot_id, destination, directory=None):
+        """
+        Overview:
+            Restores a backup snapshot of a wallet to a destination path, together with its journal,
+            address list and shards. Every chunk and every restored file is checked against its digest before any
+            file is moved in place. Existing files are never overwritten.
+
+            Parameters:
+            - filename: The path of the wallet file the snapshot was created from.
+            - snapshot_id: The id of the snapshot.
+            - destination: The path of the restored wallet file.
+            - directory (str, optional): The backup directory.
+
+            Returns:
+            - dict: The manifest of the restored snapshot.
+        """
+        store = BackupStore.store_directory(directory)
+        manifest_path = os.path.join(BackupStore._snapshot_directory(store, filename), f"{snapshot_id}.json")
+        if not os.path.exists(manifest_path):
+            raise ValueError(f"Backup snapshot '{snapshot_id}' does not exist for {os.path.basename(filename)}")
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+
+        targets = []
+        for item in manifest["files"]:
+            if item["name"] == "wallet":
+                target = destination
+            elif item["name"] == "journal":
+                target = wallet_journal_util.WalletJournal.journal_path(destination)
+            elif item["name"] == "addresses":
+                target = address_sidecar_util.AddressSidecar.path(destination)
+            else:
+                target = os.path.join(wallet_shard_util.ShardedWallet.shard_directory(destination), os.path.basename(item["name"]))
+            if os.path.exists(target):
+                raise ValueError(f"Destination file already exists: {target}")
+            targets.append((item, target))
+
+        with wallet_lock_util.WalletLock.exclusive(destination):
+            # Every file is written to a temporary file and verified first, so a corrupted snapshot leaves nothing behind
+            written = []
+            created_directories = []
+            try:
+                for item, target in targets:
+                    content = b"".join(BackupStore._read_chunk(store, digest) for digest in item["chunks"])
+                    if len(content) != item["size"] or hashlib.sha256(content).hexdigest() != item["sha256"]:
+                        raise ValueError(f"Backup snapshot '{snapshot_id}' is corrupted")
+                    target_directory = os.path.dirname(os.path.abspath(target))
+                    if not os.path.isdir(target_directory):
+                        os.makedirs(target_directory)
+                        created_directories.append(target_directory)
+                    with open(f"{target}.tmp", 'wb') as f:
+                        written.append(f"{target}.tmp")
+                        f.write(content)
+                        f.flush()
+                        os.fsync(f.fileno())
+            except Exception:
+                for temp_target in written:
+                    if os.path.exists(temp_target):
+                        os.remove(temp_target)
+                for target_directory in reversed(created_directories):
+                    if not os.listdir(target_directory):
+                        os.rmdir(target_directory)
+                raise
+            # The wallet file is moved in place last, so that it only appears once its journal and shards are in place
+            for item, target in sorted(targets, key=lambda pair: pair[0]["name"] == "wallet"):
+                os.replace(f"{target}.tmp", target)
+        return manifest
@@ -0,0 +1,107 @@
+import time
+import logging
+import threading
+import requests
+from . import http_transport_util
+
+class BalanceCache:
+    """
+    Handles the balance cache of this process.
+
+    The balances of addresses are cached per node and per address, together
+    with the id of the last block of the node when they were fetched. As long
+    as the chain tip of the node has not moved, a cached balance is served
+    without asking the node again. Once the tip advances, cached balances are
+    stale and have to be revalidated. Whether an address had pending
+    transactions is stored along with its balance, and such balances are never
+    served from the cache, since pending transactions change without a new
+    block.
+    """
+    # The chain tip of a node is looked up at most once in this many seconds
+    TIP_TTL_SECONDS = 5
+
+    _entries = {}
+    _tips = {}
+    _guard = threading.Lock()
+
+    @staticmethod
+    def chain_tip(node, timeout=None, max_age=None):
+        """
+        Overview:
+            Returns the id of the last block of a node, from '/get_mining_info'.
+
+            Parameters:
+            - node: The node URL.
+            - timeout (float, optional): The timeout of the request in seconds.
+            - max_age (float, optional): The age in seconds up to which a tip looked up earlier is returned instead
+              of asking the node again. Defaults to TIP_TTL_SECONDS.
+
+            Returns:
+            - int: The id of the last block, or None if it could not be determined.
+        """
+        now = time.monotonic()
+        if max_age is None:
+            max_age = BalanceCache.TIP_TTL_SECONDS
+        with BalanceCache._guard:
+            cached = BalanceCache._tips.get(node)
+            if cached and now - cached[1] < max_age:
+                return cached[0]
+        try:
+            request = http_transport_util.HttpTransport.get(f"{node}/get_mining_info", timeout=timeout)
+            request.raise_for_status()
+            tip = request.json().get('result', {}).get('last_block', {}).get('id')
+        except (requests.RequestException, ValueError, AttributeError) as e:
+            logging.info(f"Unable to get the chain tip of {node}: {e}")
+            return None
+        if tip is None:
+            return None
+        with BalanceCache._guard:
+            BalanceCache._tips[node] = (tip, now)
+        return tip
+
+    @staticmethod
+    def get(node, address, tip):
+        """
+        Overview:
+            Returns the cached balance of an address.
+
+            Parameters:
+            - node: The node URL.
+            - address: The address.
+            - tip: The current chain tip of the node.
+
+            Returns:
+            - tuple: (balance, pending_balance, fresh, has_pending), where fresh is False if the tip advanced since
+              the balance was fetched and has_pending tells whether the address had pending transactions, or None
+              if the address has no cached balance.
+        """
+        with BalanceCache._guard:
+            entry = BalanceCache._entries.get((node, address))
+        if entry is None:
+            return None
+        cached_tip, balance, pending_balance, has_pending = entry
+        return balance, pending_balance, tip is not None and cached_tip == tip, has_pending
+
+    @staticmethod
+    def put(node, address, tip, balance, pending_balance, has_pending=True):
+        """
+        Caches the balance of an address, fetched at the given chain tip, and whether the address had pending
+        transactions. Unless told otherwise, an address is assumed to have them.
+        """
+        if tip is None:
+            return
+        with BalanceCache._guard:
+            BalanceCache._entries[(node, address)] = (tip, balance, pending_balance, has_pending)
+
+    @staticmethod
+    def clear(node=None):
+        """
+        Removes the cached balances of a node, or of every node.
+        """
+        with BalanceCache._guard:
+            if node is None:
+                BalanceCache._entries.clear()
+                BalanceCache._tips.clear()
+            else:
+                BalanceCache._entries = {key: value for key, value in BalanceCache._entries.items() if key[0] != node}
+                BalanceCache._tips.pop(node, None)
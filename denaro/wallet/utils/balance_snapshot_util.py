@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import base64
+import random
+import hashlib
+import hmac as hmac_module
+import logging
+from Crypto.Cipher import AES
+
+class BalanceSnapshot:
+    """
+    Handles the balance snapshot that sits next to a wallet file.
+
+    '<wallet>.balances' holds the last known balance and pending balance of
+    every address of the wallet, with the node and block height they were
+    fetched at and the time of the snapshot. It lets the GUI show balances as
+    soon as a wallet is opened, before any request to the node. The snapshot
+    of an encrypted wallet is encrypted with AES-GCM under a key derived from
+    the wallet's HMAC key, like its address list. The snapshot is a cache and
+    is replaced after every complete balance check.
+    """
+    SUFFIX = ".balances"
+    KEY_CONTEXT = b"denaro-balance-snapshot"
+    VERSION = 1
+
+    @staticmethod
+    def path(filename):
+        return f"{filename}{BalanceSnapshot.SUFFIX}"
+
+    @staticmethod
+    def derive_key(hmac_key):
+        """
+        Derive the snapshot key from the HMAC key of an unlocked wallet.
+        """
+        return hmac_module.new(hmac_key, BalanceSnapshot.KEY_CONTEXT, hashlib.sha256).digest()
+
+    @staticmethod
+    def read(filename, key=None):
+        """
+        Overview:
+            Reads the balance snapshot of a wallet.
+
+            Parameters:
+            - filename: The path of the wallet file.
+            - key (bytes, optional): The snapshot key of an encrypted wallet.
+
+            Returns:
+            - dict: The snapshot, with 'node', 'block', 'timestamp' and 'balances', which maps addresses to
+              [balance, pending_balance] strings, or None if there is no readable snapshot.
+        """
+        path = BalanceSnapshot.path(filename)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                stored = json.load(f)
+            if stored.get("version") != BalanceSnapshot.VERSION:
+                return None
+            if stored.get("encrypted"):
+                if key is None:
+                    return None
+                cipher = AES.new(key, AES.MODE_GCM, nonce=base64.b64decode(stored["nonce"]))
+                return json.loads(cipher.decrypt_and_verify(base64.b64decode(stored["ciphertext"]), base64.b64decode(stored["tag"])).decode('utf-8'))
+            if key is not None:
+                # An encrypted wallet never has a plain snapshot
+                return None
+            return stored["snapshot"]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.info(f"Unable to read the balance snapshot of {filename}: {e}")
+            return None
+
+    @staticmethod
+    def write(filename, balances, node=None, block=None, key=None):
+        """
+        Overview:
+            Writes the balance snapshot of a wallet, replacing any previous snapshot.
+
+            Parameters:
+            - filename: The path of the wallet file.
+            - balances (dict): Maps addresses to [balance, pending_balance] strings.
+            - node (str, optional): The node the balances were fetched from.
+            - block (int, optional): The id of the last block of the node when the balances were fetched.
+            - key (bytes, optional): The snapshot key of an encrypted wallet. Without it the snapshot is written in
+              plain JSON.
+        """
+        snapshot = {"node": node, "block": block, "timestamp": int(time.time()), "balances": balances}
+        if key is None:
+            stored = {"version": BalanceSnapshot.VERSION, "encrypted": False, "snapshot": snapshot}
+        else:
+            cipher = AES.new(key, AES.MODE_GCM)
+            ciphertext, tag = cipher.encrypt_and_digest(json.dumps(snapshot).encode('utf-8'))
+            stored = {
+                "version": BalanceSnapshot.VERSION,
+                "encrypted": True,
+                "nonce": base64.b64encode(cipher.nonce).decode(),
+                "ciphertext": base64.b64encode(ciphertext).decode(),
+                "tag": base64.b64encode(tag).decode()
+            }
+        path = BalanceSnapshot.path(filename)
+        try:
+            with open(f"{path}.tmp", 'w') as f:
+                json.dump(stored, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            logging.warning(f"Unable to save the balance snapshot of {filename}: {e}")
+
+    @staticmethod
+    def remove(filename):
+        """
+        Overwrites the balance snapshot of a wallet with random data and removes it.
+        """
+        path = BalanceSnapshot.path(filename)
+        if not os.path.exists(path):
+            return
+        try:
+            file_size = os.path.getsize(path)
+            if file_size > 0:
+                with open(path, "r+b") as file:
+                    file.write(bytearray(random.getrandbits(8) for _ in range(file_size)))
+                    file.flush()
+                    os.fsync(file.fileno())
+            os.remove(path)
+        except OSError as e:
+            logging.error(f"Unable to remove the balance snapshot: {e}")
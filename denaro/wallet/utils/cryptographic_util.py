@@ -4,8 +4,8 @@ import pyotp
 from Crypto.Cipher import AES, ChaCha20_Poly1305
 import logging
 import base64
-import data_manipulation_util
-import verification_util
+from . import data_manipulation_util
+from . import verification_util
 
 # Global variables
 FAILED_ATTEMPTS = 0
@@ -6,11 +6,17 @@ import random
 import time
 import ctypes
 import json
-import shutil
-import datetime
-from filelock import FileLock
-import cryptographic_util
-import verification_util
+from . import cryptographic_util
+from . import verification_util
+from . import wallet_journal_util
+from . import wallet_container_util
+from . import wallet_metadata_util
+from . import wallet_shard_util
+from . import wallet_lock_util
+from . import backup_store_util
+from . import address_sidecar_util
+from . import balance_snapshot_util
+from . import history_store_util
 
 class DataManipulation:
     """
@@ -64,6 +70,9 @@ class DataManipulation:
         key_list = [["entry_data", "entries"],["totp_secret"]]
         if "imported_entries" in data["wallet_data"]["entry_data"]:
             key_list.append(["entry_data", "imported_entries"])
+        # The entries of sharded wallets are stored outside of the wallet file and are left untouched
+        if wallet_shard_util.ShardedWallet.is_sharded(data):
+            key_list = [key for key in key_list if key[0] != "entry_data"]
         #key_list.append(["entry_data", "imported_entries"])
 
         if deterministic:
@@ -79,15 +88,26 @@ class DataManipulation:
                 # Navigate through nested keys
                 target_data = target_data.get(k, {})
             
-            # Convert to list if target_data is not a list
-            if not isinstance(target_data, list):
+            # Convert to list if target_data is not a list, reading lazily read container entries
+            if wallet_container_util.WalletContainer.is_lazy(target_data):
+                target_data = list(target_data)
+            elif not isinstance(target_data, list):
                 target_data = [target_data]
             
             # Convert each entry to string
             target_data = [str(entry) for entry in target_data]
+
+            # Journaled entries are not stored in the wallet file and are left untouched
+            journaled_data = []
+            if "journal_state" in data and key[0] == "entry_data" and key[1] != "key_data":
+                base_count = data["journal_state"]["base"][0 if key[1] == "entries" else 1] or 0
+                target_data, journaled_data = target_data[:base_count], target_data[base_count:]
+                if not target_data:
+                    continue
             
             # Update or reset attempts
             updated_data, attempts_left = update_or_reset(target_data, hmac_salt)
+            updated_data = updated_data + journaled_data
             
             # Save the updated data back into the original data structure
             if len(key) == 1:
@@ -173,30 +193,41 @@ class DataManipulation:
     def _save_data(filename, data):
         """
         Persistently stores wallet data to a specified file.
+        Entries held in the wallet journal or in wallet shards are not written to the
+        wallet file, and the wallet header is refreshed. The file is written under the
+        exclusive wallet lock and atomically replaced, so readers never see a partial file.
         """
+        data = wallet_metadata_util.WalletMetadata.with_header(wallet_shard_util.ShardedWallet.stored_form(wallet_journal_util.WalletJournal.strip(data)))
         try:
-            with open(filename, 'w') as f:
-                if data:
-                    json.dump(data, f, indent=4)
-                    DataManipulation.secure_delete([var for var in locals().values() if var is not None])
-                else: 
-                    f = data
+            with wallet_lock_util.WalletLock.exclusive(filename):
+                # Wallet containers keep their binary format
+                if isinstance(data, dict) and "wallet_data" in data and wallet_container_util.WalletContainer.uses_container(filename):
+                    wallet_container_util.WalletContainer.save(filename, data)
                     DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+                    return
+                temp_filename = f"{filename}.tmp"
+                with open(temp_filename, 'w') as f:
+                    if data:
+                        json.dump(data, f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_filename, filename)
+                DataManipulation.secure_delete([var for var in locals().values() if var is not None])
         except Exception as e:
             logging.error(f"Error saving data to file: {str(e)}")
             DataManipulation.secure_delete([var for var in locals().values() if var is not None])
     
     @staticmethod
     def backup_wallet(filename, directory):
-        # Construct the backup filename
-        base_filename = os.path.basename(filename)
-        backup_name, _ = os.path.splitext(base_filename)
-        #backup_path = os.path.join("./wallets/wallet_backups", f"{backup_name}_backup_{datetime.datetime.fromtimestamp(int(time.time())).strftime('%Y-%m-%d_%H-%M-%S')}") + ".json"
-        backup_path = os.path.join("./wallets/wallet_backups" if not directory else directory, f"{backup_name}_backup_{datetime.datetime.fromtimestamp(int(time.time())).strftime('%Y-%m-%d_%H-%M-%S')}") + ".json"
+        """
+        Creates a deduplicated backup snapshot of a wallet, its journal and its shards
+        in the backup store of the given directory. Only chunks that are not already
+        stored are written.
+        """
         try:
-            # Create the backup
-            shutil.copy(filename, backup_path)
-            print(f"Backup created at: {backup_path}")
+            snapshot = backup_store_util.BackupStore.create(filename, directory)
+            print(f"Backup snapshot {snapshot['snapshot']} created in: {backup_store_util.BackupStore.store_directory(directory)}")
+            print(f"{snapshot['new_chunks']} new chunk(s), {snapshot['stored_bytes']} byte(s) stored.")
             DataManipulation.secure_delete([var for var in locals().values() if var is not None])
             return True
         except Exception as e:
@@ -432,9 +463,10 @@ class DataManipulation:
         if not os.path.exists(file_path):
             raise ValueError("File does not exist")
         
-        lock = FileLock(file_path+".lock")
         try:
-            with lock:
+            with wallet_lock_util.WalletLock.exclusive(file_path):
+                # A wallet container must not be mapped while it is wiped
+                wallet_container_util.ContainerEntries.release_all(file_path)
                 with open(file_path, "r+b") as file:
                     file_size = os.path.getsize(file.name)
                     if file_size == 0:
@@ -446,7 +478,21 @@ class DataManipulation:
                         os.fsync(file.fileno())
                 with open(file_path, "w+b") as file:
                     file.truncate(0)
-            lock.release()
+                # Wipe the wallet journal, which holds entries that are not yet in the wallet file
+                journal_path = wallet_journal_util.WalletJournal.journal_path(file_path)
+                if os.path.exists(journal_path):
+                    with open(journal_path, "r+b") as file:
+                        file_size = os.path.getsize(file.name)
+                        if file_size > 0:
+                            DataManipulation.overwrite_with_pattern(file, bytearray(random.getrandbits(8) for _ in range(file_size)), file_size)
+                            file.flush()
+                            os.fsync(file.fileno())
+                    os.remove(journal_path)
+                # Wipe the address list, the balance snapshot, the history store and the shards of the wallet
+                address_sidecar_util.AddressSidecar.remove(file_path)
+                balance_snapshot_util.BalanceSnapshot.remove(file_path)
+                history_store_util.HistoryStore.remove(file_path)
+                wallet_shard_util.ShardedWallet.wipe(file_path)
         except IOError as e:
             print()
             logging.error(f"IOError during file overwrite: {e}")
@@ -456,8 +502,6 @@ class DataManipulation:
         except Exception as e:
             print()
             logging.error(f"Unexpected error occurred: {e}")
-        finally:
-            lock.release()
         
         if from_gui:
             callback_object.root.stored_data.operation_mode = None
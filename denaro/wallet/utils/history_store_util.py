@@ -0,0 +1,408 @@
+import os
+import json
+import random
+import sqlite3
+import hashlib
+import hmac as hmac_module
+import logging
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from Crypto.Cipher import AES
+from . import http_transport_util
+from . import balance_cache_util
+from . import node_capabilities_util
+
+class HistoryStore:
+    """
+    Handles the history store that sits next to a wallet file.
+
+    '<wallet>.history' is an SQLite database that holds, per node and per
+    address, the last address information fetched from the node, i.e. its
+    balance, spendable outputs and pending transactions, together with the id
+    of the last block of the node at that time. It also holds the confirmed
+    transactions of every address that were synced so far, newest last.
+
+    Transactions are synced incrementally: the node's address history is paged
+    from the newest transaction until a transaction that is already stored is
+    reached, and older pages are only requested when they are needed. As long
+    as the chain tip has not moved, nothing is requested at all.
+
+    For an encrypted wallet, addresses and transaction hashes are stored as
+    HMAC tags and every stored value is encrypted with AES-GCM, under keys
+    derived from the wallet's HMAC key. A store that was written under another
+    key, e.g. before the password of the wallet was changed, is emptied when it
+    is opened. The store is a cache and can be removed at any time.
+    """
+    SUFFIX = ".history"
+    KEY_CONTEXT = b"denaro-history-store"
+    VERSION = 1
+    # The number of transactions per page of the node's address history, which is also the node's maximum
+    PAGE_SIZE = 50
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS accounts (account TEXT PRIMARY KEY, tip INTEGER, state BLOB, history_tip INTEGER, complete INTEGER NOT NULL DEFAULT 0)",
+        "CREATE TABLE IF NOT EXISTS transactions (account TEXT NOT NULL, seq INTEGER NOT NULL, tx_id TEXT NOT NULL, data BLOB NOT NULL, PRIMARY KEY (account, seq), UNIQUE (account, tx_id))"
+    )
+
+    def __init__(self, filename, key=None):
+        """
+        Opens the history store of a wallet, creating it if needed.
+
+        :param filename: The path of the wallet file.
+        :param key: The store key of an encrypted wallet, or None for an unencrypted wallet.
+        :raises: sqlite3.Error
+        """
+        self.filename = filename
+        self.key = key
+        self._lock = threading.Lock()
+        # The store is shared by the threads of the GUI, and every access holds the lock
+        self._db = sqlite3.connect(HistoryStore.path(filename), check_same_thread=False)
+        try:
+            with self._db:
+                for statement in HistoryStore.SCHEMA:
+                    self._db.execute(statement)
+                stored = dict(self._db.execute("SELECT name, value FROM meta").fetchall())
+                key_check = hmac_module.new(key, b"key-check", hashlib.sha256).hexdigest() if key else ""
+                if stored.get("version") != str(HistoryStore.VERSION) or stored.get("key_check") != key_check:
+                    self._db.execute("DELETE FROM accounts")
+                    self._db.execute("DELETE FROM transactions")
+                    self._db.executemany("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", [("version", str(HistoryStore.VERSION)), ("key_check", key_check)])
+        except sqlite3.Error:
+            self._db.close()
+            raise
+
+    @staticmethod
+    def path(filename):
+        return f"{filename}{HistoryStore.SUFFIX}"
+
+    @staticmethod
+    def derive_key(hmac_key):
+        """
+        Derive the store key from the HMAC key of an unlocked wallet.
+        """
+        return hmac_module.new(hmac_key, HistoryStore.KEY_CONTEXT, hashlib.sha256).digest()
+
+    @staticmethod
+    def open(filename, key=None):
+        """
+        Opens the history store of a wallet, or returns None if it can not be opened.
+        """
+        try:
+            return HistoryStore(filename, key)
+        except sqlite3.Error as e:
+            logging.warning(f"Unable to open the history store of {filename}: {e}")
+            return None
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # Stored values
+
+    def _account_id(self, node, address):
+        if self.key is None:
+            return f"{node} {address}"
+        return hmac_module.new(self.key, f"account:{node} {address}".encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def _tx_id(self, tx_hash):
+        if self.key is None:
+            return tx_hash
+        return hmac_module.new(self.key, f"transaction:{tx_hash}".encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def _seal(self, account, value):
+        data = json.dumps(value).encode('utf-8')
+        if self.key is None:
+            return data
+        cipher = AES.new(self.key, AES.MODE_GCM)
+        # Values are bound to their account, so they can not be moved to another one
+        cipher.update(account.encode('utf-8'))
+        ciphertext, tag = cipher.encrypt_and_digest(data)
+        return cipher.nonce + tag + ciphertext
+
+    def _unseal(self, account, blob):
+        blob = bytes(blob)
+        if self.key is not None:
+            cipher = AES.new(self.key, AES.MODE_GCM, nonce=blob[:16])
+            cipher.update(account.encode('utf-8'))
+            blob = cipher.decrypt_and_verify(blob[32:], blob[16:32])
+        return json.loads(blob.decode('utf-8'))
+
+    # Address information
+
+    def account(self, node, address):
+        """
+        Overview:
+            Returns the stored address information of an address.
+
+            Parameters:
+            - node: The node URL.
+            - address: The address.
+
+            Returns:
+            - tuple: (tip, result), where result is the address information returned by the node without its
+              transactions, and tip is the id of the last block of the node when it was fetched, or None if the
+              address has no stored address information.
+        """
+        account = self._account_id(node, address)
+        try:
+            with self._lock:
+                row = self._db.execute("SELECT tip, state FROM accounts WHERE account = ?", (account,)).fetchone()
+            if row is None or row[0] is None or row[1] is None:
+                return None
+            return row[0], self._unseal(account, row[1])
+        except (sqlite3.Error, ValueError, KeyError) as e:
+            logging.info(f"Unable to read the history store of {self.filename}: {e}")
+            return None
+
+    def put_account(self, node, address, tip, result):
+        """
+        Stores the address information of an address, fetched at the given chain tip.
+        """
+        if tip is None:
+            return
+        account = self._account_id(node, address)
+        state = self._seal(account, {name: value for name, value in result.items() if name != 'transactions'})
+        try:
+            with self._lock, self._db:
+                self._db.execute("INSERT INTO accounts (account, tip, state) VALUES (?, ?, ?) ON CONFLICT (account) DO UPDATE SET tip = excluded.tip, state = excluded.state", (account, tip, state))
+        except sqlite3.Error as e:
+            logging.info(f"Unable to write the history store of {self.filename}: {e}")
+
+    def invalidate(self, node, address):
+        """
+        Marks the stored data of an address as outdated, e.g. after a transaction was sent from it, so that it is
+        requested from the node again.
+        """
+        try:
+            with self._lock, self._db:
+                self._db.execute("UPDATE accounts SET tip = NULL, history_tip = NULL WHERE account = ?", (self._account_id(node, address),))
+        except sqlite3.Error as e:
+            logging.info(f"Unable to write the history store of {self.filename}: {e}")
+
+    # Transactions
+
+    def _has_transaction(self, account, tx_hash):
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM transactions WHERE account = ? AND tx_id = ?", (account, self._tx_id(tx_hash))).fetchone() is not None
+
+    def _add_transactions(self, account, transactions, newer):
+        """
+        Stores transactions, given newest first, before the newest or after the oldest stored transaction.
+        """
+        with self._lock, self._db:
+            lowest, highest = self._db.execute("SELECT MIN(seq), MAX(seq) FROM transactions WHERE account = ?", (account,)).fetchone()
+            if newer:
+                start = (highest if highest is not None else 0) + len(transactions)
+            else:
+                start = (lowest if lowest is not None else 1) - 1
+            rows = [(account, start - position, self._tx_id(transaction['hash']), self._seal(account, transaction)) for position, transaction in enumerate(transactions)]
+            self._db.executemany("INSERT OR IGNORE INTO transactions (account, seq, tx_id, data) VALUES (?, ?, ?, ?)", rows)
+
+    def _pages_supported(self, node, timeout):
+        # A node that is not known to page its address history is still asked for older pages
+        return node_capabilities_util.NodeCapabilities.supports(node, 'history_paging', timeout) is not False
+
+    def _fetch_page(self, node, address, page, timeout):
+        request = http_transport_util.HttpTransport.get(f"{node}/get_address_info", params={'address': address, 'transactions_count_limit': HistoryStore.PAGE_SIZE, 'page': page, 'show_pending': True}, timeout=timeout)
+        request.raise_for_status()
+        response = request.json()
+        if not response.get('ok'):
+            raise ValueError(response.get('error'))
+        return response['result']
+
+    def sync_transactions(self, node, address, tip, count=PAGE_SIZE, timeout=None):
+        """
+        Overview:
+            Syncs the transactions of an address with the node. If the chain tip moved since the last sync, the
+            transactions that are newer than the stored ones are requested, page by page. Older pages are then
+            requested until at least 'count' transactions are stored, or the whole history is. The address
+            information of the first page is stored as well.
+
+            Parameters:
+            - node: The node URL.
+            - address: The address.
+            - tip: The current chain tip of the node. If it is None, the newest transactions are always requested.
+            - count (int, optional): The number of newest transactions that have to be stored.
+            - timeout (float, optional): The timeout of each request in seconds.
+
+            Returns:
+            - bool: True if the transactions were synced, False if the node could not be asked.
+        """
+        account = self._account_id(node, address)
+        try:
+            with self._lock:
+                row = self._db.execute("SELECT history_tip, complete FROM accounts WHERE account = ?", (account,)).fetchone()
+                stored = self._db.execute("SELECT COUNT(*) FROM transactions WHERE account = ?", (account,)).fetchone()[0]
+            history_tip, complete = row if row else (None, 0)
+            if row is None:
+                with self._lock, self._db:
+                    self._db.execute("INSERT OR IGNORE INTO accounts (account) VALUES (?)", (account,))
+
+            if stored and (tip is None or history_tip != tip):
+                # Page from the newest transaction until a stored one is reached
+                new_transactions = []
+                page = 0
+                while True:
+                    result = self._fetch_page(node, address, page, timeout)
+                    if page == 0:
+                        self.put_account(node, address, tip, result)
+                    transactions = result.get('transactions', [])
+                    known = False
+                    for transaction in transactions:
+                        if self._has_transaction(account, transaction['hash']):
+                            known = True
+                            break
+                        new_transactions.append(transaction)
+                    if known or len(transactions) < HistoryStore.PAGE_SIZE or not self._pages_supported(node, timeout):
+                        break
+                    page += 1
+                if new_transactions:
+                    self._add_transactions(account, new_transactions, newer=True)
+                    stored += len(new_transactions)
+
+            # Page further back until enough transactions are stored. The stored transactions are the newest ones,
+            # so the next page of the node starts right after them.
+            while stored < count and not complete:
+                if stored >= HistoryStore.PAGE_SIZE and not self._pages_supported(node, timeout):
+                    break
+                result = self._fetch_page(node, address, stored // HistoryStore.PAGE_SIZE, timeout)
+                if not stored:
+                    self.put_account(node, address, tip, result)
+                transactions = result.get('transactions', [])
+                older_transactions = [transaction for transaction in transactions if not self._has_transaction(account, transaction['hash'])]
+                if older_transactions:
+                    self._add_transactions(account, older_transactions, newer=False)
+                    stored += len(older_transactions)
+                if len(transactions) < HistoryStore.PAGE_SIZE:
+                    complete = 1
+                elif not older_transactions:
+                    break
+
+            with self._lock, self._db:
+                self._db.execute("UPDATE accounts SET history_tip = ?, complete = ? WHERE account = ?", (tip, complete, account))
+            return True
+        except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+            logging.warning(f"Unable to sync the transactions of {address}: {e}")
+            return False
+        except sqlite3.Error as e:
+            logging.warning(f"Unable to write the history store of {self.filename}: {e}")
+            return False
+
+    def transactions(self, node, address, offset=0, count=PAGE_SIZE):
+        """
+        Overview:
+            Returns stored transactions of an address, newest first.
+
+            Parameters:
+            - node: The node URL.
+            - address: The address.
+            - offset (int, optional): The number of newer transactions to skip.
+            - count (int, optional): The maximum number of transactions.
+
+            Returns:
+            - list: The transactions, as returned by the node.
+        """
+        account = self._account_id(node, address)
+        try:
+            with self._lock:
+                rows = self._db.execute("SELECT data FROM transactions WHERE account = ? ORDER BY seq DESC LIMIT ? OFFSET ?", (account, count, offset)).fetchall()
+            return [self._unseal(account, row[0]) for row in rows]
+        except (sqlite3.Error, ValueError, KeyError) as e:
+            logging.info(f"Unable to read the history store of {self.filename}: {e}")
+            return []
+
+    def transaction_count(self, node, address):
+        """
+        Returns the number of stored transactions of an address, and whether they are its whole history.
+        """
+        account = self._account_id(node, address)
+        try:
+            with self._lock:
+                row = self._db.execute("SELECT complete FROM accounts WHERE account = ?", (account,)).fetchone()
+                stored = self._db.execute("SELECT COUNT(*) FROM transactions WHERE account = ?", (account,)).fetchone()[0]
+            return stored, bool(row and row[0])
+        except sqlite3.Error as e:
+            logging.info(f"Unable to read the history store of {self.filename}: {e}")
+            return 0, False
+
+    @staticmethod
+    def remove(filename):
+        """
+        Overwrites the history store of a wallet with random data and removes it.
+        """
+        for path in (HistoryStore.path(filename), f"{HistoryStore.path(filename)}-journal"):
+            if not os.path.exists(path):
+                continue
+            try:
+                file_size = os.path.getsize(path)
+                if file_size > 0:
+                    with open(path, "r+b") as file:
+                        file.write(bytearray(random.getrandbits(8) for _ in range(file_size)))
+                        file.flush()
+                        os.fsync(file.fileno())
+                os.remove(path)
+            except OSError as e:
+                logging.error(f"Unable to remove the history store: {e}")
+
+
+class HistoryPager:
+    """
+    Pages the transactions of an address, newest first, out of the history store of a wallet.
+
+    A page holds HistoryStore.PAGE_SIZE transactions, like a page of the
+    node's address history. Pages that are not stored yet are synced from the
+    node when they are requested. Once a page is returned, the following page
+    is synced in the background, so paging forward rarely waits for the node.
+    Pages that were synced once are read from the store in later sessions.
+    """
+    def __init__(self, store, node, address, timeout=None):
+        self.store = store
+        self.node = node
+        self.address = address
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history_prefetch")
+        self._prefetch = None
+
+    def _sync(self, count):
+        tip = balance_cache_util.BalanceCache.chain_tip(self.node, self.timeout)
+        return self.store.sync_transactions(self.node, self.address, tip, count=count, timeout=self.timeout)
+
+    def page(self, number):
+        """
+        Overview:
+            Returns a page of transactions, and prefetches the following page.
+
+            Parameters:
+            - number (int): The number of the page, starting at 0 for the newest transactions.
+
+            Returns:
+            - list: The transactions of the page, which is empty past the last page, or None if the page could
+              not be synced.
+        """
+        # The store is synced by one thread at a time
+        if self._prefetch is not None:
+            self._prefetch.result()
+            self._prefetch = None
+        end = (number + 1) * HistoryStore.PAGE_SIZE
+        if not self._sync(end):
+            return None
+        transactions = self.store.transactions(self.node, self.address, number * HistoryStore.PAGE_SIZE, HistoryStore.PAGE_SIZE)
+        stored, complete = self.store.transaction_count(self.node, self.address)
+        if not complete and stored < end + HistoryStore.PAGE_SIZE:
+            self._prefetch = self._executor.submit(self._sync, end + HistoryStore.PAGE_SIZE)
+        return transactions
+
+    def count(self):
+        """
+        Returns the number of transactions synced so far, and whether they are the whole history of the address.
+        """
+        return self.store.transaction_count(self.node, self.address)
+
+    def close(self, wait=False):
+        """
+        Stops prefetching. A prefetch that already started is completed in the background, unless 'wait' is True,
+        in which case it is waited for, so that the store can be closed afterwards.
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
@@ -0,0 +1,143 @@
+import time
+import random
+import logging
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+class HttpTransport:
+    """
+    Handles the HTTP requests of the wallet client.
+
+    Every host gets one requests.Session that is kept for the lifetime of the
+    process, so requests to a node reuse their keep-alive connections instead
+    of opening a new TCP and TLS connection each time. The connection pool of
+    a host is capped at MAX_CONNECTIONS_PER_HOST, and further requests wait
+    for a free connection. Requests get a default timeout, and idempotent
+    requests are retried with jittered exponential backoff on connection
+    errors, timeouts and transient HTTP statuses.
+
+    Responses and exceptions are those of the requests library, so callers
+    handle errors as they would for requests.get and requests.post.
+    """
+    DEFAULT_TIMEOUT = 10
+    MAX_CONNECTIONS_PER_HOST = 8
+    # Retries of idempotent requests, and the base delay between them in seconds
+    RETRIES = 2
+    BACKOFF_SECONDS = 0.25
+    RETRY_STATUSES = {429, 502, 503, 504}
+    IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+    _sessions = {}
+    _sessions_guard = threading.Lock()
+    _stats_guard = threading.Lock()
+    _stats = {"requests": 0, "retries": 0, "failures": 0, "latency_seconds": 0.0, "max_latency_seconds": 0.0}
+
+    @staticmethod
+    def _host(url):
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    @staticmethod
+    def session(url):
+        """
+        Returns the pooled session of the host of a URL.
+        """
+        host = HttpTransport._host(url)
+        with HttpTransport._sessions_guard:
+            session = HttpTransport._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HttpTransport.MAX_CONNECTIONS_PER_HOST, pool_block=True, max_retries=0)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                HttpTransport._sessions[host] = session
+            return session
+
+    @staticmethod
+    def request(method, url, timeout=None, retries=None, **kwargs):
+        """
+        Overview:
+            Sends an HTTP request through the pooled session of its host.
+
+            Parameters:
+            - method: The HTTP method.
+            - url: The URL of the request.
+            - timeout (float, optional): The timeout of each attempt in seconds. Defaults to DEFAULT_TIMEOUT.
+            - retries (int, optional): The number of retries. Defaults to RETRIES for idempotent methods and to
+              0 for other methods, which are never retried unless requested.
+            - kwargs: Passed on to requests.Session.request, e.g. params, json or verify.
+
+            Returns:
+            - requests.Response: The response of the last attempt.
+
+            Raises:
+            - requests.RequestException: If the last attempt failed.
+        """
+        method = method.upper()
+        if retries is None:
+            retries = HttpTransport.RETRIES if method in HttpTransport.IDEMPOTENT_METHODS else 0
+        session = HttpTransport.session(url)
+        for attempt in range(retries + 1):
+            start = time.monotonic()
+            try:
+                response = session.request(method, url, timeout=timeout or HttpTransport.DEFAULT_TIMEOUT, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                HttpTransport._record(time.monotonic() - start, failed=True, retried=attempt > 0)
+                if attempt == retries:
+                    raise
+            else:
+                HttpTransport._record(time.monotonic() - start, failed=False, retried=attempt > 0)
+                if response.status_code not in HttpTransport.RETRY_STATUSES or attempt == retries:
+                    return response
+                response.close()
+            delay = HttpTransport.BACKOFF_SECONDS * (2 ** attempt) * random.uniform(0.5, 1.5)
+            logging.info(f"Retrying {method} {HttpTransport._host(url)} in {delay:.2f}s.")
+            time.sleep(delay)
+
+    @staticmethod
+    def get(url, **kwargs):
+        return HttpTransport.request("GET", url, **kwargs)
+
+    @staticmethod
+    def post(url, **kwargs):
+        return HttpTransport.request("POST", url, **kwargs)
+
+    @staticmethod
+    def _record(latency, failed, retried):
+        with HttpTransport._stats_guard:
+            stats = HttpTransport._stats
+            stats["requests"] += 1
+            stats["latency_seconds"] += latency
+            stats["max_latency_seconds"] = max(stats["max_latency_seconds"], latency)
+            if failed:
+                stats["failures"] += 1
+            if retried:
+                stats["retries"] += 1
+
+    @staticmethod
+    def stats():
+        """
+        Overview:
+            Returns the transport metrics of this process: the number of requests, retries and failed attempts,
+            their total, average and longest latency in seconds, and how many connections were opened for them.
+
+            Returns:
+            - dict: The transport metrics, including the share of requests that reused a connection.
+        """
+        with HttpTransport._stats_guard:
+            stats = dict(HttpTransport._stats)
+        with HttpTransport._sessions_guard:
+            sessions = list(HttpTransport._sessions.values())
+        connections = 0
+        for session in sessions:
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    connections += getattr(pool, "num_connections", 0) if pool is not None else 0
+        stats["connections"] = connections
+        stats["average_latency_seconds"] = stats["latency_seconds"] / stats["requests"] if stats["requests"] else 0.0
+        stats["reuse_ratio"] = max(0.0, 1 - connections / stats["requests"]) if stats["requests"] else 0.0
+        return stats
@@ -1,15 +1,14 @@
 import os
 import logging
 import getpass
-import shutil
-import datetime
 import time
 import threading
 import select
 import sys
 import base64
-import data_manipulation_util
-import verification_util
+from . import data_manipulation_util
+from . import verification_util
+from . import backup_store_util
 import queue
 
 
@@ -265,16 +264,13 @@ class UserPrompts:
                 return
         
         if perform_backup:
-            # Construct the backup filename
-            base_filename = os.path.basename(filename)
-            backup_name, _ = os.path.splitext(base_filename)
-            backup_path = os.path.join("./wallets/wallet_backups", f"{backup_name}_backup_{datetime.datetime.fromtimestamp(int(time.time())).strftime('%Y-%m-%d_%H-%M-%S')}") + ".json"
             try:
-                # Create the backup
-                shutil.copy(filename, backup_path)
+                # Create a backup snapshot in the backup store
+                snapshot = backup_store_util.BackupStore.create(filename)
+                backup_msg = f"Backup snapshot {snapshot['snapshot']} created in {backup_store_util.BackupStore.store_directory()}"
                 if from_gui:
-                    callback_object.post_messagebox("Info", f"Backup created at {backup_path}")
-                print(f"Backup created at {backup_path}\n")
+                    callback_object.post_messagebox("Info", backup_msg)
+                print(f"{backup_msg}\n")
                 data_manipulation_util.DataManipulation.secure_delete([var for var in locals().values() if var is not None])
                 return True
 
@@ -0,0 +1,174 @@
+import os
+import json
+import time
+import logging
+import threading
+import requests
+from . import http_transport_util
+
+class NodeCapabilities:
+    """
+    Handles the features that Denaro nodes support.
+
+    The capabilities of a node are probed once from the OpenAPI description
+    that Denaro nodes serve at '/openapi.json':
+    - 'version': The version of the node.
+    - 'endpoints': The paths of the node.
+    - 'push_endpoint': 'submit_tx', or 'push_tx' for legacy nodes.
+    - 'batch_query': Whether '/get_addresses_info' answers batch address queries.
+    - 'history_paging': Whether '/get_address_info' takes a 'page'.
+    A capability that could not be determined is None. Callers also record
+    what they learn from the node itself, e.g. a legacy node that answers
+    404 on '/submit_tx'.
+
+    The capabilities are kept in memory and in CACHE_PATH, in the wallets
+    directory next to the price cache, and are probed again once they are
+    older than TTL_SECONDS, or UNKNOWN_TTL_SECONDS if the node has no OpenAPI
+    description. A node that can not be reached is not cached.
+    """
+    CACHE_PATH = os.path.join("./wallets", "node_capabilities.json")
+    VERSION = 1
+    TTL_SECONDS = 24 * 60 * 60
+    UNKNOWN_TTL_SECONDS = 60 * 60
+    PROBE_TIMEOUT = 5
+
+    _nodes = {}
+    _loaded = False
+    _guard = threading.Lock()
+    # Nodes are probed by one thread at a time, so concurrent callers wait for the same probe
+    _probe_lock = threading.Lock()
+
+    @staticmethod
+    def _unknown():
+        return dict.fromkeys(("version", "endpoints", "push_endpoint", "batch_query", "history_paging"))
+
+    @staticmethod
+    def _load():
+        with NodeCapabilities._guard:
+            if NodeCapabilities._loaded:
+                return
+            NodeCapabilities._loaded = True
+            if not os.path.exists(NodeCapabilities.CACHE_PATH):
+                return
+            try:
+                with open(NodeCapabilities.CACHE_PATH, 'r') as f:
+                    stored = json.load(f)
+                if stored.get("version") == NodeCapabilities.VERSION:
+                    for node, entry in stored["nodes"].items():
+                        NodeCapabilities._nodes.setdefault(node, (entry["capabilities"], float(entry["timestamp"])))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logging.info(f"Unable to read the node capability cache: {e}")
+
+    @staticmethod
+    def _save():
+        with NodeCapabilities._guard:
+            stored = {"version": NodeCapabilities.VERSION, "nodes": {node: {"capabilities": capabilities, "timestamp": timestamp} for node, (capabilities, timestamp) in NodeCapabilities._nodes.items()}}
+        try:
+            os.makedirs(os.path.dirname(NodeCapabilities.CACHE_PATH) or ".", exist_ok=True)
+            with open(f"{NodeCapabilities.CACHE_PATH}.tmp", 'w') as f:
+                json.dump(stored, f)
+            os.replace(f"{NodeCapabilities.CACHE_PATH}.tmp", NodeCapabilities.CACHE_PATH)
+        except OSError as e:
+            logging.info(f"Unable to save the node capability cache: {e}")
+
+    @staticmethod
+    def cached(node):
+        """
+        Returns the capabilities of a node that are known without a request, which may be expired, or None.
+        """
+        NodeCapabilities._load()
+        with NodeCapabilities._guard:
+            entry = NodeCapabilities._nodes.get(node)
+        return dict(entry[0]) if entry else None
+
+    @staticmethod
+    def _fresh(node):
+        with NodeCapabilities._guard:
+            entry = NodeCapabilities._nodes.get(node)
+        if entry is None:
+            return None
+        capabilities, timestamp = entry
+        ttl = NodeCapabilities.TTL_SECONDS if capabilities.get('endpoints') is not None else NodeCapabilities.UNKNOWN_TTL_SECONDS
+        return dict(capabilities) if time.time() - timestamp < ttl else None
+
+    @staticmethod
+    def probe(node, timeout=None):
+        """
+        Overview:
+            Reads the capabilities of a node from its OpenAPI description.
+
+            Parameters:
+            - node: The node URL.
+            - timeout (float, optional): The timeout of the request in seconds. Defaults to PROBE_TIMEOUT.
+
+            Returns:
+            - dict: The capabilities, or None if the node could not be reached.
+        """
+        capabilities = NodeCapabilities._unknown()
+        try:
+            response = http_transport_util.HttpTransport.get(f"{node}/openapi.json", timeout=timeout or NodeCapabilities.PROBE_TIMEOUT, retries=0)
+        except requests.RequestException as e:
+            logging.info(f"Unable to probe the capabilities of {node}: {e}")
+            return None
+        try:
+            response.raise_for_status()
+            description = response.json()
+            paths = description['paths']
+        except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+            logging.info(f"{node} does not describe its capabilities: {e}")
+            return capabilities
+
+        def parameters(path):
+            return [parameter.get('name') for operation in paths.get(path, {}).values() if isinstance(operation, dict) for parameter in operation.get('parameters', [])]
+
+        capabilities["version"] = description.get('info', {}).get('version')
+        capabilities["endpoints"] = sorted(path.lstrip('/') for path in paths)
+        capabilities["push_endpoint"] = "submit_tx" if "/submit_tx" in paths else "push_tx" if "/push_tx" in paths else None
+        capabilities["batch_query"] = "/get_addresses_info" in paths
+        capabilities["history_paging"] = "page" in parameters("/get_address_info")
+        return capabilities
+
+    @staticmethod
+    def get(node, timeout=None):
+        """
+        Returns the capabilities of a node, probing the node if they are not cached or expired. Returns the expired
+        capabilities, or capabilities that are all None, if the node can not be reached.
+        """
+        NodeCapabilities._load()
+        capabilities = NodeCapabilities._fresh(node)
+        if capabilities is not None:
+            return capabilities
+        with NodeCapabilities._probe_lock:
+            # Another thread may have probed the node while this one waited
+            capabilities = NodeCapabilities._fresh(node)
+            if capabilities is not None:
+                return capabilities
+            capabilities = NodeCapabilities.probe(node, timeout)
+            if capabilities is None:
+                return NodeCapabilities.cached(node) or NodeCapabilities._unknown()
+            with NodeCapabilities._guard:
+                NodeCapabilities._nodes[node] = (capabilities, time.time())
+            NodeCapabilities._save()
+            logging.info(f"Capabilities of {node}: version {capabilities['version']}, push endpoint {capabilities['push_endpoint']}, batch queries {capabilities['batch_query']}, history paging {capabilities['history_paging']}.")
+            return dict(capabilities)
+
+    @staticmethod
+    def supports(node, capability, timeout=None):
+        """
+        Returns the value of a capability of a node, e.g. True, False or None for 'batch_query'.
+        """
+        return NodeCapabilities.get(node, timeout).get(capability)
+
+    @staticmethod
+    def record(node, **capabilities):
+        """
+        Records capabilities of a node that were learned from its answers. Capabilities that were probed keep the
+        time they were probed at.
+        """
+        NodeCapabilities._load()
+        with NodeCapabilities._guard:
+            current, timestamp = NodeCapabilities._nodes.get(node, (NodeCapabilities._unknown(), time.time()))
+            if all(current.get(name) == value for name, value in capabilities.items()):
+                return
+            NodeCapabilities._nodes[node] = ({**current, **capabilities}, timestamp)
+        NodeCapabilities._save()
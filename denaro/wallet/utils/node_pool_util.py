@@ -0,0 +1,293 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import requests
+from . import http_transport_util
+
+class NodePool:
+    """
+    Handles the Denaro nodes that the wallet client can use.
+
+    The pool holds the configured nodes and their health: the latency and
+    chain height of their last '/get_mining_info' response, smoothed over
+    checks and requests, and their request and failure counts. A node is
+    healthy when its last check succeeded and it is at most
+    MAX_BLOCKS_BEHIND blocks behind the highest node of the pool.
+
+    select() picks the fastest healthy node. get() sends a read request to a
+    node, and if the node has not answered after about twice its usual
+    latency, sends the same request to the next fastest healthy node and
+    returns whichever answer comes first, together with the node that gave
+    it. failover() tries an operation on
+    a node and moves on to the other nodes while nodes can not be reached,
+    which is used to push transactions. With a single node the pool adds no
+    requests.
+    """
+    HEALTH_CHECK_INTERVAL_SECONDS = 30
+    HEALTH_CHECK_TIMEOUT = 5
+    MAX_BLOCKS_BEHIND = 2
+    # A hedged request is sent after twice the latency of the node, but not sooner than this
+    MIN_HEDGE_DELAY_SECONDS = 0.5
+    # The weight of the latest latency in the smoothed latency of a node
+    LATENCY_SMOOTHING = 0.3
+    # The number of concurrent reads the request threads have room for, until reserve() is called
+    MAX_REQUESTS = 8
+
+    _nodes = []
+    _stats = {}
+    _guard = threading.Lock()
+    _changed = threading.Event()
+    # Every read may take a second thread for its hedged request
+    _workers = 2 * MAX_REQUESTS
+    _executor = None
+
+    @staticmethod
+    def _new_stats():
+        return {"healthy": None, "latency": None, "height": None, "checked_at": None, "requests": 0, "failures": 0, "hedged": 0}
+
+    @staticmethod
+    def configure(nodes):
+        """
+        Sets the nodes of the pool, in order of preference. The stats of nodes that stay in the pool are kept.
+        """
+        nodes = list(dict.fromkeys(node.rstrip('/') for node in nodes if node))
+        with NodePool._guard:
+            NodePool._nodes = nodes
+            NodePool._stats = {node: NodePool._stats.get(node) or NodePool._new_stats() for node in nodes}
+        NodePool._changed.set()
+
+    @staticmethod
+    def reserve(max_requests):
+        """
+        Makes room in the request threads of the pool for 'max_requests' concurrent reads and their hedged
+        requests, so that neither waits for a free thread. The request threads are never reduced.
+        """
+        workers = 2 * max(1, int(max_requests))
+        with NodePool._guard:
+            if workers <= NodePool._workers:
+                return
+            NodePool._workers = workers
+            previous = NodePool._executor
+            NodePool._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="node_pool") if previous is not None else None
+        # Requests that were already submitted finish on the previous executor before its threads exit
+        if previous is not None:
+            previous.shutdown(wait=False)
+
+    @staticmethod
+    def _submit(function, *args):
+        """
+        Runs a function on the request threads of the pool, which are started on first use.
+        """
+        while True:
+            with NodePool._guard:
+                if NodePool._executor is None:
+                    NodePool._executor = ThreadPoolExecutor(max_workers=NodePool._workers, thread_name_prefix="node_pool")
+                executor = NodePool._executor
+            try:
+                return executor.submit(function, *args)
+            except RuntimeError:
+                # The executor was replaced by reserve() after it was taken, so the new one is used
+                if executor is NodePool._executor:
+                    raise
+
+    @staticmethod
+    def nodes():
+        with NodePool._guard:
+            return list(NodePool._nodes)
+
+    @staticmethod
+    def _record(node, latency=None, failed=False, height=None):
+        with NodePool._guard:
+            stats = NodePool._stats.get(node)
+            if stats is None:
+                return
+            stats["requests"] += 1
+            if failed:
+                stats["failures"] += 1
+                return
+            if latency is not None:
+                previous = stats["latency"]
+                stats["latency"] = latency if previous is None else previous + NodePool.LATENCY_SMOOTHING * (latency - previous)
+            if height is not None:
+                stats["height"] = height
+
+    @staticmethod
+    def check(node, timeout=None):
+        """
+        Overview:
+            Checks the health of a node with a '/get_mining_info' request.
+
+            Parameters:
+            - node: The node URL.
+            - timeout (float, optional): The timeout of the request in seconds. Defaults to HEALTH_CHECK_TIMEOUT.
+
+            Returns:
+            - bool: True if the node answered with its chain height.
+        """
+        started = time.monotonic()
+        try:
+            response = http_transport_util.HttpTransport.get(f"{node}/get_mining_info", timeout=timeout or NodePool.HEALTH_CHECK_TIMEOUT, retries=0)
+            response.raise_for_status()
+            height = response.json()['result']['last_block']['id']
+            healthy = isinstance(height, int)
+        except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+            logging.info(f"Health check of {node} failed: {e}")
+            height, healthy = None, False
+        NodePool._record(node, latency=time.monotonic() - started if healthy else None, failed=not healthy, height=height)
+        with NodePool._guard:
+            stats = NodePool._stats.get(node)
+            if stats is not None:
+                stats["healthy"] = healthy
+                stats["checked_at"] = time.time()
+        return healthy
+
+    @staticmethod
+    def check_all(timeout=None):
+        """
+        Checks the health of every node of the pool concurrently.
+        """
+        nodes = NodePool.nodes()
+        for check in [NodePool._submit(NodePool.check, node, timeout) for node in nodes]:
+            check.result()
+
+    @staticmethod
+    def ranked():
+        """
+        Returns the healthy nodes of the pool, fastest first.
+        """
+        with NodePool._guard:
+            healthy = [(node, NodePool._stats[node]) for node in NodePool._nodes if NodePool._stats[node]["healthy"]]
+        if not healthy:
+            return []
+        best_height = max(stats["height"] for _, stats in healthy)
+        healthy = [(node, stats) for node, stats in healthy if stats["height"] >= best_height - NodePool.MAX_BLOCKS_BEHIND]
+        return [node for node, _ in sorted(healthy, key=lambda item: item[1]["latency"] if item[1]["latency"] is not None else float('inf'))]
+
+    @staticmethod
+    def select(node=None):
+        """
+        Returns the fastest healthy node of the pool. If no node is known to be healthy, returns 'node', or the
+        first node of the pool if 'node' is not given.
+        """
+        ranked = NodePool.ranked()
+        if ranked:
+            return ranked[0]
+        if node:
+            return node
+        nodes = NodePool.nodes()
+        return nodes[0] if nodes else None
+
+    @staticmethod
+    def _request(node, path, kwargs):
+        started = time.monotonic()
+        try:
+            response = http_transport_util.HttpTransport.get(f"{node}{path}", **kwargs)
+        except requests.RequestException:
+            NodePool._record(node, failed=True)
+            raise
+        NodePool._record(node, latency=time.monotonic() - started, failed=response.status_code >= 500)
+        return response
+
+    @staticmethod
+    def get(node, path, **kwargs):
+        """
+        Overview:
+            Sends a GET request to a node, hedged with the next fastest healthy node of the pool.
+
+            Parameters:
+            - node: The node URL.
+            - path: The path of the request, e.g. '/get_address_info'.
+            - kwargs: Passed on to HttpTransport.get. When another node can take over, the request is not retried
+              by the transport, since the hedged request and the other node replace its retries.
+
+            Returns:
+            - tuple: (response, node), the first successful response and the node that answered, or the response
+              of the last node to answer if no request succeeded. Data from the response belongs to that node,
+              which is not 'node' when the hedged request answered first.
+
+            Raises:
+            - requests.RequestException: If no node could be reached.
+        """
+        with NodePool._guard:
+            in_pool = node in NodePool._stats
+            latency = NodePool._stats[node]["latency"] if in_pool else None
+        backups = [backup for backup in NodePool.ranked() if backup != node] if in_pool else []
+        if not backups:
+            return (NodePool._request(node, path, kwargs) if in_pool else http_transport_util.HttpTransport.get(f"{node}{path}", **kwargs)), node
+        kwargs = {**kwargs, "retries": 0}
+
+        delay = max(NodePool.MIN_HEDGE_DELAY_SECONDS, 2 * latency) if latency is not None else NodePool.MIN_HEDGE_DELAY_SECONDS
+        primary = NodePool._submit(NodePool._request, node, path, kwargs)
+        targets = {primary: node}
+        pending = {primary}
+        done, _ = wait(pending, timeout=delay)
+        if not done or primary.exception() is not None or primary.result().status_code >= 500:
+            with NodePool._guard:
+                NodePool._stats[node]["hedged"] += 1
+            hedged = NodePool._submit(NodePool._request, backups[0], path, kwargs)
+            targets[hedged] = backups[0]
+            pending.add(hedged)
+
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for request in done:
+                if request.exception() is not None:
+                    error = request.exception()
+                elif request.result().status_code < 500 or not pending:
+                    return request.result(), targets[request]
+        raise error
+
+    @staticmethod
+    def failover(node, operation):
+        """
+        Overview:
+            Runs an operation on a node, and on the other nodes of the pool, fastest first, while it can not
+            reach them.
+
+            Parameters:
+            - node: The node URL to try first.
+            - operation: Called with a node URL. Raises requests.RequestException if the node could not be
+              reached.
+
+            Returns:
+            - tuple: (result, node), the result of the operation and the node it succeeded on.
+
+            Raises:
+            - requests.RequestException: If the operation failed on every node.
+        """
+        candidates = [node] + [other for other in NodePool.ranked() + NodePool.nodes() if other != node]
+        error = None
+        for candidate in dict.fromkeys(candidates):
+            try:
+                return operation(candidate), candidate
+            except requests.RequestException as e:
+                logging.warning(f"Unable to reach {candidate}: {e}")
+                NodePool._record(candidate, failed=True)
+                error = e
+        raise error
+
+    @staticmethod
+    def watch(stop_signal, interval=None):
+        """
+        Checks the health of the nodes every 'interval' seconds, and as soon as the nodes of the pool change,
+        until the stop signal is set.
+        """
+        interval = interval or NodePool.HEALTH_CHECK_INTERVAL_SECONDS
+        while not stop_signal.is_set():
+            NodePool._changed.clear()
+            NodePool.check_all()
+            waited = 0
+            while waited < interval and not NodePool._changed.is_set():
+                if stop_signal.wait(1):
+                    return
+                waited += 1
+
+    @staticmethod
+    def stats():
+        """
+        Returns a list with the node URL and a copy of the stats of every node of the pool.
+        """
+        with NodePool._guard:
+            return [(node, dict(NodePool._stats[node])) for node in NodePool._nodes]
@@ -1,7 +1,7 @@
 import logging
 import qrcode
 from PIL import Image, ImageDraw, ImageFont
-import data_manipulation_util
+from . import data_manipulation_util
 
 class PaperWalletGenerator:
     @staticmethod
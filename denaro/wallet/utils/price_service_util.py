@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import logging
+import threading
+from decimal import Decimal, InvalidOperation
+import requests
+from . import http_transport_util
+
+class PriceService:
+    """
+    Handles the price of DNR in other currencies.
+
+    The price is derived from three tables: the USD price of DNR from
+    CoinMarketCap, the USD exchange rates of fiat currencies from
+    open.er-api.com, and the USD prices of cryptocurrencies from CoinCap. Each
+    table is kept in memory with the time it was fetched, and is only fetched
+    again once it is older than its TTL, so conversions are served from
+    memory. The tables are saved to CACHE_PATH, in the wallets directory next
+    to the balance snapshots and history stores, and loaded again by later
+    processes. A table that can not be fetched is served stale, as long as it
+    was fetched once.
+
+    price() fetches the expired tables it needs before it returns, and is
+    meant for worker threads and the command line. The GUI thread uses
+    cached_price(), which never makes a request, together with prefetch(),
+    which refreshes the expired tables in a background thread.
+    """
+    CACHE_PATH = os.path.join("./wallets", "price_cache.json")
+    VERSION = 1
+    REQUEST_TIMEOUT = 5
+    # A table that could not be fetched is not requested again for this many seconds
+    RETRY_AFTER_SECONDS = 30
+
+    # The source URL and the TTL in seconds of every table
+    SOURCES = {
+        "usd_price": ("https://api.coinmarketcap.com/dexer/v3/dexer/pair-info?dexer-platform-name=bsc&address=0x638da797f50131c7f8fe1b0de864acee773d0bab&t=1705093806632", 60),
+        "fiat_rates": ("https://open.er-api.com/v6/latest/USD", 3600),
+        "crypto_rates": ("https://api.coincap.io/v2/assets", 600),
+    }
+    SOURCE_NAMES = {"usd_price": "CoinMarketCap", "fiat_rates": "OpenExchangeRate", "crypto_rates": "CoinCap"}
+
+    _tables = {}
+    _failures = {}
+    _loaded = False
+    _guard = threading.Lock()
+    # Tables are fetched by one thread at a time, so concurrent callers wait for the same fetch
+    _fetch_lock = threading.Lock()
+
+    @staticmethod
+    def _parse(name, data):
+        if name == "usd_price":
+            return str(Decimal(data['data']['priceUsd']).quantize(Decimal('0.0000001')))
+        if name == "fiat_rates":
+            return {code: str(Decimal(str(rate)).quantize(Decimal('0.01'))) for code, rate in data['rates'].items()}
+        return {item['symbol']: str(Decimal(item['priceUsd']).quantize(Decimal('0.0000001'))) for item in data['data'] if item.get('priceUsd')}
+
+    @staticmethod
+    def _load():
+        with PriceService._guard:
+            if PriceService._loaded:
+                return
+            PriceService._loaded = True
+            if not os.path.exists(PriceService.CACHE_PATH):
+                return
+            try:
+                with open(PriceService.CACHE_PATH, 'r') as f:
+                    stored = json.load(f)
+                if stored.get("version") == PriceService.VERSION:
+                    for name, table in stored["tables"].items():
+                        if name in PriceService.SOURCES and name not in PriceService._tables:
+                            PriceService._tables[name] = (table["value"], float(table["timestamp"]))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logging.info(f"Unable to read the price cache: {e}")
+
+    @staticmethod
+    def _save():
+        with PriceService._guard:
+            stored = {"version": PriceService.VERSION, "tables": {name: {"value": value, "timestamp": timestamp} for name, (value, timestamp) in PriceService._tables.items()}}
+        try:
+            os.makedirs(os.path.dirname(PriceService.CACHE_PATH) or ".", exist_ok=True)
+            with open(f"{PriceService.CACHE_PATH}.tmp", 'w') as f:
+                json.dump(stored, f)
+            os.replace(f"{PriceService.CACHE_PATH}.tmp", PriceService.CACHE_PATH)
+        except OSError as e:
+            logging.info(f"Unable to save the price cache: {e}")
+
+    @staticmethod
+    def _table(name, fresh=False):
+        with PriceService._guard:
+            entry = PriceService._tables.get(name)
+        if entry is None or (fresh and time.time() - entry[1] >= PriceService.SOURCES[name][1]):
+            return None
+        return entry[0]
+
+    @staticmethod
+    def _ensure(name):
+        """
+        Fetches a table if it is missing or older than its TTL. Returns the table, which may be stale, or None.
+        """
+        if PriceService._table(name, fresh=True) is None:
+            with PriceService._fetch_lock:
+                # Another thread may have fetched the table while this one waited
+                failed = PriceService._failures.get(name)
+                if PriceService._table(name, fresh=True) is None and not (failed and time.monotonic() - failed < PriceService.RETRY_AFTER_SECONDS):
+                    url, _ = PriceService.SOURCES[name]
+                    try:
+                        response = http_transport_util.HttpTransport.get(url, timeout=PriceService.REQUEST_TIMEOUT)
+                        response.raise_for_status()
+                        table = PriceService._parse(name, response.json())
+                    except (requests.RequestException, ValueError, KeyError, TypeError, InvalidOperation) as e:
+                        logging.warning(f"Unable to get the price data from {PriceService.SOURCE_NAMES[name]}: {e}")
+                        PriceService._failures[name] = time.monotonic()
+                    else:
+                        PriceService._failures.pop(name, None)
+                        with PriceService._guard:
+                            PriceService._tables[name] = (table, time.time())
+                        PriceService._save()
+        return PriceService._table(name)
+
+    @staticmethod
+    def _convert(currency_code, usd_price, fiat_rates, crypto_rates):
+        if usd_price is None:
+            return None
+        usd_price = Decimal(usd_price)
+        if currency_code == 'USD':
+            return usd_price
+        if fiat_rates and currency_code in fiat_rates:
+            return usd_price * Decimal(fiat_rates[currency_code])
+        if crypto_rates and Decimal(crypto_rates.get(currency_code, 0)):
+            return usd_price / Decimal(crypto_rates[currency_code])
+        return None
+
+    @staticmethod
+    def price(currency_code=None):
+        """
+        Overview:
+            Returns the price of DNR in a currency, fetching the tables it is derived from if they expired.
+
+            Parameters:
+            - currency_code (str, optional): A fiat or cryptocurrency code. Defaults to 'USD'.
+
+            Returns:
+            - Decimal: The price, or 0 if it is not known.
+        """
+        currency_code = (currency_code or 'USD').upper()
+        PriceService._load()
+        usd_price = PriceService._ensure("usd_price")
+        fiat_rates = crypto_rates = None
+        if currency_code != 'USD':
+            fiat_rates = PriceService._ensure("fiat_rates")
+            if not fiat_rates or currency_code not in fiat_rates:
+                crypto_rates = PriceService._ensure("crypto_rates")
+        price = PriceService._convert(currency_code, usd_price, fiat_rates, crypto_rates)
+        return Decimal('0') if price is None else price
+
+    @staticmethod
+    def cached_price(currency_code=None):
+        """
+        Returns the price of DNR in a currency from the tables in memory, without any request, or None if the
+        tables it is derived from were never fetched. The tables may be expired.
+        """
+        currency_code = (currency_code or 'USD').upper()
+        PriceService._load()
+        return PriceService._convert(currency_code, PriceService._table("usd_price"), PriceService._table("fiat_rates"), PriceService._table("crypto_rates"))
+
+    @staticmethod
+    def prefetch(currency_code=None, on_done=None):
+        """
+        Overview:
+            Fetches the expired tables of a currency in a background thread.
+
+            Parameters:
+            - currency_code (str, optional): A fiat or cryptocurrency code. Defaults to 'USD'.
+            - on_done (callable, optional): Called from the background thread with the price once it is known.
+        """
+        def run():
+            price = PriceService.price(currency_code)
+            if on_done:
+                on_done(price)
+        threading.Thread(target=run, name="price_prefetch", daemon=True).start()
@@ -14,9 +14,9 @@ from PIL import Image, ImageDraw
 import tkinter as tk
 from tkinter import font
 
-from data_manipulation_util import DataManipulation
-from thread_manager import WalletThreadManager
-from tkinter_utils.dialogs import Dialogs
+from .data_manipulation_util import DataManipulation
+from .thread_manager import WalletThreadManager
+from .tkinter_utils.dialogs import Dialogs
 
 
 
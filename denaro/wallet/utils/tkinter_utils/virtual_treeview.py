@@ -0,0 +1,236 @@
+import tkinter as tk
+from tkinter import ttk, font
+
+class VirtualTreeview(ttk.Treeview):
+    """
+    ttk.Treeview that only materializes the rows that are visible.
+
+    The rows are held by a model, and a small pool of Treeview items is
+    filled with the rows at the current scroll offset. Scrolling, the
+    scrollbar and row updates refill the pool instead of inserting, moving
+    or deleting items, so the widget stays responsive regardless of the
+    number of rows. The model is never read back from the widget; it is told
+    to the view through rows_inserted, row_updated, refresh and reset.
+
+    The model provides len(model), model.values(index), which returns the
+    display values of a row, model.tags(index), which returns the tags of a
+    row besides its 'oddrow'/'evenrow' stripe, and model.index(key), which
+    returns the index of the row whose first value is key, or None.
+
+    The widest value of every column is tracked as rows are added or changed,
+    so columns can be sized without measuring every row again.
+
+    Whenever the rows within one screen of the end of the model are shown, the
+    virtual event <<VirtualTreeviewNearEnd>> is generated, so that models that
+    are loaded in pages can load the next page before it is scrolled to.
+    """
+    # Values measured this many times are not cached, e.g. unique addresses beyond this count
+    MEASURE_CACHE_SIZE = 10000
+
+    def __init__(self, master=None, model=None, **kwargs):
+        """
+        Initialize the VirtualTreeview.
+
+        :param master: The parent widget.
+        :param model: The model holding the rows.
+        :param kwargs: Additional keyword arguments for ttk.Treeview.
+        """
+        self._yscrollcommand = kwargs.pop('yscrollcommand', None)
+        super().__init__(master, **kwargs)
+        self.model = model
+        self.column_names = list(self['columns'])
+        self.column_widths = {column: 0 for column in self.column_names}
+        self._pool = []
+        self._offset = 0
+        # Replaced by the number of rows that fit once the widget is drawn
+        self._visible_rows = max(1, int(kwargs.get('height', 10)))
+        self._selected_key = None
+        self._font = font.nametofont("TkDefaultFont")
+        self._measure_cache = {}
+
+        self.bind('<Configure>', self._on_configure, add='+')
+        self.bind('<<TreeviewSelect>>', self._on_select, add='+')
+        self.bind('<MouseWheel>', self._on_mousewheel, add='+')
+        self.bind('<Button-4>', lambda event: self.yview('scroll', -3, 'units'), add='+')
+        self.bind('<Button-5>', lambda event: self.yview('scroll', 3, 'units'), add='+')
+        self.bind('<Up>', lambda event: self._move_selection(-1))
+        self.bind('<Down>', lambda event: self._move_selection(1))
+        self.bind('<Prior>', lambda event: self._move_selection(-max(1, self._visible_rows - 1)))
+        self.bind('<Next>', lambda event: self._move_selection(max(1, self._visible_rows - 1)))
+
+    # Model notifications
+
+    def rows_inserted(self, start):
+        """
+        Updates the view after rows were added to the end of the model.
+
+        :param start: The index of the first new row.
+        """
+        for index in range(start, len(self.model)):
+            self._measure(self.model.values(index))
+        self._render()
+
+    def row_updated(self, index):
+        """
+        Updates the view after the values of a row of the model changed.
+
+        :param index: The index of the row.
+        """
+        values = self.model.values(index)
+        self._measure(values)
+        position = index - self._offset
+        if 0 <= position < len(self._pool):
+            super().item(self._pool[position], values=values, tags=self._tags(index))
+
+    def refresh(self):
+        """
+        Updates the view after the rows of the model were reordered or changed as a whole. The scroll position is kept.
+        """
+        self._render()
+
+    def reset(self):
+        """
+        Updates the view after the model was cleared, and resets the scroll position and the column widths.
+        """
+        self._offset = 0
+        self._selected_key = None
+        self._measure_cache = {}
+        self.column_widths = {column: 0 for column in self.column_names}
+        self._render()
+
+    def _measure(self, values):
+        for column, value in zip(self.column_names, values):
+            text = str(value)
+            width = self._measure_cache.get(text)
+            if width is None:
+                width = self._font.measure(text)
+                if len(self._measure_cache) < self.MEASURE_CACHE_SIZE:
+                    self._measure_cache[text] = width
+            if width > self.column_widths[column]:
+                self.column_widths[column] = width
+
+    # Rendering and scrolling
+
+    def _render(self):
+        """
+        Fills the item pool with the rows at the current scroll offset.
+        """
+        total = len(self.model)
+        self._offset = max(0, min(self._offset, total - self._visible_rows))
+        count = max(0, min(self._visible_rows, total - self._offset))
+        while len(self._pool) < count:
+            self._pool.append(super().insert('', tk.END))
+        if len(self._pool) > count:
+            super().delete(*self._pool[count:])
+            del self._pool[count:]
+
+        selected_item = None
+        for position, item in enumerate(self._pool):
+            index = self._offset + position
+            values = self.model.values(index)
+            super().item(item, values=values, tags=self._tags(index))
+            if values[0] == self._selected_key:
+                selected_item = item
+
+        if selected_item:
+            if super().selection() != (selected_item,):
+                super().selection_set(selected_item)
+        elif super().selection():
+            super().selection_remove(super().selection())
+        self._update_scrollbar()
+        if total and self._offset + 2 * self._visible_rows >= total:
+            self.event_generate('<<VirtualTreeviewNearEnd>>', when='tail')
+
+    def _tags(self, index):
+        return ('oddrow' if index % 2 == 0 else 'evenrow', *self.model.tags(index))
+
+    def _fractions(self):
+        total = len(self.model)
+        if not total or total <= self._visible_rows:
+            return 0.0, 1.0
+        return self._offset / total, min(1.0, (self._offset + self._visible_rows) / total)
+
+    def _update_scrollbar(self):
+        if self._yscrollcommand:
+            self._yscrollcommand(*self._fractions())
+
+    def scroll_to(self, offset):
+        """
+        Scrolls the view so that the row at the given position is the first visible row.
+        """
+        offset = max(0, min(int(offset), len(self.model) - self._visible_rows))
+        if offset != self._offset:
+            self._offset = offset
+            self._render()
+
+    def yview(self, *args):
+        """
+        Implements the scrolling protocol of Tk scrollbars over all rows, rather than the materialized ones.
+        """
+        if not args:
+            return self._fractions()
+        if args[0] == 'moveto':
+            self.scroll_to(round(float(args[1]) * len(self.model)))
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= max(1, self._visible_rows - 1)
+            self.scroll_to(self._offset + amount)
+
+    def configure(self, cnf=None, **kwargs):
+        # Scrollbars follow the virtual scroll position instead of the materialized items
+        if 'yscrollcommand' in kwargs:
+            self._yscrollcommand = kwargs.pop('yscrollcommand')
+            self._update_scrollbar()
+        if cnf or kwargs:
+            return super().configure(cnf, **kwargs)
+
+    config = configure
+
+    def _on_configure(self, event=None):
+        # Derive the number of rows that fit from the geometry of a drawn row
+        bbox = super().bbox(self._pool[0]) if self._pool else None
+        if bbox:
+            _, y, _, row_height = bbox
+            visible_rows = max(1, (self.winfo_height() - y) // max(1, row_height))
+        else:
+            visible_rows = self._visible_rows
+        if visible_rows != self._visible_rows:
+            self._visible_rows = visible_rows
+            self._render()
+            # The first rows are drawn before the row height is known
+            self.after_idle(self._on_configure)
+
+    def _on_mousewheel(self, event):
+        step = -1 if event.delta > 0 else 1
+        # Windows reports multiples of 120 per notch, macOS reports small deltas
+        notches = max(1, abs(event.delta) // 120)
+        self.yview('scroll', step * 3 * notches, 'units')
+        return "break"
+
+    # Selection
+
+    def _on_select(self, event=None):
+        selection = super().selection()
+        if selection:
+            values = super().item(selection[0], 'values')
+            if values:
+                self._selected_key = values[0]
+
+    def selection_remove(self, *items):
+        self._selected_key = None
+        return super().selection_remove(*items)
+
+    def _move_selection(self, step):
+        total = len(self.model)
+        if not total:
+            return "break"
+        index = self.model.index(self._selected_key)
+        index = 0 if index is None else max(0, min(total - 1, index + step))
+        self._selected_key = self.model.values(index)[0]
+        if index < self._offset:
+            self.scroll_to(index)
+        elif index >= self._offset + self._visible_rows:
+            self.scroll_to(index - self._visible_rows + 1)
+        self._render()
+        return "break"
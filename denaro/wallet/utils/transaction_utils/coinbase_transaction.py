@@ -4,7 +4,7 @@ from decimal import Decimal
 
 dir_path = os.path.dirname(os.path.realpath(__file__))
 sys.path.insert(0, dir_path + "/../")
-from wallet_generation_util import sha256, ENDIAN
+from ..wallet_generation_util import sha256, ENDIAN
 
 from .transaction_output import TransactionOutput
 
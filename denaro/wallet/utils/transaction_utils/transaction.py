@@ -9,7 +9,7 @@ from icecream import ic
 
 dir_path = os.path.dirname(os.path.realpath(__file__))
 sys.path.insert(0, dir_path + "/../")
-from wallet_generation_util import point_to_string, bytes_to_string, sha256, ENDIAN, CURVE, SMALLEST
+from ..wallet_generation_util import point_to_string, bytes_to_string, sha256, ENDIAN, CURVE, SMALLEST
 
 from .transaction_input import TransactionInput
 from .transaction_output import TransactionOutput
@@ -8,7 +8,7 @@ from fastecdsa.point import Point
 
 dir_path = os.path.dirname(os.path.realpath(__file__))
 sys.path.insert(0, dir_path + "/../")
-from wallet_generation_util import string_to_point, point_to_string, ENDIAN, CURVE, SMALLEST
+from ..wallet_generation_util import string_to_point, point_to_string, ENDIAN, CURVE, SMALLEST
 
 
 class TransactionInput:
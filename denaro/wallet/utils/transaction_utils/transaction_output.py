@@ -5,7 +5,7 @@ from decimal import Decimal
 
 dir_path = os.path.dirname(os.path.realpath(__file__))
 sys.path.insert(0, dir_path + "/../")
-from wallet_generation_util import byte_length, string_to_point, string_to_bytes, ENDIAN, CURVE, SMALLEST
+from ..wallet_generation_util import byte_length, string_to_point, string_to_bytes, ENDIAN, CURVE, SMALLEST
 
 class TransactionOutput:
     def __init__(self, address: str, amount: Decimal):
@@ -8,16 +8,30 @@ import requests
 import urllib3
 urllib3.disable_warnings()
 import re
+import time
 import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from Crypto.Protocol.KDF import scrypt
-import data_manipulation_util
-import cryptographic_util
+from . import data_manipulation_util
+from . import cryptographic_util
+from . import http_transport_util
+from . import wallet_journal_util
+from . import wallet_container_util
+from . import wallet_shard_util
 
 class Verification:
     """
     Handles data verification.
     """
+    # The time a protocol that answered waits for the probe of a preferred protocol, e.g. HTTP for the TLS handshake of HTTPS
+    PROTOCOL_GRACE_SECONDS = 0.5
+
+    # Node validation verdicts of this session, per node address and chain tip of the main node
+    _node_verdicts = {}
+    _node_verdicts_guard = threading.Lock()
+
     @staticmethod
     def hash_password(password, salt, wallet_version=None):        
         """
@@ -55,12 +69,21 @@ class Verification:
         return result
     
     @staticmethod
-    def hmac_util(password=None,hmac_salt=None,stored_hmac=None, hmac_msg=None, verify=False):
+    def derive_hmac_key(password, hmac_salt):
+        """
+        Derive the HMAC key of a wallet from its password using Scrypt.
+        """
+        result = scrypt(password.encode(), salt=hmac_salt, key_len=32, N=2**14, r=8, p=1)
+        return result
+
+    @staticmethod
+    def hmac_util(password=None,hmac_salt=None,stored_hmac=None, hmac_msg=None, verify=False, hmac_key=None):
         """
         Handle HMAC generation and verification.
         """
-        # Generate HMAC key using Scrypt
-        hmac_key = scrypt(password.encode(), salt=hmac_salt, key_len=32, N=2**14, r=8, p=1)
+        # Generate HMAC key using Scrypt unless an already derived key is provided
+        if hmac_key is None:
+            hmac_key = Verification.derive_hmac_key(password, hmac_salt)
         # Generate HMAC of the message
         computed_hmac = hmac_module.new(hmac_key, hmac_msg, hashlib.sha256).digest()
         # If in verify mode, securely compare the computed HMAC with the stored HMAC
@@ -89,14 +112,23 @@ class Verification:
         stored_verifier = base64.b64decode(data["wallet_data"]["verifier"].encode('utf-8'))
         password_verified, _ = Verification.verify_password(stored_verifier, password, verification_salt)
         
-        # Prepare and verify the HMAC message
-        hmac_msg = json.dumps(data["wallet_data"]["entry_data"]["entries"]).encode()
-        if "imported_entries" in data["wallet_data"]["entry_data"]:
-            hmac_msg = json.dumps(data["wallet_data"]["entry_data"]["imported_entries"]).encode() + hmac_msg
-        if deterministic:
-            hmac_msg += json.dumps(data["wallet_data"]["entry_data"]["key_data"]).encode()
+        # Prepare and verify the HMAC message over the entries stored in the wallet file
+        if wallet_shard_util.ShardedWallet.is_sharded(data):
+            # The HMAC of a sharded wallet covers the shard manifest, and each shard is checked against its digest when read
+            hmac_msg = wallet_shard_util.ShardedWallet.hmac_message(data, deterministic)
+        else:
+            entries, imported_entries = wallet_journal_util.WalletJournal.base_slices(data)
+            hmac_msg = json.dumps(entries, default=wallet_container_util.WalletContainer.json_default).encode()
+            if imported_entries is not None:
+                hmac_msg = json.dumps(imported_entries, default=wallet_container_util.WalletContainer.json_default).encode() + hmac_msg
+            if deterministic:
+                hmac_msg += json.dumps(data["wallet_data"]["entry_data"]["key_data"]).encode()
         stored_hmac = base64.b64decode(data["wallet_data"]["hmac"].encode('utf-8'))
-        hmac_verified = Verification.hmac_util(password=password, hmac_salt=hmac_salt, stored_hmac=stored_hmac, hmac_msg=hmac_msg, verify=True)
+        hmac_key = Verification.derive_hmac_key(password, hmac_salt)
+        hmac_verified = Verification.hmac_util(stored_hmac=stored_hmac, hmac_msg=hmac_msg, verify=True, hmac_key=hmac_key)
+        # Verify the records of the wallet journal, if any
+        if hmac_verified:
+            hmac_verified = wallet_journal_util.WalletJournal.verify(data, hmac_key)
         result = password_verified, hmac_verified, stored_verifier
         data_manipulation_util.DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not result])
         return result
@@ -250,8 +282,74 @@ class Verification:
         data_manipulation_util.DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not result])
         return result
     
+    @staticmethod
+    def _node_tip(full_address):
+        """
+        Returns the id of the last block of a node from '/get_mining_info', or None if the node does not report it.
+        Raises requests.RequestException if the node can not be reached.
+        """
+        response = http_transport_util.HttpTransport.get(f"{full_address}/get_mining_info", verify=False, timeout=5, retries=0)
+        response.raise_for_status()
+        data = response.json()
+        if not data.get('ok'):
+            return None
+        return data.get('result', {}).get('last_block', {}).get('id')
+
+    @staticmethod
+    def _node_block_hash(full_address, block_id):
+        response = http_transport_util.HttpTransport.get(f"{full_address}/get_block?block={block_id}", verify=False, timeout=5, retries=0)
+        response.raise_for_status()
+        return response.json().get('result', {}).get('block', {}).get('hash')
+
+    @staticmethod
+    def _race_protocols(executor, address, protocols_to_try):
+        """
+        Probes the address with every protocol at the same time, and returns the full address of the most preferred
+        probe that gets an answer from a Denaro node, or None. The protocols are given in order of preference. Once a
+        probe answered, the probes of preferred protocols get PROTOCOL_GRACE_SECONDS more to answer.
+        """
+        probes = {executor.submit(Verification._node_tip, protocol + address): rank for rank, protocol in enumerate(protocols_to_try)}
+        pending = set(probes)
+        answered = None
+        deadline = None
+        while pending:
+            done, pending = wait(pending, timeout=None if deadline is None else max(0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for probe in done:
+                try:
+                    if probe.result() is not None and (answered is None or probes[probe] < probes[answered]):
+                        answered = probe
+                except (requests.RequestException, ValueError):
+                    continue
+            if answered is not None:
+                if not any(probes[probe] < probes[answered] for probe in pending):
+                    break
+                if deadline is None:
+                    deadline = time.monotonic() + Verification.PROTOCOL_GRACE_SECONDS
+        return protocols_to_try[probes[answered]] + address if answered is not None else None
+
     @staticmethod
     def try_request(address, chosen_protocol, node_validation, from_gui=False):
+        """
+        Overview:
+            Connects to a node, and validates it against the main node unless node validation is disabled.
+
+            Without a protocol in the address, HTTPS and HTTP are probed at the same time. HTTPS is used if it
+            answers, and HTTP if it answers and HTTPS does not answer within PROTOCOL_GRACE_SECONDS. The chain tip of the main node is requested alongside the probes, and the
+            random block used for validation is then requested from both nodes at the same time. The verdict
+            of a validation is kept for the session, per node and chain tip of the main node, so a node is
+            validated again only once the main node has a new block.
+
+            Parameters:
+            - address: The node address.
+            - chosen_protocol (int): 0 for HTTPS, 1 for HTTP, 2 if the address has no protocol.
+            - node_validation (bool): Whether the node is validated against the main node.
+            - from_gui (bool, optional): Whether errors are returned only, instead of also being logged.
+
+            Returns:
+            - tuple: (True, full_address, "") if the node is usable, or (None, False, return_msg).
+        """
         main_node_url = "localhost:3006"
         protocols = ["https://", "http://"]
 
@@ -263,88 +361,69 @@ class Verification:
             protocols_to_try = [""]
         else:
             protocols_to_try = protocols if chosen_protocol == 2 else [protocols[chosen_protocol], protocols[1 - chosen_protocol]]
-         
-        for index, protocol in enumerate(protocols_to_try):
-            full_address = protocol + address
-            if full_address.replace("https://", "").replace("http://", "") == main_node_url:
-                node_validation = False
+
+        if re.sub(r'^https?://', '', address) == main_node_url:
+            node_validation = False
+
+        def failed(return_msg, log=logging.error):
+            if not from_gui:
+                log(return_msg)
+            return None, False, "ERROR: "+return_msg
+
+        executor = ThreadPoolExecutor(max_workers=len(protocols_to_try) + 2, thread_name_prefix="node_validation")
+        try:
+            main_tip = executor.submit(Verification._node_tip, f"https://{main_node_url}") if node_validation else None
+            full_address = Verification._race_protocols(executor, address, protocols_to_try)
+            if full_address is None:
+                result = failed("Connection to node failed.")
+                data_manipulation_util.DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not result])
+                return result
+
+            if not node_validation:
+                result = True, full_address, ""
+                data_manipulation_util.DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not result])
+                return result
+
             try:
-                if node_validation:
-                    # Get the last block number from the main node
-                    main_response = requests.get(f"https://{main_node_url}/get_mining_info", verify=False, timeout=5)
-                    main_response.raise_for_status()
-                    last_block_info = main_response.json().get('result', {}).get('last_block', {})
-                    last_block_number = last_block_info.get('id')
-                    if last_block_number is None:
-                        return_msg = f"Node validation failed."# Last block number not found in main node response."
-                        if not from_gui:
-                            logging.warning(return_msg)
-                        return_msg = "ERROR: "+return_msg
-                        continue
-    
-                    # Generate a random block number
-                    random_block_id = random.randint(0, last_block_number - 1)
-    
-                    # Get the block hash from the main node
-                    main_block_response = requests.get(f"https://{main_node_url}/get_block?block={random_block_id}", verify=False, timeout=5)
-                    main_block_response.raise_for_status()
-                    main_node_block_info = main_block_response.json().get('result', {}).get('block', {})
-                    main_node_block_hash = main_node_block_info.get('hash')
-                    if main_node_block_hash is None:
-                        return_msg = f"Node validation failed."# Block hash not found in main node response."
-                        if not from_gui:
-                            logging.error(return_msg)
-                        return_msg = "ERROR: "+return_msg
-                        continue
-    
-                    # Get the block hash from the user-specified node
-                    user_block_response = requests.get(f"{full_address}/get_block?block={random_block_id}", verify=False, timeout=5)
-                    user_block_response.raise_for_status()
-                    user_node_block_info = user_block_response.json().get('result', {}).get('block', {})
-                    user_node_block_hash = user_node_block_info.get('hash')
-    
-                    if user_node_block_hash is None:
-                        return_msg = f"Node validation failed."# Block hash not found in specified node. {full_address} is not a valid Denaro node."
-                        if not from_gui:
-                            logging.error(return_msg)
-                        return_msg = "ERROR: "+return_msg
-                        continue
-    
-                    # Compare the block hashes
-                    if main_node_block_hash == user_node_block_hash:
-                        result = True, full_address, ""
-                        data_manipulation_util.DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not result])
-                        return result
-                    else:
-                        return_msg = f"Node at {full_address} has invalid blockchain data."
-                        if not from_gui:
-                            logging.error(return_msg)
-                        return_msg = "ERROR: "+return_msg
-                        continue
-                else:
-                    main_response = requests.get(f"{full_address}/get_mining_info", verify=False, timeout=5)
-                    main_response.raise_for_status()
-                    if not main_response.json().get('ok'):
-                        continue
-                    else:
-                        result = True, full_address, ""
-                        data_manipulation_util.DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not result])
-                        return result
-                    
-            except requests.RequestException:
-                if index < len(protocols_to_try) - 1:
-                    #return_msg = f"Connection failed with {full_address}. Trying next protocol..."
-                    return_msg = "Connection to node failed. Trying next protocol..."
-                    if not from_gui:
-                        logging.error(return_msg)
-                else:
-                    return_msg = "Connection to node failed."
-                    if not from_gui:
-                        logging.error(return_msg)
-                    return_msg = "ERROR: "+return_msg
-                continue
-
-        # Secure delete before final return
-        result = None, False, return_msg
-        data_manipulation_util.DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not result])
-        return result
\ No newline at end of file
+                # Get the last block number from the main node
+                last_block_number = main_tip.result()
+                if last_block_number is None:
+                    result = failed("Node validation failed.", log=logging.warning)
+                    data_manipulation_util.DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not result])
+                    return result
+
+                with Verification._node_verdicts_guard:
+                    result = Verification._node_verdicts.get((full_address, last_block_number))
+                if result is not None:
+                    if result[2] and not from_gui:
+                        logging.error(result[2].replace("ERROR: ", "", 1))
+                    return result
+
+                # Get the hash of a random block from the main node and from the user-specified node
+                random_block_id = random.randint(0, last_block_number - 1)
+                main_block = executor.submit(Verification._node_block_hash, f"https://{main_node_url}", random_block_id)
+                user_block = executor.submit(Verification._node_block_hash, full_address, random_block_id)
+                main_node_block_hash = main_block.result()
+                user_node_block_hash = user_block.result()
+            except (requests.RequestException, ValueError):
+                result = failed("Connection to node failed.")
+                data_manipulation_util.DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not result])
+                return result
+
+            if main_node_block_hash is None or user_node_block_hash is None:
+                result = failed("Node validation failed.")
+                data_manipulation_util.DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not result])
+                return result
+
+            # Compare the block hashes
+            if main_node_block_hash == user_node_block_hash:
+                result = True, full_address, ""
+            else:
+                result = failed(f"Node at {full_address} has invalid blockchain data.")
+            with Verification._node_verdicts_guard:
+                Verification._node_verdicts[(full_address, last_block_number)] = result
+            data_manipulation_util.DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not result])
+            return result
+        finally:
+            # Probes that lost the race are not waited for
+            executor.shutdown(wait=False, cancel_futures=True)
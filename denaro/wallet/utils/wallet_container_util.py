@@ -0,0 +1,413 @@
+import os
+import mmap
+import json
+import struct
+import base64
+import logging
+import threading
+import weakref
+from collections.abc import Sequence
+from . import data_manipulation_util
+from . import wallet_shard_util
+from . import wallet_lock_util
+from . import address_sidecar_util
+
+class WalletContainerReader:
+    """
+    Memory-mapped reader for binary wallet containers.
+
+    Only the header is parsed when the container is opened. Entries are
+    located through the offset table and read from the mapping one at a time.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        # The mapping keeps its own handle of the file
+        with open(filename, 'rb') as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError("Wallet container is empty")
+        try:
+            self.header, self._sections, self._table_offset = WalletContainer._parse_header(self._map)
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def sections(self):
+        """
+        Returns the names of the entry sections stored in the container, in order.
+        """
+        return [name for name, _, _ in self._sections]
+
+    def count(self, section):
+        """
+        Returns the number of entries in a section, or None if the section is not stored in the container.
+        """
+        for name, count, _ in self._sections:
+            if name == section:
+                return count
+        return None
+
+    def get_entry(self, section, index):
+        """
+        Overview:
+            Reads a single entry from the container without reading any other entry. Encrypted entries
+            are returned in their stored base64 form and unencrypted entries as dictionaries, exactly as
+            they would appear in a JSON wallet file.
+
+            Parameters:
+            - section: Either 'entries' or 'imported_entries'.
+            - index: The position of the entry within the section.
+
+            Returns:
+            - str or dict: The wallet entry.
+        """
+        position = 0
+        for name, count, encoding in self._sections:
+            if name == section:
+                if not 0 <= index < count:
+                    raise IndexError(f"Entry {index} is out of range for '{section}'")
+                offset, length = struct.unpack_from(WalletContainer.TABLE_ROW, self._map, self._table_offset + (position + index) * WalletContainer.TABLE_ROW_SIZE)
+                blob = self._map[offset:offset + length]
+                if encoding == "base64":
+                    return base64.b64encode(blob).decode('utf-8')
+                return json.loads(blob.decode('utf-8'))
+            position += count
+        raise KeyError(f"Wallet container has no '{section}' section")
+
+    def iter_entries(self, section):
+        """
+        Lazily yields the entries of a section.
+        """
+        for index in range(self.count(section) or 0):
+            yield self.get_entry(section, index)
+
+    def to_dict(self, lazy=False):
+        """
+        Returns the complete wallet data, identical to the data of the equivalent JSON wallet file. With
+        'lazy', the entry sections are attached as lazily read lists, and the reader must be kept open.
+        """
+        data = json.loads(json.dumps(self.header["data"]))
+        entry_data = data["wallet_data"]["entry_data"]
+        for name in self.sections():
+            entry_data[name] = ContainerEntries(self, name) if lazy else list(self.iter_entries(name))
+        # Restore the original key order of entry_data
+        order = self.header["container"].get("order", [])
+        ordered = {key: entry_data[key] for key in order if key in entry_data}
+        ordered.update({key: value for key, value in entry_data.items() if key not in ordered})
+        entry_data.clear()
+        entry_data.update(ordered)
+        return data
+
+
+class ContainerEntries(Sequence):
+    """
+    A lazily read list of the wallet entries of a container section.
+
+    Entries are read from the mapping of the open container as they are
+    accessed, so loading a wallet container only parses its header and a
+    single entry is read without reading any other entry. Entries appended
+    after loading, e.g. from the wallet journal, are kept in memory. Before
+    the container file is replaced or wiped, 'release' reads the remaining
+    entries into memory and the mapping is closed.
+    """
+    # Marks lazily read container entries
+    is_container = True
+    _open = weakref.WeakSet()
+    _guard = threading.Lock()
+
+    def __init__(self, reader, section):
+        self.filename = reader.filename
+        self.section = section
+        self._reader = reader
+        self._count = reader.count(section)
+        self._entries = []
+        with ContainerEntries._guard:
+            ContainerEntries._open.add(self)
+
+    def __len__(self):
+        return self._count + len(self._entries)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("wallet entry index out of range")
+        with ContainerEntries._guard:
+            if index < self._count:
+                return self._reader.get_entry(self.section, index)
+        return self._entries[index - self._count]
+
+    def __iter__(self):
+        # Entries are read one at a time, and the section may be released while it is iterated
+        position = 0
+        while position < len(self):
+            yield self[position]
+            position += 1
+
+    def append(self, entry):
+        self._entries.append(entry)
+
+    def extend(self, entries):
+        self._entries.extend(entries)
+
+    def release(self):
+        """
+        Reads the entries that are still in the container into memory.
+        """
+        if self._reader is not None:
+            self._entries = list(self._reader.iter_entries(self.section)) + self._entries
+            self._count = 0
+            self._reader = None
+
+    @staticmethod
+    def release_all(filename):
+        """
+        Overview:
+            Reads every lazily read section of a wallet container into memory and closes the mappings of the
+            container, before the container file is replaced or wiped.
+
+            Parameters:
+            - filename: The path of the wallet container.
+        """
+        readers = set()
+        with ContainerEntries._guard:
+            for entries in list(ContainerEntries._open):
+                if entries._reader is not None and os.path.normpath(entries.filename) == os.path.normpath(filename):
+                    readers.add(entries._reader)
+                    entries.release()
+                    ContainerEntries._open.discard(entries)
+            for reader in readers:
+                reader.close()
+
+
+class WalletContainer:
+    """
+    Handles the binary wallet container format.
+
+    Layout:
+    - A fixed 12 byte header: magic, format version, reserved field and the length of the JSON header.
+    - The JSON header, holding all wallet data except the wallet entries, and the entry count and
+      encoding of each section.
+    - An offset table with one (offset, length) row per entry.
+    - The entries themselves. Encrypted entries are stored as raw ciphertext rather than base64,
+      and unencrypted entries as compact JSON.
+    """
+    MAGIC = b"DNRW"
+    FORMAT_VERSION = 1
+    FIXED_HEADER = ">4sHHI"
+    FIXED_HEADER_SIZE = struct.calcsize(FIXED_HEADER)
+    TABLE_ROW = ">QI"
+    TABLE_ROW_SIZE = struct.calcsize(TABLE_ROW)
+    EXTENSION = ".dnrw"
+    SECTIONS = ["entries", "imported_entries"]
+
+    @staticmethod
+    def is_container(filename):
+        """
+        Returns True if the file starts with the wallet container magic.
+        """
+        try:
+            with open(filename, 'rb') as f:
+                return f.read(len(WalletContainer.MAGIC)) == WalletContainer.MAGIC
+        except OSError:
+            return False
+
+    @staticmethod
+    def uses_container(filename):
+        """
+        Returns True if wallet data for the given path should be stored as a wallet container. This is the
+        case for existing containers, and for new files with the container extension.
+        """
+        if os.path.exists(filename) and os.path.getsize(filename) > 0:
+            return WalletContainer.is_container(filename)
+        return os.path.splitext(filename)[1].lower() == WalletContainer.EXTENSION
+
+    @staticmethod
+    def open(filename):
+        """
+        Opens a wallet container for reading. The returned reader should be closed, or used as a context manager.
+        """
+        return WalletContainerReader(filename)
+
+    @staticmethod
+    def _parse_header(buffer):
+        magic, format_version, _, header_length = struct.unpack_from(WalletContainer.FIXED_HEADER, buffer, 0)
+        if magic != WalletContainer.MAGIC:
+            raise ValueError("Not a wallet container")
+        if format_version > WalletContainer.FORMAT_VERSION:
+            raise ValueError(f"Unsupported wallet container version: {format_version}")
+        header_end = WalletContainer.FIXED_HEADER_SIZE + header_length
+        header = json.loads(bytes(buffer[WalletContainer.FIXED_HEADER_SIZE:header_end]).decode('utf-8'))
+        sections = [(name, count, encoding) for name, count, encoding in header["container"]["sections"]]
+        return header, sections, header_end
+
+    @staticmethod
+    def read_header(filename):
+        """
+        Overview:
+            Reads only the JSON header of a wallet container, without mapping or reading any entry.
+
+            Returns:
+            - dict: The container header.
+        """
+        with open(filename, 'rb') as f:
+            fixed = f.read(WalletContainer.FIXED_HEADER_SIZE)
+            _, _, _, header_length = struct.unpack(WalletContainer.FIXED_HEADER, fixed)
+            header, _, _ = WalletContainer._parse_header(fixed + f.read(header_length))
+        return header
+
+    @staticmethod
+    def load(filename, lazy=False):
+        """
+        Overview:
+            Loads the complete wallet data from a wallet container.
+
+            Parameters:
+            - filename: The path of the wallet container.
+            - lazy (bool, optional): Whether the entry sections are attached as lazily read lists, which keep
+              the container mapped until they are released. Defaults to False.
+
+            Returns:
+            - dict: The wallet data.
+        """
+        if not lazy:
+            with WalletContainer.open(filename) as reader:
+                return reader.to_dict()
+        reader = WalletContainer.open(filename)
+        data = reader.to_dict(lazy=True)
+        if not reader.sections():
+            reader.close()
+        return data
+
+    @staticmethod
+    def is_lazy(value):
+        """
+        Returns True if the value is a lazily read list of container entries.
+        """
+        return getattr(value, "is_container", False) is True
+
+    @staticmethod
+    def json_default(value):
+        """
+        JSON serializer fallback that represents lazily read container entries by their entries, and lazily
+        loaded sharded entries by their manifest.
+        """
+        if WalletContainer.is_lazy(value):
+            return list(value)
+        return wallet_shard_util.ShardedWallet.json_default(value)
+
+    @staticmethod
+    def save(filename, data):
+        """
+        Overview:
+            Writes wallet data to a wallet container. The container is written to a temporary file which
+            then atomically replaces the target file.
+
+            Parameters:
+            - filename: The path of the wallet container.
+            - data: The wallet data, in the same form as stored in a JSON wallet file.
+        """
+        # Entries read lazily from the container are read into memory before it is replaced
+        ContainerEntries.release_all(filename)
+        entry_data = data["wallet_data"]["entry_data"]
+        header_wallet_data = dict(data["wallet_data"])
+        header_wallet_data["entry_data"] = {key: value for key, value in entry_data.items() if key not in WalletContainer.SECTIONS}
+
+        sections = []
+        blobs = []
+        for name in WalletContainer.SECTIONS:
+            if name not in entry_data:
+                continue
+            entries = entry_data[name]
+            encoding = "base64" if all(isinstance(entry, str) for entry in entries) else "json"
+            for entry in entries:
+                if encoding == "base64":
+                    blobs.append(base64.b64decode(entry.encode('utf-8')))
+                else:
+                    blobs.append(json.dumps(entry, separators=(',', ':')).encode('utf-8'))
+            sections.append([name, len(entries), encoding])
+
+        header_data = dict(data)
+        header_data["wallet_data"] = header_wallet_data
+        header = {
+            "data": header_data,
+            "container": {"sections": sections, "order": list(entry_data.keys())}
+        }
+        header_bytes = json.dumps(header).encode('utf-8')
+
+        table_offset = WalletContainer.FIXED_HEADER_SIZE + len(header_bytes)
+        offset = table_offset + len(blobs) * WalletContainer.TABLE_ROW_SIZE
+        table = bytearray()
+        for blob in blobs:
+            table += struct.pack(WalletContainer.TABLE_ROW, offset, len(blob))
+            offset += len(blob)
+
+        temp_filename = f"{filename}.tmp"
+        with open(temp_filename, 'wb') as f:
+            f.write(struct.pack(WalletContainer.FIXED_HEADER, WalletContainer.MAGIC, WalletContainer.FORMAT_VERSION, 0, len(header_bytes)))
+            f.write(header_bytes)
+            f.write(table)
+            for blob in blobs:
+                f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_filename, filename)
+        data_manipulation_util.DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+
+    @staticmethod
+    def convert(source, destination, to_container):
+        """
+        Overview:
+            Converts a wallet file between the JSON format and the binary container format. The wallet
+            data, including its HMAC, is carried over unchanged. A wallet journal, address list or shard
+            directory next to the source is copied along since it remains valid for the converted wallet.
+
+            Parameters:
+            - source: The path of the wallet file to convert.
+            - destination: The path of the converted wallet file.
+            - to_container (bool): True to convert JSON to binary, False to convert binary to JSON.
+
+            Returns:
+            - bool: True if the wallet was converted, None otherwise.
+        """
+        try:
+            # The source wallet and its journal, address list and shards are read as one consistent snapshot
+            with wallet_lock_util.WalletLock.shared(source):
+                if WalletContainer.is_container(source):
+                    data = WalletContainer.load(source)
+                else:
+                    with open(source, 'r') as f:
+                        data = json.load(f)
+                if to_container:
+                    WalletContainer.save(destination, data)
+                else:
+                    ContainerEntries.release_all(destination)
+                    with open(destination, 'w') as f:
+                        json.dump(data, f, indent=4)
+                journal_source = f"{source}.journal"
+                if os.path.exists(journal_source) and os.path.normpath(source) != os.path.normpath(destination):
+                    with open(journal_source, 'rb') as f_in, open(f"{destination}.journal", 'wb') as f_out:
+                        f_out.write(f_in.read())
+                if os.path.normpath(source) != os.path.normpath(destination):
+                    address_sidecar_util.AddressSidecar.copy(source, destination)
+                    wallet_shard_util.ShardedWallet.copy(source, destination)
+            data_manipulation_util.DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+            return True
+        except Exception as e:
+            logging.error(f"Unable to convert wallet file: {e}")
+            data_manipulation_util.DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+            return None
@@ -20,7 +20,7 @@ from bitcoinlib.keys import HDKey, Key
 from icecream import ic
 import binascii
 
-import data_manipulation_util
+from . import data_manipulation_util
 
 # Custom print function definition
 _print = print  # Saving the original print function for later use
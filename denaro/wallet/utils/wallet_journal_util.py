@@ -0,0 +1,406 @@
+import os
+import json
+import base64
+import hashlib
+import hmac as hmac_module
+import logging
+from . import data_manipulation_util
+from . import verification_util
+from . import wallet_container_util
+from . import address_index_util
+from . import wallet_metadata_util
+from . import wallet_lock_util
+
+class WalletJournal:
+    """
+    Handles the append-only journal that sits next to a wallet file.
+
+    New wallet entries are appended to '<wallet>.journal' as authenticated
+    records rather than rewriting the wallet file and recomputing the HMAC over
+    every entry. The journal is folded back into the wallet file by compaction.
+    """
+    # Number of journal records after which a compaction is triggered
+    COMPACTION_THRESHOLD = 64
+
+    @staticmethod
+    def journal_path(filename):
+        return f"{filename}.journal"
+
+    @staticmethod
+    def _base_counts(data):
+        # The imported entry count is None when the wallet file has no 'imported_entries' list
+        entry_data = data["wallet_data"]["entry_data"]
+        imported_entries = entry_data.get("imported_entries")
+        return [len(entry_data.get("entries", [])), len(imported_entries) if imported_entries is not None else None]
+
+    @staticmethod
+    def _anchor(data, base):
+        """
+        Overview:
+            Returns the value that the first record of the journal is chained to. For encrypted wallets this
+            is the stored HMAC of the wallet file, binding the journal to the exact base data it extends. For
+            unencrypted wallets it is a digest of the base entry counts.
+        """
+        anchor = json.dumps(base).encode()
+        if "hmac" in data["wallet_data"]:
+            anchor = base64.b64decode(data["wallet_data"]["hmac"].encode('utf-8')) + anchor
+        return hashlib.sha256(anchor).digest()
+
+    @staticmethod
+    def _record_mac(prev_mac, record, hmac_key=None):
+        """
+        Overview:
+            Computes the MAC of a journal record chained to the MAC of the previous record. An HMAC keyed
+            with the wallet's HMAC key is used for encrypted wallets and a plain SHA-256 chain otherwise.
+        """
+        msg = prev_mac + json.dumps([record["seq"], record["section"], record["entry"]]).encode()
+        if hmac_key:
+            return hmac_module.new(hmac_key, msg, hashlib.sha256).digest()
+        return hashlib.sha256(msg).digest()
+
+    @staticmethod
+    def load(filename, data):
+        """
+        Overview:
+            Reads the journal of a wallet file and merges its records into the in-memory wallet data. The
+            base entry counts and the raw records are kept under the transient 'journal_state' key so that
+            HMAC verification and saving can tell journaled entries apart from the ones in the wallet file.
+            A journal that was written against a different base (e.g. left behind by an interrupted
+            compaction) is ignored. Unencrypted journals are verified here since they need no key.
+
+            Parameters:
+            - filename: The path of the wallet file.
+            - data: The wallet data loaded from the wallet file.
+
+            Returns:
+            - dict: The wallet data with any journaled entries merged in.
+        """
+        path = WalletJournal.journal_path(filename)
+        if not data or "wallet_data" not in data or not os.path.exists(path):
+            return data
+
+        base = WalletJournal._base_counts(data)
+        records = []
+        try:
+            with open(path, 'r') as f:
+                lines = f.read().splitlines()
+        except OSError as e:
+            logging.error(f"Unable to read wallet journal: {e}")
+            return data
+
+        header = None
+        for line in lines:
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn trailing write is discarded
+                break
+            if header is None:
+                header = item
+                continue
+            records.append(item)
+
+        if not header or header.get("base") != base:
+            logging.info("Ignoring wallet journal that does not match the wallet file.")
+            return data
+
+        encrypted = "hmac" in data["wallet_data"]
+        prev_mac = WalletJournal._anchor(data, base)
+        valid_records = []
+        for seq, record in enumerate(records):
+            if record.get("seq") != seq or record.get("section") not in ("entries", "imported_entries"):
+                break
+            if not encrypted:
+                expected = WalletJournal._record_mac(prev_mac, record)
+                if not hmac_module.compare_digest(expected, base64.b64decode(record.get("mac", ""))):
+                    logging.error("Wallet journal is corrupted. Records after the corrupted record have been ignored.")
+                    break
+            prev_mac = base64.b64decode(record.get("mac", ""))
+            valid_records.append(record)
+
+        entry_data = data["wallet_data"]["entry_data"]
+        for record in valid_records:
+            section_entries = entry_data.setdefault(record["section"], [])
+            # The address tag of a record is a lookup hint and is not covered by its MAC
+            if record.get("address_tag"):
+                data["wallet_data"].setdefault("address_index", {})[record["address_tag"]] = [record["section"], len(section_entries)]
+            section_entries.append(record["entry"])
+
+        # A journal with a torn or corrupted tail is rewritten on the next append
+        data["journal_state"] = {"base": base, "records": valid_records, "clean": len(valid_records) == len(lines) - 1}
+        return data
+
+    @staticmethod
+    def record_counts(filename, base):
+        """
+        Overview:
+            Counts the journaled entries of each section without merging them, for metadata reads. Records
+            are not authenticated here.
+
+            Parameters:
+            - filename: The path of the wallet file.
+            - base: The number of entries and imported entries stored in the wallet file.
+
+            Returns:
+            - list: The number of journaled entries and imported entries.
+        """
+        counts = [0, 0]
+        path = WalletJournal.journal_path(filename)
+        if not os.path.exists(path):
+            return counts
+        try:
+            with open(path, 'r') as f:
+                header = json.loads(f.readline())
+                journal_base = header.get("base", [])
+                if len(journal_base) != 2 or journal_base[0] != base[0] or (journal_base[1] or 0) != base[1]:
+                    return counts
+                for line in f:
+                    record = json.loads(line)
+                    counts[0 if record.get("section") == "entries" else 1] += 1
+        except (OSError, ValueError):
+            pass
+        return counts
+
+    @staticmethod
+    def verify(data, hmac_key):
+        """
+        Overview:
+            Verifies the HMAC chain of the journaled records of an encrypted wallet.
+
+            Parameters:
+            - data: The wallet data containing a 'journal_state'.
+            - hmac_key: The HMAC key derived from the wallet password.
+
+            Returns:
+            - bool: True if every record is authentic, False otherwise.
+        """
+        journal_state = data.get("journal_state")
+        if not journal_state:
+            return True
+        prev_mac = WalletJournal._anchor(data, journal_state["base"])
+        for record in journal_state["records"]:
+            expected = WalletJournal._record_mac(prev_mac, record, hmac_key)
+            if not hmac_module.compare_digest(expected, base64.b64decode(record.get("mac", ""))):
+                return False
+            prev_mac = expected
+        return True
+
+    @staticmethod
+    def base_slices(data):
+        """
+        Returns the entries and imported entries that are stored in the wallet file itself.
+        """
+        entry_data = data["wallet_data"]["entry_data"]
+        journal_state = data.get("journal_state")
+        entries = entry_data.get("entries", [])
+        imported_entries = entry_data.get("imported_entries")
+        if journal_state:
+            entries = entries[:journal_state["base"][0]]
+            if journal_state["base"][1] is None:
+                imported_entries = None
+            elif imported_entries is not None:
+                imported_entries = imported_entries[:journal_state["base"][1]]
+        return entries, imported_entries
+
+    @staticmethod
+    def strip(data):
+        """
+        Overview:
+            Returns a copy of the wallet data as it is stored in the wallet file, without journaled entries
+            and without the transient 'journal_state' key. Data without a journal is returned unchanged.
+        """
+        if not isinstance(data, dict) or "journal_state" not in data:
+            return data
+        entries, imported_entries = WalletJournal.base_slices(data)
+        stripped = {key: value for key, value in data.items() if key != "journal_state"}
+        stripped["wallet_data"] = address_index_util.AddressIndex.strip(dict(data["wallet_data"]), data["journal_state"]["base"])
+        stripped["wallet_data"]["entry_data"] = dict(data["wallet_data"]["entry_data"])
+        stripped["wallet_data"]["entry_data"]["entries"] = entries
+        if imported_entries is not None:
+            stripped["wallet_data"]["entry_data"]["imported_entries"] = imported_entries
+        else:
+            stripped["wallet_data"]["entry_data"].pop("imported_entries", None)
+        return stripped
+
+    @staticmethod
+    def begin(data):
+        """
+        Overview:
+            Records the entry counts of the wallet file before new entries are added to the in-memory
+            wallet data, so that they can later be told apart from the entries stored in the wallet file.
+            Data that was loaded together with a journal is left unchanged.
+        """
+        if "journal_state" not in data:
+            data["journal_state"] = {"base": WalletJournal._base_counts(data), "records": [], "clean": False}
+        return data
+
+    @staticmethod
+    def append(filename, data, section, new_entries, hmac_key=None, address_tags=None):
+        """
+        Overview:
+            Appends new wallet entries to the journal as authenticated records. The wallet file itself is
+            not rewritten, making the cost of adding an address independent of the size of the wallet.
+            The entries are expected to already be part of the in-memory wallet data, which must have
+            been passed through 'begin' before they were added.
+
+            Parameters:
+            - filename: The path of the wallet file.
+            - data: The wallet data.
+            - section: Either 'entries' or 'imported_entries'.
+            - new_entries: The entries to append, in the same form as they are stored in the wallet file.
+            - hmac_key: The HMAC key of an encrypted wallet, None for unencrypted wallets.
+            - address_tags (list, optional): The address index tags of the new entries.
+
+            Returns:
+            - int: The number of records in the journal after appending.
+        """
+        journal_state = data["journal_state"]
+        records = journal_state["records"]
+
+        # A new journal, or one with a torn or corrupted tail, is rewritten as a whole
+        rewrite = not journal_state["clean"]
+        lines = []
+        if rewrite:
+            lines.append(json.dumps({"journal": 1, "base": journal_state["base"]}))
+            lines.extend(json.dumps(record) for record in records)
+
+        prev_mac = base64.b64decode(records[-1]["mac"]) if records else WalletJournal._anchor(data, journal_state["base"])
+        for position, entry in enumerate(new_entries):
+            record = {"seq": len(records), "section": section, "entry": entry}
+            prev_mac = WalletJournal._record_mac(prev_mac, record, hmac_key)
+            record["mac"] = base64.b64encode(prev_mac).decode()
+            if address_tags:
+                record["address_tag"] = address_tags[position]
+            records.append(record)
+            lines.append(json.dumps(record))
+
+        path = WalletJournal.journal_path(filename)
+        with wallet_lock_util.WalletLock.exclusive(filename):
+            with open(path, 'w' if rewrite or not os.path.exists(path) else 'a') as f:
+                f.write("\n".join(lines) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        journal_state["clean"] = True
+        return len(records)
+
+    @staticmethod
+    def remove(filename):
+        """
+        Removes the journal of a wallet whose entries have been written elsewhere.
+        """
+        path = WalletJournal.journal_path(filename)
+        with wallet_lock_util.WalletLock.exclusive(filename):
+            if os.path.exists(path):
+                os.remove(path)
+
+    @staticmethod
+    def _hmac_message(wallet_data, entries, imported_entries):
+        """
+        Returns the message that the HMAC of an encrypted wallet file is computed over.
+        """
+        hmac_msg = json.dumps(entries, default=wallet_container_util.WalletContainer.json_default).encode()
+        if imported_entries is not None:
+            hmac_msg = json.dumps(imported_entries, default=wallet_container_util.WalletContainer.json_default).encode() + hmac_msg
+        if wallet_data.get("wallet_type") == "deterministic":
+            hmac_msg += json.dumps(wallet_data["entry_data"]["key_data"]).encode()
+        return hmac_msg
+
+    @staticmethod
+    def _reload(filename, password=None, hmac_salt=None):
+        """
+        Overview:
+            Reads the wallet file together with its journal, for a caller that holds the exclusive wallet
+            lock. The HMAC of an encrypted wallet file and the records of its journal are verified, since
+            they are rewritten under a fresh HMAC by compaction.
+
+            Parameters:
+            - filename: The path of the wallet file.
+            - password: The wallet password, required for encrypted wallets.
+            - hmac_salt: The HMAC salt of an encrypted wallet.
+
+            Returns:
+            - tuple: The wallet data with any journaled entries merged in, and the HMAC key of an encrypted
+              wallet. The wallet data is None if the wallet file or its journal is not authentic.
+        """
+        if wallet_container_util.WalletContainer.is_container(filename):
+            data = wallet_container_util.WalletContainer.load(filename)
+        else:
+            with open(filename, 'r') as f:
+                data = json.load(f)
+        data = WalletJournal.load(filename, data)
+        hmac_key = None
+        if "journal_state" in data and "hmac" in data["wallet_data"]:
+            hmac_key = verification_util.Verification.derive_hmac_key(password, hmac_salt)
+            entries, imported_entries = WalletJournal.base_slices(data)
+            stored_hmac = base64.b64decode(data["wallet_data"]["hmac"].encode('utf-8'))
+            hmac_msg = WalletJournal._hmac_message(data["wallet_data"], entries, imported_entries)
+            if not verification_util.Verification.hmac_util(stored_hmac=stored_hmac, hmac_msg=hmac_msg, verify=True, hmac_key=hmac_key) or not WalletJournal.verify(data, hmac_key):
+                data = None
+        return data, hmac_key
+
+    @staticmethod
+    def compact(filename, data=None, password=None, hmac_salt=None):
+        """
+        Overview:
+            Folds the journal back into the wallet file. The complete wallet data is written to a temporary
+            file with a freshly computed HMAC, atomically moved over the wallet file and the journal is then
+            removed. If the process is interrupted after the move, the leftover journal no longer matches
+            the wallet file and is ignored on the next load.
+
+            Callers that did not hold the exclusive wallet lock since the wallet data was loaded pass no
+            wallet data. The wallet file and its journal are then read again under the lock, so that entries
+            appended in the meantime are folded in rather than dropped with the journal.
+
+            Parameters:
+            - filename: The path of the wallet file.
+            - data: The wallet data, as returned by 'load', or None to read it under the lock.
+            - password: The wallet password, required for encrypted wallets.
+            - hmac_salt: The HMAC salt of an encrypted wallet.
+
+            Returns:
+            - bool: True if the wallet was compacted, False otherwise.
+        """
+        path = WalletJournal.journal_path(filename)
+        hmac_key = None
+        try:
+            with wallet_lock_util.WalletLock.exclusive(filename):
+                reloaded = data is None
+                if reloaded:
+                    data, hmac_key = WalletJournal._reload(filename, password, hmac_salt)
+                    if data is None:
+                        logging.error("Wallet journal could not be compacted. The wallet file or its journal is not authentic.")
+                        data_manipulation_util.DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+                        return False
+                    if "journal_state" not in data:
+                        # The journal was already folded into the wallet file, or its entries were moved into shards
+                        data_manipulation_util.DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+                        return True
+
+                compacted = {key: value for key, value in data.items() if key != "journal_state"}
+                if "hmac" in compacted["wallet_data"]:
+                    entry_data = compacted["wallet_data"]["entry_data"]
+                    hmac_msg = WalletJournal._hmac_message(compacted["wallet_data"], entry_data["entries"], entry_data.get("imported_entries"))
+                    computed_hmac = verification_util.Verification.hmac_util(password=password, hmac_salt=hmac_salt, hmac_msg=hmac_msg, verify=False, hmac_key=hmac_key)
+                    compacted["wallet_data"]["hmac"] = base64.b64encode(computed_hmac).decode()
+
+                stored = wallet_metadata_util.WalletMetadata.with_header(compacted)
+                if wallet_container_util.WalletContainer.uses_container(filename):
+                    wallet_container_util.WalletContainer.save(filename, stored)
+                else:
+                    temp_filename = f"{filename}.tmp"
+                    with open(temp_filename, 'w') as f:
+                        json.dump(stored, f, indent=4)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(temp_filename, filename)
+                if os.path.exists(path):
+                    os.remove(path)
+
+            data["wallet_data"] = compacted["wallet_data"]
+            data.pop("journal_state", None)
+            data_manipulation_util.DataManipulation.secure_delete([var for var in locals().values() if var is not None and (reloaded or var is not data)])
+            return True
+        except Exception as e:
+            logging.error(f"Error compacting wallet journal: {e}")
+            data_manipulation_util.DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not data])
+            return False
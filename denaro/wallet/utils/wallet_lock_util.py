@@ -0,0 +1,225 @@
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from filelock import FileLock
+
+is_windows = os.name == 'nt'
+
+if not is_windows:
+    import fcntl
+
+class _PathLockState:
+    """
+    The lock state of a single wallet file within this process.
+    """
+    def __init__(self, lock_path):
+        self.lock_path = lock_path
+        self.condition = threading.Condition()
+        self.readers = {}
+        self.writer = None
+        self.writer_depth = 0
+        self.writers_waiting = 0
+        # Set while a thread takes the lock file, which is done without holding the condition
+        self.acquiring = False
+        self.handle = None
+
+
+class WalletLock:
+    """
+    Handles shared-read / exclusive-write locking of wallet files.
+
+    Any number of readers can hold the shared lock of a wallet at the same
+    time, while a writer holds the exclusive lock alone. Locks are taken on
+    '<wallet>.lock' so that they are honored across processes, e.g. between
+    the GUI and CLI invocations, and across the threads of one process. Both
+    locks are reentrant, and a thread holding the exclusive lock may also take
+    the shared lock. Waiting writers take precedence over new readers.
+
+    The lock file is taken without holding the in-process condition, so a
+    wait for another process does not block the threads of this process that
+    release or re-enter a lock they hold. Meanwhile, other threads wait to take
+    the lock until the lock file is held.
+
+    On Windows the lock file only supports exclusive locks, so readers in
+    different processes are serialized there.
+    """
+    LOCK_SUFFIX = ".lock"
+    # Waits longer than this are logged
+    SLOW_WAIT_SECONDS = 1.0
+
+    _states = {}
+    _states_guard = threading.Lock()
+    _stats_guard = threading.Lock()
+    _stats = {"shared": 0, "exclusive": 0, "contended": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+
+    @staticmethod
+    def _state(filename):
+        lock_path = os.path.abspath(filename) + WalletLock.LOCK_SUFFIX
+        with WalletLock._states_guard:
+            if lock_path not in WalletLock._states:
+                WalletLock._states[lock_path] = _PathLockState(lock_path)
+            return WalletLock._states[lock_path]
+
+    @staticmethod
+    def _os_acquire(state, exclusive):
+        """
+        Acquires the lock file for this process. Returns True if another process held a conflicting lock.
+        """
+        if is_windows:
+            state.handle = FileLock(state.lock_path)
+            try:
+                state.handle.acquire(timeout=0)
+                return False
+            except Exception:
+                state.handle.acquire()
+                return True
+        os.makedirs(os.path.dirname(state.lock_path), exist_ok=True)
+        state.handle = open(state.lock_path, 'a')
+        mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        try:
+            fcntl.flock(state.handle.fileno(), mode | fcntl.LOCK_NB)
+            return False
+        except BlockingIOError:
+            fcntl.flock(state.handle.fileno(), mode)
+            return True
+
+    @staticmethod
+    def _os_acquire_unlocked(state, exclusive):
+        """
+        Acquires the lock file while state.acquiring is set, with the condition released. Returns True if another
+        process held a conflicting lock.
+        """
+        state.condition.release()
+        try:
+            return WalletLock._os_acquire(state, exclusive)
+        finally:
+            state.condition.acquire()
+            state.acquiring = False
+            state.condition.notify_all()
+
+    @staticmethod
+    def _os_release(state):
+        if state.handle is None:
+            return
+        if is_windows:
+            state.handle.release()
+        else:
+            fcntl.flock(state.handle.fileno(), fcntl.LOCK_UN)
+            state.handle.close()
+        state.handle = None
+
+    @staticmethod
+    def _record(mode, contended, wait_seconds, filename):
+        with WalletLock._stats_guard:
+            stats = WalletLock._stats
+            stats[mode] += 1
+            if contended:
+                stats["contended"] += 1
+                stats["wait_seconds"] += wait_seconds
+                stats["max_wait_seconds"] = max(stats["max_wait_seconds"], wait_seconds)
+        if wait_seconds >= WalletLock.SLOW_WAIT_SECONDS:
+            logging.info(f"Waited {wait_seconds:.2f}s for the {mode} lock of {filename}.")
+
+    @staticmethod
+    @contextmanager
+    def shared(filename):
+        """
+        Overview:
+            Holds the shared lock of a wallet file for the duration of a 'with' block. Used by operations
+            that only read the wallet file.
+
+            Parameters:
+            - filename: The path of the wallet file.
+        """
+        state = WalletLock._state(filename)
+        thread_id = threading.get_ident()
+        start = time.monotonic()
+        contended = False
+        with state.condition:
+            if state.writer == thread_id or thread_id in state.readers:
+                # Reentrant acquisition
+                state.readers[thread_id] = state.readers.get(thread_id, 0) + 1
+            else:
+                while state.writer is not None or state.writers_waiting or state.acquiring:
+                    contended = True
+                    state.condition.wait()
+                if not state.readers:
+                    state.acquiring = True
+                    contended = WalletLock._os_acquire_unlocked(state, exclusive=False) or contended
+                state.readers[thread_id] = 1
+        WalletLock._record("shared", contended, time.monotonic() - start, filename)
+        try:
+            yield
+        finally:
+            with state.condition:
+                state.readers[thread_id] -= 1
+                if not state.readers[thread_id]:
+                    del state.readers[thread_id]
+                if not state.readers and state.writer is None:
+                    WalletLock._os_release(state)
+                state.condition.notify_all()
+
+    @staticmethod
+    @contextmanager
+    def exclusive(filename):
+        """
+        Overview:
+            Holds the exclusive lock of a wallet file for the duration of a 'with' block. Used by operations
+            that modify the wallet file, its journal or its shards. A thread that only holds the shared lock
+            can not take the exclusive lock, since two such threads would deadlock.
+
+            Parameters:
+            - filename: The path of the wallet file.
+        """
+        state = WalletLock._state(filename)
+        thread_id = threading.get_ident()
+        start = time.monotonic()
+        contended = False
+        with state.condition:
+            if state.writer == thread_id:
+                # Reentrant acquisition
+                state.writer_depth += 1
+            else:
+                if thread_id in state.readers:
+                    raise RuntimeError("The shared lock of a wallet can not be upgraded to an exclusive lock.")
+                state.writers_waiting += 1
+                try:
+                    while state.writer is not None or state.readers or state.acquiring:
+                        contended = True
+                        state.condition.wait()
+                    state.acquiring = True
+                finally:
+                    state.writers_waiting -= 1
+                contended = WalletLock._os_acquire_unlocked(state, exclusive=True) or contended
+                state.writer = thread_id
+                state.writer_depth = 1
+        WalletLock._record("exclusive", contended, time.monotonic() - start, filename)
+        try:
+            yield
+        finally:
+            with state.condition:
+                state.writer_depth -= 1
+                if not state.writer_depth:
+                    state.writer = None
+                    if not state.readers:
+                        WalletLock._os_release(state)
+                state.condition.notify_all()
+
+    @staticmethod
+    def contention_stats():
+        """
+        Overview:
+            Returns the lock contention metric of this process: the number of shared and exclusive lock
+            acquisitions, how many of them had to wait for another thread or process, and the total and
+            longest wait in seconds.
+
+            Returns:
+            - dict: The lock statistics, including the share of contended acquisitions.
+        """
+        with WalletLock._stats_guard:
+            stats = dict(WalletLock._stats)
+        acquisitions = stats["shared"] + stats["exclusive"]
+        stats["contention_ratio"] = stats["contended"] / acquisitions if acquisitions else 0.0
+        return stats
@@ -0,0 +1,122 @@
+import os
+import json
+import logging
+from . import wallet_container_util
+from . import wallet_journal_util
+
+class WalletMetadata:
+    """
+    Handles wallet metadata that can be read without loading the wallet entries.
+
+    JSON wallet files start with a small 'wallet_header' object that is parsed
+    from the first bytes of the file. Wallet containers carry the same header
+    in their JSON header. Files written before the header existed fall back to
+    a full parse.
+    """
+    HEADER_KEY = "wallet_header"
+    PREFIX_SIZE = 4096
+    ENCRYPTED_INDICATORS = ["hmac", "hmac_salt", "verification_salt", "verifier", "totp_secret"]
+
+    @staticmethod
+    def from_data(data):
+        """
+        Overview:
+            Builds the metadata of loaded wallet data. Entries held in the wallet journal are counted as well.
+
+            Returns:
+            - dict: The wallet version, wallet type, encryption and 2FA flags, and entry counts.
+        """
+        wallet_data = data["wallet_data"]
+        entry_data = wallet_data.get("entry_data", {})
+        encrypted = any(key in wallet_data for key in WalletMetadata.ENCRYPTED_INDICATORS)
+        # Sharded wallet data, as stored, only holds the entry count of each shard
+        if "shards" in entry_data:
+            entry_data = {section: range(sum(shard["count"] for shard in shards)) for section, shards in entry_data["shards"].items()}
+        return {
+            "version": wallet_data.get("version"),
+            "wallet_type": wallet_data.get("wallet_type"),
+            "encrypted": encrypted,
+            # Encrypted wallets do not disclose whether 2FA is enabled, since the TOTP secret is always encrypted
+            "tfa_enabled": None if encrypted else False,
+            "entries": len(entry_data.get("entries", [])),
+            "imported_entries": len(entry_data.get("imported_entries", []))
+        }
+
+    @staticmethod
+    def with_header(data):
+        """
+        Returns a copy of the wallet data, as it is stored in the wallet file, with an up to date header placed first.
+        """
+        if not isinstance(data, dict) or "wallet_data" not in data:
+            return data
+        header = WalletMetadata.from_data(data)
+        result = {WalletMetadata.HEADER_KEY: header}
+        result.update({key: value for key, value in data.items() if key != WalletMetadata.HEADER_KEY})
+        return result
+
+    @staticmethod
+    def _read_json_header(filename):
+        with open(filename, 'r') as f:
+            prefix = f.read(WalletMetadata.PREFIX_SIZE).lstrip()
+        if not prefix.startswith('{'):
+            return None
+        prefix = prefix[1:].lstrip()
+        key = f'"{WalletMetadata.HEADER_KEY}"'
+        if not prefix.startswith(key):
+            return None
+        prefix = prefix[len(key):].lstrip()
+        if not prefix.startswith(':'):
+            return None
+        try:
+            header, _ = json.JSONDecoder().raw_decode(prefix[1:].lstrip())
+        except json.JSONDecodeError:
+            return None
+        return header if isinstance(header, dict) and "encrypted" in header else None
+
+    @staticmethod
+    def read(filename):
+        """
+        Overview:
+            Reads the metadata of a wallet file without materializing its entries. For JSON wallet files
+            only the header at the start of the file is parsed, and for wallet containers only the container
+            header. Legacy files without a header are fully parsed once. Entries held in the wallet journal
+            are included in the entry counts.
+
+            Parameters:
+            - filename: The path of the wallet file.
+
+            Returns:
+            - dict: The wallet metadata, or None if the file is not a readable wallet file.
+        """
+        try:
+            if not os.path.isfile(filename) or os.path.getsize(filename) == 0:
+                return None
+            if wallet_container_util.WalletContainer.is_container(filename):
+                container_header = wallet_container_util.WalletContainer.read_header(filename)
+                header = container_header["data"].get(WalletMetadata.HEADER_KEY)
+                if not header:
+                    header = WalletMetadata.from_data(container_header["data"])
+                counts = {name: count for name, count, _ in container_header["container"]["sections"]}
+                # The entries of sharded wallets are not stored in the container and keep the header counts
+                if "shards" not in container_header["data"]["wallet_data"]["entry_data"]:
+                    header["entries"] = counts.get("entries", 0)
+                    header["imported_entries"] = counts.get("imported_entries", 0)
+                header["format"] = "binary"
+            else:
+                header = WalletMetadata._read_json_header(filename)
+                if header is None:
+                    with open(filename, 'r') as f:
+                        data = json.load(f)
+                    if not isinstance(data, dict) or "wallet_data" not in data:
+                        return None
+                    header = WalletMetadata.from_data(data)
+                header["format"] = "json"
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.info(f"Unable to read wallet metadata from {filename}: {e}")
+            return None
+
+        # Add the entries that are held in the wallet journal
+        journaled = wallet_journal_util.WalletJournal.record_counts(filename, [header["entries"], header["imported_entries"]])
+        header["entries"] += journaled[0]
+        header["imported_entries"] += journaled[1]
+        return header
@@ -0,0 +1,336 @@
+import os
+import json
+import random
+import hashlib
+import logging
+from collections.abc import Sequence
+
+class ShardedEntries(Sequence):
+    """
+    A lazily loaded list of wallet entries stored across shard files.
+
+    Shard i holds the entries [i * SHARD_SIZE, (i + 1) * SHARD_SIZE), so any
+    entry is located without reading other shards. Shards are read on demand
+    and verified against the digest recorded in the wallet manifest. Only the
+    tail shard is ever rewritten, so it is kept in memory once read, while
+    full shards are immutable and only the most recently read one is cached.
+    New entries are appended to the tail shard, which is written by 'flush'.
+    """
+    # Marks lazily loaded entries
+    is_sharded = True
+
+    def __init__(self, filename, section, shards):
+        self.filename = filename
+        self.section = section
+        self.shards = [dict(shard) for shard in shards]
+        self._tail = None
+        self._cached_shard = None
+        self._cached_entries = None
+        self._dirty = False
+
+    def __len__(self):
+        if not self.shards:
+            return 0
+        return (len(self.shards) - 1) * ShardedWallet.SHARD_SIZE + self.shards[-1]["count"]
+
+    def load_tail(self):
+        """
+        Reads the tail shard, which is the only shard that can change once the wallet data is loaded.
+        """
+        if self._tail is None:
+            tail_number = len(self.shards) - 1
+            self._tail = ShardedWallet._read_shard_file(self.filename, self.section, tail_number, self.shards[tail_number]) if self.shards else []
+        return self._tail
+
+    def _read_shard(self, shard_number):
+        if shard_number == len(self.shards) - 1:
+            return self.load_tail()
+        if shard_number != self._cached_shard:
+            self._cached_entries = ShardedWallet._read_shard_file(self.filename, self.section, shard_number, self.shards[shard_number])
+            self._cached_shard = shard_number
+        return self._cached_entries
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("wallet entry index out of range")
+        shard_number, offset = divmod(index, ShardedWallet.SHARD_SIZE)
+        return self._read_shard(shard_number)[offset]
+
+    def __iter__(self):
+        # Stream the entries shard by shard without caching them
+        for shard_number in range(len(self.shards)):
+            if shard_number == len(self.shards) - 1:
+                entries = self.load_tail()
+            else:
+                entries = ShardedWallet._read_shard_file(self.filename, self.section, shard_number, self.shards[shard_number])
+            for entry in entries:
+                yield entry
+
+    def append(self, entry):
+        if not self.shards or self.shards[-1]["count"] >= ShardedWallet.SHARD_SIZE:
+            # A full tail shard is written before the next one is started
+            self.flush()
+            self.shards.append({"count": 0, "digest": None})
+            self._tail = []
+        else:
+            self.load_tail()
+        self._tail.append(entry)
+        self.shards[-1]["count"] = len(self._tail)
+        self._dirty = True
+
+    def extend(self, entries):
+        for entry in entries:
+            self.append(entry)
+
+    def flush(self):
+        """
+        Writes the modified tail shard and records its digest in the manifest.
+        """
+        if not self._dirty:
+            return
+        self.shards[-1]["digest"] = ShardedWallet._write_shard_file(self.filename, self.section, len(self.shards) - 1, self._tail)
+        self._dirty = False
+
+
+class ShardedWallet:
+    """
+    Handles the sharded wallet layout.
+
+    Wallets that grow beyond FLAT_LIMIT entries are migrated to the sharded
+    layout. The wallet file then holds a manifest with the entry count and
+    SHA-256 digest of every shard instead of the entries themselves, and the
+    wallet HMAC covers the manifest. Shards are stored in '<wallet>.shards/'.
+    Loading, unlocking and adding entries therefore cost the same regardless
+    of the number of entries, while decryption streams the shards.
+
+    Failed password attempts are tracked on the TOTP secret and the key data
+    of sharded wallets, rather than on every entry.
+    """
+    SHARD_SIZE = 256
+    FLAT_LIMIT = 256
+    # Deterministic wallets derive entries with non-hardened BIP32 indices
+    MAX_ENTRIES = 2**31 - 1
+    SECTIONS = ["entries", "imported_entries"]
+    INDEX_BUCKETS = 256
+
+    @staticmethod
+    def shard_directory(filename):
+        return f"{filename}.shards"
+
+    @staticmethod
+    def _shard_path(filename, section, shard_number):
+        return os.path.join(ShardedWallet.shard_directory(filename), f"{section}-{shard_number:06d}.json")
+
+    @staticmethod
+    def _read_shard_file(filename, section, shard_number, shard):
+        with open(ShardedWallet._shard_path(filename, section, shard_number), 'rb') as f:
+            content = f.read()
+        if hashlib.sha256(content).hexdigest() != shard["digest"]:
+            raise ValueError(f"Wallet shard {section}-{shard_number:06d} is corrupted")
+        entries = json.loads(content.decode('utf-8'))
+        if len(entries) != shard["count"]:
+            raise ValueError(f"Wallet shard {section}-{shard_number:06d} is corrupted")
+        return entries
+
+    @staticmethod
+    def _write_shard_file(filename, section, shard_number, entries):
+        os.makedirs(ShardedWallet.shard_directory(filename), exist_ok=True)
+        content = json.dumps(entries).encode('utf-8')
+        path = ShardedWallet._shard_path(filename, section, shard_number)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        return hashlib.sha256(content).hexdigest()
+
+    @staticmethod
+    def is_sharded(data):
+        """
+        Returns True if the wallet data uses the sharded layout, either loaded or as stored.
+        """
+        entry_data = data["wallet_data"].get("entry_data", {})
+        return "shards" in entry_data or ShardedWallet.is_lazy(entry_data.get("entries"))
+
+    @staticmethod
+    def is_lazy(value):
+        """
+        Returns True if the value is a lazily loaded list of sharded entries.
+        """
+        return getattr(value, "is_sharded", False) is True
+
+    @staticmethod
+    def attach(filename, data):
+        """
+        Overview:
+            Replaces the shard manifest of loaded wallet data with lazily loaded entry lists, so that the
+            rest of the wallet client can access entries as usual. Only the tail shard of each section is
+            read, so that the loaded data stays consistent with the manifest after the wallet lock is
+            released.
+        """
+        if not data or "wallet_data" not in data or "shards" not in data["wallet_data"]["entry_data"]:
+            return data
+        entry_data = data["wallet_data"]["entry_data"]
+        manifest = entry_data.pop("shards")
+        for section in ShardedWallet.SECTIONS:
+            entry_data[section] = ShardedEntries(filename, section, manifest.get(section, []))
+            entry_data[section].load_tail()
+        return data
+
+    @staticmethod
+    def manifest(data):
+        entry_data = data["wallet_data"]["entry_data"]
+        return {section: [dict(shard) for shard in entry_data[section].shards] for section in ShardedWallet.SECTIONS}
+
+    @staticmethod
+    def json_default(value):
+        """
+        JSON serializer fallback that represents lazily loaded entries by their manifest.
+        """
+        if ShardedWallet.is_lazy(value):
+            return value.shards
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+    @staticmethod
+    def stored_form(data):
+        """
+        Returns a copy of sharded wallet data as it is stored in the wallet file: with the shard manifest in
+        place of the entries, and without address index items, which are stored in index buckets.
+        """
+        if not isinstance(data, dict) or "wallet_data" not in data or not ShardedWallet.is_lazy(data["wallet_data"]["entry_data"].get("entries")):
+            return data
+        stored = dict(data)
+        stored["wallet_data"] = {key: value for key, value in data["wallet_data"].items() if key != "address_index"}
+        stored["wallet_data"]["entry_data"] = {key: value for key, value in data["wallet_data"]["entry_data"].items() if key not in ShardedWallet.SECTIONS}
+        stored["wallet_data"]["entry_data"]["shards"] = ShardedWallet.manifest(data)
+        return stored
+
+    @staticmethod
+    def hmac_message(data, deterministic):
+        """
+        Returns the HMAC message of a sharded wallet, which covers the shard manifest and the key data.
+        """
+        hmac_msg = json.dumps(ShardedWallet.manifest(data)).encode()
+        if deterministic:
+            hmac_msg += json.dumps(data["wallet_data"]["entry_data"]["key_data"]).encode()
+        return hmac_msg
+
+    @staticmethod
+    def migrate(filename, data):
+        """
+        Overview:
+            Moves the entries of a flat wallet into shard files. The wallet file itself is written by the
+            caller once the HMAC has been recomputed over the new manifest. A leftover shard directory,
+            e.g. of an overwritten wallet, is removed first.
+        """
+        ShardedWallet.wipe(filename)
+        entry_data = data["wallet_data"]["entry_data"]
+        for section in ShardedWallet.SECTIONS:
+            entries = ShardedEntries(filename, section, [])
+            entries.extend(entry_data.get(section, []))
+            entry_data[section] = entries
+        data.pop("journal_state", None)
+        return data
+
+    @staticmethod
+    def flush(filename, data):
+        """
+        Overview:
+            Writes the modified shards and address index items of sharded wallet data. Entries are
+            appended one shard at a time, so a flush rewrites at most one shard per section.
+        """
+        entry_data = data["wallet_data"]["entry_data"]
+        for section in ShardedWallet.SECTIONS:
+            entry_data[section].flush()
+        ShardedWallet._flush_address_index(filename, data)
+
+    @staticmethod
+    def _index_path(filename, bucket):
+        return os.path.join(ShardedWallet.shard_directory(filename), f"index-{bucket:02x}.json")
+
+    @staticmethod
+    def _flush_address_index(filename, data):
+        address_index = data["wallet_data"].get("address_index")
+        if not address_index:
+            return
+        buckets = {}
+        for address_tag, location in address_index.items():
+            buckets.setdefault(int(address_tag[:2], 16) % ShardedWallet.INDEX_BUCKETS, {})[address_tag] = location
+        os.makedirs(ShardedWallet.shard_directory(filename), exist_ok=True)
+        for bucket, items in buckets.items():
+            path = ShardedWallet._index_path(filename, bucket)
+            stored = {}
+            if os.path.exists(path):
+                with open(path, 'r') as f:
+                    stored = json.load(f)
+            stored.update(items)
+            with open(f"{path}.tmp", 'w') as f:
+                json.dump(stored, f)
+            os.replace(f"{path}.tmp", path)
+        data["wallet_data"]["address_index"] = {}
+
+    @staticmethod
+    def lookup_address_tag(filename, address_tag):
+        """
+        Looks up an address index tag in the index bucket it belongs to.
+        """
+        path = ShardedWallet._index_path(filename, int(address_tag[:2], 16) % ShardedWallet.INDEX_BUCKETS)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return json.load(f).get(address_tag)
+
+    @staticmethod
+    def clear_address_index(filename):
+        """
+        Removes the stored address index buckets of a sharded wallet.
+        """
+        directory = ShardedWallet.shard_directory(filename)
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if name.startswith("index-"):
+                    os.remove(os.path.join(directory, name))
+
+    @staticmethod
+    def copy(filename, destination):
+        """
+        Copies the shard directory of a wallet next to a copy of the wallet file.
+        """
+        directory = ShardedWallet.shard_directory(filename)
+        if os.path.isdir(directory):
+            destination_directory = ShardedWallet.shard_directory(destination)
+            os.makedirs(destination_directory, exist_ok=True)
+            for name in os.listdir(directory):
+                if not name.endswith(".tmp"):
+                    with open(os.path.join(directory, name), 'rb') as f_in, open(os.path.join(destination_directory, name), 'wb') as f_out:
+                        f_out.write(f_in.read())
+
+    @staticmethod
+    def wipe(filename):
+        """
+        Overwrites every shard file of a wallet with random data and removes the shard directory.
+        """
+        directory = ShardedWallet.shard_directory(filename)
+        if not os.path.isdir(directory):
+            return
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            try:
+                file_size = os.path.getsize(path)
+                if file_size > 0:
+                    with open(path, "r+b") as file:
+                        file.write(bytearray(random.getrandbits(8) for _ in range(file_size)))
+                        file.flush()
+                        os.fsync(file.fileno())
+                os.remove(path)
+            except OSError as e:
+                logging.error(f"Unable to wipe wallet shard {name}: {e}")
+        try:
+            os.rmdir(directory)
+        except OSError as e:
+            logging.error(f"Unable to remove wallet shard directory: {e}")
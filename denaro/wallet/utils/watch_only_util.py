@@ -0,0 +1,79 @@
+import os
+import json
+import time
+import logging
+
+class WatchOnlyWallet:
+    """
+    Handles watch-only wallet files.
+
+    A watch-only wallet holds the id, address and label of every entry of a
+    wallet, and nothing else. It has the layout of an unencrypted wallet with
+    the 'watch_only' wallet type, so balances can be checked without a
+    password and without any key derivation, while no private key, mnemonic
+    or other secret is ever written to it. Labels can be edited in the file
+    and are kept when the watch-only wallet is exported again.
+    """
+    WALLET_TYPE = "watch_only"
+    VERSION = "0.2.3"
+    SECTIONS = ["entries", "imported_entries"]
+
+    @staticmethod
+    def is_watch_only(data):
+        """
+        Returns True if the loaded wallet data is a watch-only wallet.
+        """
+        return isinstance(data, dict) and data.get("wallet_data", {}).get("wallet_type") == WatchOnlyWallet.WALLET_TYPE
+
+    @staticmethod
+    def default_path(filename):
+        """
+        Returns the default path of the watch-only wallet of a wallet file.
+        """
+        return f"{os.path.splitext(filename)[0]}_watchonly.json"
+
+    @staticmethod
+    def read_labels(filename):
+        """
+        Returns the labels of an existing watch-only wallet, keyed by address.
+        """
+        if not os.path.exists(filename):
+            return {}
+        try:
+            with open(filename, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.info(f"Unable to read the labels of {filename}: {e}")
+            return {}
+        if not WatchOnlyWallet.is_watch_only(data):
+            return {}
+        entry_data = data["wallet_data"].get("entry_data", {})
+        return {entry["address"]: entry["label"] for section in WatchOnlyWallet.SECTIONS for entry in entry_data.get(section, []) if entry.get("label")}
+
+    @staticmethod
+    def build(source, addresses, labels=None):
+        """
+        Overview:
+            Builds the data of a watch-only wallet.
+
+            Parameters:
+            - source: The path of the wallet file the watch-only wallet is exported from.
+            - addresses (dict): Maps 'entries' and 'imported_entries' to lists of [id, address] pairs.
+            - labels (dict, optional): Labels keyed by address.
+
+            Returns:
+            - dict: The watch-only wallet data.
+        """
+        labels = labels or {}
+        entry_data = {}
+        for section in WatchOnlyWallet.SECTIONS:
+            entry_data[section] = [{"id": entry_id, "address": address, "label": labels.get(address, "")} for entry_id, address in addresses.get(section, [])]
+        return {
+            "wallet_data": {
+                "wallet_type": WatchOnlyWallet.WALLET_TYPE,
+                "version": WatchOnlyWallet.VERSION,
+                "source": os.path.basename(source),
+                "exported": int(time.time()),
+                "entry_data": entry_data
+            }
+        }
@@ -21,6 +21,7 @@ import webbrowser
 from datetime import datetime
 import logging
 import threading
+import queue
 
 # Get the absolute path of the directory containing the current script.
 dir_path = os.path.dirname(os.path.realpath(__file__))
@@ -33,10 +34,12 @@ sys.path.insert(0, dir_path + "/denaro/wallet/utils")
 import wallet_client
 from denaro.wallet.utils.wallet_generation_util import sha256, generate_bip39_mnemonic_pattern
 from denaro.wallet.utils.thread_manager import WalletThreadManager
+from denaro.wallet.utils.history_store_util import HistoryStore, HistoryPager
 from denaro.wallet.utils.tkinter_utils.custom_auto_complete_combobox import AutocompleteCombobox
 from denaro.wallet.utils.tkinter_utils.custom_dialog import CustomDialog
 from denaro.wallet.utils.tkinter_utils.dialogs import Dialogs
 from denaro.wallet.utils.tkinter_utils.custom_popup import CustomPopup
+from denaro.wallet.utils.tkinter_utils.virtual_treeview import VirtualTreeview
 from denaro.wallet.utils.tkinter_utils.mutually_exclusive_checkbox import MutuallyExclusiveCheckbox
 import denaro.wallet.utils.tkinter_utils.universal_language_translator as universal_language_translator
 
@@ -146,7 +149,9 @@ class AccountPage(BasePage):
         else:
             self.columns = ("Address", "Balance", "Pending", "Value")
             
-        self.accounts_tree = ttk.Treeview(self.accounts_frame, columns=self.columns, show='headings', selectmode='browse')
+        # Only the visible rows are materialized, so wallets with many entries scroll and load smoothly
+        self.accounts_model = AccountModel(self.columns)
+        self.accounts_tree = VirtualTreeview(self.accounts_frame, model=self.accounts_model, columns=self.columns, show='headings', selectmode='browse')
         self.accounts_tree_scrollbar = ttk.Scrollbar(self.accounts_frame, orient="vertical", command=self.accounts_tree.yview)
         self.accounts_tree.configure(yscrollcommand=self.accounts_tree_scrollbar.set)
         
@@ -167,6 +172,7 @@ class AccountPage(BasePage):
         # Configure the striped row tags
         self.accounts_tree.tag_configure('oddrow', background='white')  # Light gray color for odd rows
         self.accounts_tree.tag_configure('evenrow', background='#cee0e7')  # A slightly different shade for even row 
+        self.accounts_tree.tag_configure('stale', foreground='gray')  # Last known balances that are not yet revalidated
         
         if self.root.disable_exchange_rate_features:
             heading_names = ["Balance", "Pending"]
@@ -181,6 +187,19 @@ class AccountPage(BasePage):
         self.refresh_balance_button.config(command=lambda: self.root.gui_utils.refresh_balance())
 
 
+    def resize_columns(self):
+        # The tree tracks the widest value of every column, so no rows are measured here
+        for col in self.columns:
+            column_width = self.accounts_tree.column_widths.get(col, 0)
+            if col == "Address":
+                column_width += 30
+            else:
+                column_width += 150
+            column_width = max(column_width, self.column_min_widths.get(col, 0))
+            if self.accounts_tree.column(col, 'width') != column_width:
+                self.accounts_tree.column(col, width=column_width, stretch=tk.YES)
+
+
 class SendPage(BasePage):
     def __init__(self, parent, root):
         super().__init__(parent, root)
@@ -441,6 +460,10 @@ class SettingsPage(BasePage):
         self.disable_node_validation_checkbox.grid(row=3, column=0, sticky='w', padx=5, pady=10)
         self.test_connection_button.grid(row=3, column=2, sticky='e', padx=5, pady=10)
         self.node_validation_msg_label.grid(row=3, column=0, sticky='w', padx=5, pady=(75,0))
+        # Backup nodes and the health of the node pool
+        self.backup_nodes_label.grid(row=4, column=0, columnspan=3, sticky='w', padx=5, pady=(10, 0))
+        self.backup_nodes_entry.grid(row=5, column=0, columnspan=3, sticky='ew', padx=5)
+        self.node_pool_stats_label.grid(row=6, column=0, columnspan=3, sticky='w', padx=5, pady=(10, 0))
         
         # Ensure the denaro_node_frame columns do not affect the overall layout
         self.denaro_node_frame.columnconfigure(0, weight=1)
@@ -534,6 +557,14 @@ class SettingsPage(BasePage):
         self.test_connection_button.config(command=lambda: self.test_node_connection())
         self.node_validation_msg_label = tb.Label(self.denaro_node_frame, text="")
 
+        self.backup_nodes_label = tb.Label(self.denaro_node_frame, text="Backup Nodes (comma separated)")
+        self.backup_nodes_entry = tb.Entry(self.denaro_node_frame, width=60)
+        self.backup_nodes_entry_text = tb.StringVar()
+        self.backup_nodes_entry_text.trace_add("write", self.on_node_field_change)
+        self.backup_nodes_entry["textvariable"] = self.backup_nodes_entry_text
+        self.node_pool_stats_label = tb.Label(self.denaro_node_frame, text="", justify='left')
+        self.after(2000, self.update_node_pool_stats)
+
         
         # --- Language Translation Settings LabelFrame ---
         self.language_translation_frame = tb.LabelFrame(self, text="Language Translation Settings")
@@ -866,6 +897,44 @@ class SettingsPage(BasePage):
         return node_str, string_valid, node_validation_enabled
                 
 
+    def get_backup_nodes(self):
+        # The valid node addresses of the backup nodes field
+        backup_nodes = []
+        for backup_node in self.backup_nodes_entry.get().split(','):
+            if backup_node.strip():
+                is_node_valid, backup_node, _, _ = wallet_client.Verification.validate_node_address([backup_node.strip(), False], from_gui=True, referer="get_backup_nodes")
+                if is_node_valid:
+                    backup_nodes.append(backup_node)
+        return backup_nodes
+
+
+    def configure_node_pool(self):
+        node, _ , _ = self.validate_node_fields()
+        wallet_client.NodePool.configure([node] + self.get_backup_nodes())
+
+
+    def select_node(self):
+        # Requests go to the fastest healthy node of the node pool, unless the node fields were changed since it was configured
+        node, _ , _ = self.validate_node_fields()
+        if node.rstrip('/') in wallet_client.NodePool.nodes():
+            return wallet_client.NodePool.select(node)
+        return node
+
+
+    def update_node_pool_stats(self):
+        lines = []
+        for node, stats in wallet_client.NodePool.stats():
+            status = "Unknown" if stats['healthy'] is None else "Healthy" if stats['healthy'] else "Unhealthy"
+            latency = f"{stats['latency'] * 1000:.0f} ms" if stats['latency'] is not None else "-"
+            height = stats['height'] if stats['height'] is not None else "-"
+            version = (wallet_client.NodeCapabilities.cached(node) or {}).get('version') or "-"
+            lines.append(f"{node}: {status} | Version: {version} | Latency: {latency} | Block: {height} | Requests: {stats['requests']} | Failed: {stats['failures']} | Hedged: {stats['hedged']}")
+        text = "\n".join(lines)
+        if self.node_pool_stats_label['text'] != text:
+            self.node_pool_stats_label.config(text=text)
+        self.after(2000, self.update_node_pool_stats)
+
+
     def test_node_connection(self):
          self.test_connection_button.config(state='disabled')
          
@@ -923,6 +992,7 @@ class SettingsPage(BasePage):
         node_changed = (node != current_config.get('default_node', ''))
         node_validation = not self.disable_node_validation_var.get()
         node_validation_changed = (str(node_validation) != current_config.get('node_validation', ''))
+        backup_nodes_changed = (", ".join(self.get_backup_nodes()) != current_config.get('backup_nodes', ''))
         
         # Check translation module changes
         current_translation_module = current_config.get('translation_module')
@@ -945,16 +1015,150 @@ class SettingsPage(BasePage):
         # --- UPDATED: Final check for enabling save button ---
         if self.root.disable_exchange_rate_features:
             # Check for changes and ensure language is valid
-            settings_changed = self.language_valid and (node_changed or node_validation_changed or language_changed or translation_module_changed) and not self.keep_save_button_disabled
+            settings_changed = self.language_valid and (node_changed or node_validation_changed or backup_nodes_changed or language_changed or translation_module_changed) and not self.keep_save_button_disabled
         else:
             # Check for changes and ensure BOTH currency and language are valid
             settings_changed = (self.currency_code_valid and self.language_valid) and \
-                               (currency_code_changed or node_changed or node_validation_changed or language_changed or translation_module_changed) and \
+                               (currency_code_changed or node_changed or node_validation_changed or backup_nodes_changed or language_changed or translation_module_changed) and \
                                not self.keep_save_button_disabled
         # --------------------------------------------------------
         return settings_changed
     
 
+class HistoryPage(BasePage):
+    def __init__(self, parent, root):
+        super().__init__(parent, root)
+        self.pager = None
+        self.next_page = 0
+        self.loading = False
+        self.complete = False
+
+        self.create_widgets()  # Create and place widgets
+        self.configure_layout() # Configure the grid layout of the HistoryPage
+        # Dynamically identify selectable widgets
+        self.root.selectable_widgets.extend(self.root.gui_utils.identify_selectable_widgets(self))
+
+
+    def configure_layout(self):
+        # Grid and column layout for page
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        # Address selection
+        self.controls_frame.grid(row=0, column=0, sticky='ew')
+        self.address_label.grid(row=0, column=0, sticky='w', padx=10, pady=5)
+        self.address_combobox.grid(row=0, column=1, sticky='w', padx=5, pady=5)
+        self.refresh_history_button.grid(row=0, column=2, sticky='w', padx=5, pady=5)
+        self.history_status_text.grid(row=0, column=3, sticky='w', padx=5, pady=5)
+
+        # History frame
+        self.history_frame.grid_columnconfigure(0, weight=1)
+        self.history_frame.grid_rowconfigure(0, weight=1)
+        self.history_frame.grid(row=1, column=0, sticky='nsew')
+
+        # TreeView and scrollbar
+        self.history_tree.grid(row=0, column=0, sticky='nsew')
+        self.history_tree_scrollbar.grid(row=0, column=1, sticky='ns')
+
+
+    def create_widgets(self):
+        # Address selection
+        self.controls_frame = tb.Frame(self)
+        self.address_label = tb.Label(self.controls_frame, text="Address:")
+        self.address_combobox = ttk.Combobox(self.controls_frame, width=50, state='readonly', postcommand=self.update_addresses)
+        self.address_combobox.bind('<<ComboboxSelected>>', lambda event: self.load_history())
+        self.refresh_history_button = tb.Button(self.controls_frame, text="Refresh History")
+        self.refresh_history_button.config(command=lambda: self.load_history())
+        self.history_status_text = tb.Label(self.controls_frame, text="")
+
+        # History frame
+        self.history_frame = tb.Frame(self)
+
+        # Transactions are loaded a page at a time as the end of the list is approached, and only the visible
+        # rows are materialized, so long histories scroll smoothly
+        self.columns = ("Transaction", "Amount", "Type")
+        self.history_model = HistoryModel(self.columns)
+        self.history_tree = VirtualTreeview(self.history_frame, model=self.history_model, columns=self.columns, show='headings', selectmode='browse')
+        self.history_tree_scrollbar = ttk.Scrollbar(self.history_frame, orient="vertical", command=self.history_tree.yview)
+        self.history_tree.configure(yscrollcommand=self.history_tree_scrollbar.set)
+        self.history_tree.bind('<<VirtualTreeviewNearEnd>>', lambda event: self.load_next_page())
+
+        treeview_font = font.nametofont("TkDefaultFont")
+        for col in self.columns:
+            self.history_tree.heading(col, text=col)
+            self.history_tree.column(col, minwidth=treeview_font.measure(col) + 40, stretch=tk.YES)
+        self.history_tree.column("Transaction", width=treeview_font.measure("0" * 64) + 30)
+
+        # Configure the striped row tags
+        self.history_tree.tag_configure('oddrow', background='white')
+        self.history_tree.tag_configure('evenrow', background='#cee0e7')
+
+
+    def update_addresses(self):
+        self.address_combobox['values'] = list(self.root.stored_data.wallet_addresses)
+
+
+    def load_history(self):
+        address = self.address_combobox.get()
+        history_store = self.root.stored_data.history_store
+        if not address or history_store is None:
+            self.history_status_text.config(text="Select an address of the loaded wallet.")
+            return
+        if self.pager:
+            self.pager.close()
+        node, _ , _ = self.root.settings_page.validate_node_fields()
+        self.pager = HistoryPager(history_store, node, address, timeout=wallet_client.BALANCE_REQUEST_TIMEOUT)
+        self.next_page = 0
+        self.loading = False
+        self.complete = False
+        self.history_model.clear()
+        self.history_tree.reset()
+        self.load_next_page()
+
+
+    def load_next_page(self):
+        if self.pager is None or self.loading or self.complete:
+            return
+        self.loading = True
+        self.history_status_text.config(text="Loading transactions...")
+        self.root.wallet_thread_manager.start_thread("load_history", self.get_history_page, args=(self.pager, self.next_page))
+
+
+    def get_history_page(self, stop_signal, pager, number):
+        transactions = pager.page(number)
+        if not stop_signal.is_set():
+            self.root.wallet_thread_manager.request_queue.put(lambda: self.show_history_page(pager, number, transactions))
+
+
+    def show_history_page(self, pager, number, transactions):
+        # Pages of a previously selected address are dropped
+        if pager is not self.pager:
+            return
+        self.loading = False
+        if transactions is None:
+            self.history_status_text.config(text="Unable to load the transaction history.")
+            return
+        start = self.history_model.add_transactions(pager.address, transactions)
+        self.next_page = number + 1
+        self.complete = len(transactions) < HistoryStore.PAGE_SIZE
+        self.history_tree.rows_inserted(start)
+        self.history_status_text.config(text=f"{len(self.history_model)} transactions{'' if self.complete else ' loaded'}")
+
+
+    def clear(self):
+        if self.pager:
+            self.pager.close()
+        self.pager = None
+        self.next_page = 0
+        self.loading = False
+        self.complete = False
+        self.history_model.clear()
+        self.history_tree.reset()
+        self.address_combobox.set('')
+        self.address_combobox['values'] = []
+        self.history_status_text.config(text="")
+
+
 class BlankPage(BasePage):
     def __init__(self, parent, root):
         super().__init__(parent, root)
@@ -1004,6 +1208,7 @@ class DenaroWalletGUI(tk.Tk):
 
         self.account_page = self.pages.get("Account")
         self.send_page = self.pages.get("Send")
+        self.history_page = self.pages.get("History")
         self.settings_page = self.pages.get("Settings")
         self.event_handler = EventHandler(self)
         self.callbacks = Callbacks(self)
@@ -1012,6 +1217,8 @@ class DenaroWalletGUI(tk.Tk):
         self.translation_engine.log.info("Event handler registered with translation engine.")
 
         self.config_handler.update_config_values()
+        # Keep the health of the node pool up to date for node selection and the settings page
+        self.wallet_thread_manager.start_thread("node_health", wallet_client.NodePool.watch)
         
     def _add_menu_item(self, parent_menu, item_type, key, **kwargs):
         # ... implementation from previous step ...
@@ -1154,6 +1361,7 @@ class DenaroWalletGUI(tk.Tk):
         
         self.pages["Account"] = AccountPage(self.page_container, self)
         self.pages["Send"] = SendPage(self.page_container, self)
+        self.pages["History"] = HistoryPage(self.page_container, self)
         self.pages["Settings"] = SettingsPage(self.page_container, self)
         
         for page in self.pages.values():
@@ -1209,6 +1417,7 @@ class DenaroWalletGUI(tk.Tk):
             page_class_map = {
                 "Account": AccountPage,
                 "Send": SendPage,
+                "History": HistoryPage,
                 "Settings": SettingsPage
             }
             page_class = page_class_map.get(page_name, BlankPage)
@@ -1301,6 +1510,10 @@ class ConfigHandler:
                     self.root.settings_page.denaro_node_port_entry.insert(0, node_port)
             
                 self.root.settings_page.denaro_node_address_entry.insert(0, default_node)
+
+            self.root.settings_page.backup_nodes_entry.delete(0, 'end')
+            self.root.settings_page.backup_nodes_entry.insert(0, self.config_values.get('backup_nodes', ''))
+            self.root.settings_page.configure_node_pool()
                 
             if 'node_validation' in self.config_values:
                 self.root.stored_data.node_validation = self.config_values.get('node_validation')
@@ -1407,6 +1620,8 @@ class ConfigHandler:
             self.config_values['node_validation'] = str(not node_validation_enabled)
             self.root.stored_data.node_valid = False
             self.root.stored_data.node_validation_performed = False
+
+        self.config_values['backup_nodes'] = ", ".join(self.root.settings_page.get_backup_nodes())
     
         if not self.root.disable_exchange_rate_features:
             if self.config_values.get('default_currency') != self.root.stored_data.currency_code:
@@ -1709,7 +1924,8 @@ class EventHandler:
             'send': "Sending Transaction",
             'wallet_annihilation': "Wallet Annihilation in progress.",
             'create_wallet': "Creating new wallet.",
-            'generate_address': "Generating address."
+            'generate_address': "Generating address.",
+            'address_info': "Decrypting wallet entry."
         }
         status = operation_mode_status.get(self.root.stored_data.operation_mode)
         if status:
@@ -2022,7 +2238,11 @@ class GUIUtils:
                 self.show_address_qr_code(address)
             elif action == 'address_info':
                 entry_data, entry_type = self.root.wallet_operations.get_entry_data(address)
-                self.root.dialogs.address_info(address=address, entry_data=entry_data, entry_type=entry_type)
+                if "private_key" in entry_data:
+                    self.root.dialogs.address_info(address=address, entry_data=entry_data, entry_type=entry_type)
+                else:
+                    # Entries listed from the address list of an encrypted wallet are decrypted on demand
+                    self.root.wallet_operations.unlock_entry(address)
 
     def show_address_qr_code(self, address):
         """
@@ -2145,8 +2365,8 @@ class GUIUtils:
                 menu.add_cascade(label=item, menu=folder_menu)
                 # Recursively populate the folder menu with its contents
                 self.populate_wallet_menu(full_path, folder_menu)
-            else:
-                # For files, add a command to the current menu
+            elif wallet_client.WalletMetadata.read(full_path) is not None:
+                # For wallet files, add a command to the current menu
                 menu.add_command(label=item, command=lambda file=full_path: self.root.wallet_operations.load_wallet(file))  
     
 
@@ -2172,13 +2392,8 @@ class GUIUtils:
         self.root.account_page.refresh_balance_button.focus_set()
         self.root.account_page.refresh_balance_button.config(state='disabled')
 
-        for item in self.root.account_page.accounts_tree.get_children():
-            # Retrieve the current row's data
-            row_data = self.root.account_page.accounts_tree.item(item, 'values')
-            # Update the row data except the column to preserve
-            new_row_data = [row_data[self.root.account_page.columns.index("Address")] if col == "Address" else "" for col in self.root.account_page.columns]
-            # Set the item's new data
-            self.root.account_page.accounts_tree.item(item, values=new_row_data)
+        # The current balances stay visible while they are revalidated, and balances that did not change since
+        # the last block are served from the balance cache
         self.root.stored_data.balance_data = []
         self.root.stored_data.balance_loaded = None
         self.root.wallet_operations.load_balance()
@@ -2192,7 +2407,7 @@ class GUIUtils:
 
     def sort_treeview_column(self, tree, col):
         """
-        Sorts TreeView column by integer values, removing " DNR" from "Balance" and "Pending" columns before sorting.
+        Sorts the TreeView by the numeric values of the "Balance", "Pending" or "Value" column.
         """
         current_heading = tree.heading(col)['text']
         # Remove existing sort order indicator if present
@@ -2218,42 +2433,9 @@ class GUIUtils:
     
         reverse = self.root.account_page.column_sort_order[col] = not self.root.account_page.column_sort_order[col]
     
-        l = []
-        for k in tree.get_children(''):
-            value = tree.set(k, col)
-            # Remove formatting specific to each column
-            if col in ["Balance", "Pending"]:
-                # Since every value ends with " DNR", remove it to parse the numeric value
-                numeric_part = value.replace(" DNR", "")
-                try:
-                    # Convert the numeric part to an integer
-                    numeric_value = float(numeric_part)
-                except ValueError:
-                    # If conversion fails, print an error and skip this value
-                    continue
-            
-            if not self.root.disable_exchange_rate_features:
-                if col == "Value":
-                    try:
-                        # Remove the "$" and commas, then convert to float for "Value"
-                        numeric_value = float(value.replace(self.root.stored_data.currency_symbol, "").replace(",", ""))
-                    except ValueError:
-                        continue
-            
-            # Append the numeric value along with the item's ID for sorting
-            l.append((numeric_value, k))
-        
-        # Sort the list by numeric values
-        l.sort(key=lambda t: t[0], reverse=reverse)
-    
-        # Reorder items in the TreeView based on the sorted list
-        for index, (val, k) in enumerate(l):
-            if index % 2 == 0:
-                column_tag = 'evenrow'
-            else:
-                column_tag = 'oddrow'
-            tree.item(k, tags=column_tag)
-            tree.move(k, '', index)
+        # Sort the typed rows of the model; rows without a value are kept after the sorted rows
+        tree.model.sort(col, reverse=reverse)
+        tree.refresh()
         
         # Update headings with sort order indicator
         sort_order_char = " ↾" if reverse else " ⇂"
@@ -2290,7 +2472,7 @@ class GUIUtils:
             self.root.status_bar_label.config(text=text)
 
 
-    def update_dnr_price(self, timer_value):
+    def update_dnr_price(self, timer_value, price_refreshed=False):
 
         # Find the position where the countdown timer starts.
         base_text_end_pos = self.root.account_page.denaro_price_text["text"].rfind(' (Updating in: ')  # Find the last occurrence of the countdown start
@@ -2308,6 +2490,9 @@ class GUIUtils:
         self.root.account_page.denaro_price_text.config(text=f'{base_text}{update_price_str}')
     
         if timer_value == 30:
+            # Expired exchange rates are fetched in the background, and the label is updated again once they arrive
+            self.root.wallet_operations.refresh_dnr_price()
+        if timer_value == 30 or price_refreshed:
             formatted_price_str = self.root.wallet_operations.get_dnr_price()
             self.root.account_page.denaro_price_text.config(text=f'DNR/{self.root.stored_data.currency_code} Price: {self.root.stored_data.currency_symbol}{formatted_price_str}{update_price_str}')
     
@@ -2470,6 +2655,9 @@ class GUIUtils:
 
 
 class WalletOperations:
+    # The largest number of loaded entries added to the accounts treeview per GUI tick
+    LOAD_BATCH_SIZE = 1000
+
     def __init__(self, root):
         self.root = root
         self.callbacks = Callbacks(self.root)
@@ -2489,8 +2677,12 @@ class WalletOperations:
             self.root.tk.call('set', '::tk::dialog::file::showHiddenVar', '0')
         except:
             pass
-        file_path = file_path if file_path else filedialog.askopenfilename(filetypes=[("JSON files", "*.json")])
+        file_path = file_path if file_path else filedialog.askopenfilename(filetypes=[("Wallet files", "*.json *.dnrw"), ("JSON files", "*.json"), ("Wallet containers", "*.dnrw")])
         if file_path:
+            # Check that the file is a wallet file before loading it
+            if wallet_client.WalletMetadata.read(file_path) is None:
+                messagebox.showerror("Error", "The selected file is not a valid wallet file.")
+                return
             if self.root.stored_data.operation_mode != 'send':
                 if self.root.stored_data.operation_mode != 'wallet_annihilation':
                     self.root.wallet_thread_manager.stop_thread("load_balance")
@@ -2509,7 +2701,10 @@ class WalletOperations:
         result = wallet_client.decryptWalletEntries(file_path, password="", from_gui=True, callback_object=self.callbacks, stop_signal=stop_signal)
         #print("decryptWalletEntries result: ",result)
         if result:
-            time.sleep(1)
+            # Wait until the GUI thread has added every loaded entry to the accounts treeview
+            loaded_entries = self.root.stored_data.loaded_entries
+            while loaded_entries.unfinished_tasks and not stop_signal.is_set():
+                time.sleep(0.05)
             self.root.stored_data.wallet_file = file_path
             if not self.root.stored_data.wallet_loaded:
                 self.root.stored_data.wallet_loaded = result
@@ -2525,43 +2720,50 @@ class WalletOperations:
     
 
     def update_wallet_data(self):
-        # Check if the wallet data has been updated
-        if getattr(self.root.stored_data, 'wallet_data_updated', False) and self.root.stored_data.wallet_data:            
-            # Get temp address value
-            temporary_address = self.root.stored_data.temporary_address
-            self.root.stored_data.wallet_addresses.extend([temporary_address])
-            # Reset temp address value
-            self.root.stored_data.temporary_address = None
+        # Drain the addresses queued by the wallet loader, up to one batch per tick
+        loaded_entries = self.root.stored_data.loaded_entries
+        addresses = []
+        while len(addresses) < self.LOAD_BATCH_SIZE:
+            try:
+                addresses.append(loaded_entries.get_nowait())
+            except queue.Empty:
+                break
+
+        if addresses:
+            self.root.stored_data.wallet_addresses.extend(addresses)
             
             # Update send from combobox
-            self.root.send_page.send_from_combobox['values'] = (*self.root.send_page.send_from_combobox['values'], temporary_address)
+            self.root.send_page.send_from_combobox['values'] = (*self.root.send_page.send_from_combobox['values'], *addresses)
             
-            # Define extra space for certain columns
-            extra_space = 30   
-            
-            # Calculate the width for each column based on content
-            for col_index, col in enumerate(self.root.account_page.columns):
-                column_width = max([self.root.account_page.treeview_font.measure(str(row[col_index])) for row in self.root.stored_data.formatted_data], default=0)
-                if col == "Address":
-                    column_width += extra_space
-                else:
-                    column_width += 150                
-                column_width = max(column_width, self.root.account_page.column_min_widths.get(col, 0))
-                self.root.account_page.accounts_tree.column(col, width=column_width, stretch=tk.YES)
+            # Add the rows of the batch and widen the columns to the new rows
+            start = self.root.account_page.accounts_model.add_addresses(addresses)
+            self.show_balance_snapshot(addresses)
+            self.root.account_page.accounts_tree.rows_inserted(start)
+            self.root.account_page.resize_columns()
 
-            if len(self.root.stored_data.formatted_data) % 2 == 0:
-                column_tag = 'evenrow'
-            else:
-                column_tag = 'oddrow'
-            
-            self.root.account_page.accounts_tree.insert('', tk.END, values=(temporary_address),tags=(column_tag,))
-            
-            # Reset flag
-            self.root.stored_data.wallet_data_updated = False
+            # Advance the progress bar by the number of loaded entries
+            if 'load_wallet' in self.root.wallet_thread_manager.threads:
+                self.root.progress_bar['value'] += 100 * len(addresses)
+
+            for _ in addresses:
+                loaded_entries.task_done()
 
         self.root.after(100, self.update_wallet_data)
 
 
+    def show_balance_snapshot(self, addresses):
+        # Fill in the last known balances of new rows, marked stale until the balance check reaches them
+        snapshot = self.root.stored_data.balance_snapshot
+        if not snapshot:
+            return
+        balances = snapshot.get("balances", {})
+        accounts_model = self.root.account_page.accounts_model
+        for address in addresses:
+            if address in balances:
+                amount, pending_balance = balances[address]
+                accounts_model.set_balance(address, amount, pending_balance, stale=True)
+
+
     #Load Balance Methods
     def load_balance(self):
         self.root.account_page.refresh_balance_button.config(state='disabled')
@@ -2586,6 +2788,8 @@ class WalletOperations:
         self.root.account_page.total_balance_text.config(text=f"Total Balance:")
         
         self.root.progress_bar.config(maximum=0,value=0)
+        # The watcher is restarted with the balances of the new check
+        self.root.wallet_thread_manager.stop_thread("watch_balance")
         self.root.wallet_thread_manager.start_thread("load_balance", self.get_balance_data, args=(self.root.stored_data.wallet_file,), )
         
         if self.root.progress_bar["value"] != 0:
@@ -2595,65 +2799,116 @@ class WalletOperations:
     def get_balance_data(self, stop_signal=None, file_path=None):
         self.root.event_handler.stop_getting_balance = stop_signal
         if self.root.stored_data.wallet_data:
-            node, _ , _ = self.root.settings_page.validate_node_fields()
+            node = self.root.settings_page.select_node()
             self.root.stored_data.balance_loaded = wallet_client.checkBalance(file_path, password=None, node=node, to_json=True, currency_code=self.root.stored_data.currency_code if not self.root.disable_exchange_rate_features else "", currency_symbol=self.root.stored_data.currency_symbol if not self.root.disable_exchange_rate_features else "", address_data=json.dumps(self.root.stored_data.wallet_data), from_gui=True, callback_object=self.callbacks,stop_signal=stop_signal)
+            if self.root.stored_data.balance_loaded and not stop_signal.is_set():
+                self.root.wallet_thread_manager.request_queue.put(self.start_balance_watch)
             
 
-    def update_balance_data(self, balance_data=None, stop_signal=None):
-            # Create a dictionary for quick lookup of Treeview items by address
-            accounts_tree = self.root.account_page.accounts_tree
-            treeview_items = {accounts_tree.item(child)["values"][0]: child for child in accounts_tree.get_children()}
-    
-            def process_entries(entry):
-                address = entry['address']
-                amount = entry['balance']['amount']
-                pending_balance = entry['balance']['pending_balance']
-                
-                if not self.root.disable_exchange_rate_features:
-                    currency = entry['balance']['currency']
-                    value = entry['balance'][f'{self.root.stored_data.currency_code.lower()}_value']
-
-                if address in treeview_items:
-                    # Update existing entry
-                    if self.root.disable_exchange_rate_features:
-                        accounts_tree.item(treeview_items[address], values=(address, f"{amount} DNR", f"{pending_balance} DNR"))
-                    else:
-                        accounts_tree.item(treeview_items[address], values=(address, f"{amount} {currency}", f"{pending_balance} {currency}", value))
-                else:
-                    # Insert new entry
-                    if self.root.disable_exchange_rate_features:
-                        accounts_tree.insert('', tk.END, values=(address, f"{amount} DNR", f"{pending_balance} DNR"))
-                    else:
-                        accounts_tree.insert('', tk.END, values=(address, f"{amount} {currency}", f"{pending_balance} {currency}", value))
-                if stop_signal.is_set():
-                    return
+    def update_balance_data(self, balance_data=None, entries=(), total_balance=None, total_value=None, stop_signal=None):
+        # Runs on the GUI thread, the only thread that changes the account model and the treeview
+        if stop_signal is not None and stop_signal.is_set():
+            return
+        self.root.stored_data.balance_data = balance_data
+        self.root.stored_data.total_balance = total_balance
+        self.root.stored_data.total_balance_value = total_value
+        accounts_model = self.root.account_page.accounts_model
+        accounts_tree = self.root.account_page.accounts_tree
 
-            # Process regular addresses
-            process_entries(list(balance_data["balance_data"]['addresses'])[-1])
-    
-            # Check if 'imported_addresses' exists and process them
-            if 'imported_addresses' in balance_data["balance_data"] and balance_data["balance_data"]['imported_addresses']:
-                process_entries(list(balance_data["balance_data"]['imported_addresses'])[-1])
-            
-            self.root.account_page.total_balance_text.config(text=f"Total Balance: {self.root.stored_data.total_balance} DNR")
+        for entry in entries:
+            address = entry['address']
+            amount = entry['balance']['amount']
+            pending_balance = entry['balance']['pending_balance']
             
-            if not self.root.disable_exchange_rate_features:
-                self.root.account_page.total_value_text.config(text=f"Total {self.root.stored_data.currency_code} Value: {self.root.stored_data.total_balance_value}")
+            # Update the row of the address through the model, which adds it if it is missing
+            if self.root.disable_exchange_rate_features:
+                index, added = accounts_model.set_balance(address, amount, pending_balance)
+            else:
+                currency = entry['balance']['currency']
+                value = entry['balance'][f'{self.root.stored_data.currency_code.lower()}_value']
+                index, added = accounts_model.set_balance(address, amount, pending_balance, currency, value, self.root.stored_data.currency_symbol)
+
+            if added:
+                accounts_tree.rows_inserted(index)
+            else:
+                accounts_tree.row_updated(index)
+        if entries:
+            self.root.account_page.resize_columns()
+        
+        self.root.account_page.total_balance_text.config(text=f"Total Balance: {self.root.stored_data.total_balance} DNR")
+        
+        if not self.root.disable_exchange_rate_features:
+            self.root.account_page.total_value_text.config(text=f"Total {self.root.stored_data.currency_code} Value: {self.root.stored_data.total_balance_value}")
     
 
+    #Watch Balance Methods
+    def start_balance_watch(self):
+        # Keep watching the balances that were just loaded, so that changes are shown without a refresh
+        if not self.root.stored_data.balance_loaded:
+            return
+        node = self.root.settings_page.select_node()
+        balances = {row.address: (row.balance, row.pending) for row in self.root.account_page.accounts_model.rows if row.balance is not None and not row.stale}
+        self.root.wallet_thread_manager.start_thread("watch_balance", self.watch_balance_data, args=(node, balances), )
+
+
+    def watch_balance_data(self, stop_signal=None, node=None, balances=None):
+        history_store = self.root.stored_data.history_store
+        request_queue = self.root.wallet_thread_manager.request_queue
+        on_change = lambda address, balance, pending_balance, previous: request_queue.put(lambda: self.apply_balance_change(address, balance, pending_balance, stop_signal))
+        refresh = lambda addresses: wallet_client.refresh_balances(addresses, node, history_store=history_store)
+        watcher = wallet_client.AddressWatcher(node, list(self.root.stored_data.wallet_addresses), refresh, on_change)
+        watcher.watch(stop_signal, balances)
+
+
+    def apply_balance_change(self, address, balance, pending_balance, stop_signal):
+        accounts_model = self.root.account_page.accounts_model
+        index = accounts_model.index(address)
+        if stop_signal.is_set() or index is None:
+            return
+        amount = "{:.6f}".format(Decimal(str(balance)))
+        pending_balance = "{:.6f}".format(Decimal(str(pending_balance)))
+        if self.root.disable_exchange_rate_features:
+            accounts_model.set_balance(address, amount, pending_balance)
+        else:
+            currency_symbol = self.root.stored_data.currency_symbol
+            price = self.root.stored_data.price_data
+            value_text = f'{currency_symbol}{"{:.7f}".format(Decimal(str(balance)) * price)}' if price is not None else accounts_model.rows[index].value_text
+            accounts_model.set_balance(address, amount, pending_balance, "DNR", value_text, currency_symbol)
+        self.root.account_page.accounts_tree.row_updated(index)
+        self.root.account_page.resize_columns()
+
+        # Update the totals from the rows, which all hold balances once the balance check completed
+        total_balance = sum((row.balance for row in accounts_model.rows if row.balance is not None), Decimal(0))
+        self.root.stored_data.total_balance = total_balance
+        self.root.account_page.total_balance_text.config(text=f"Total Balance: {total_balance} DNR")
+        if not self.root.disable_exchange_rate_features and self.root.stored_data.price_data is not None:
+            self.root.stored_data.total_balance_value = f'{self.root.stored_data.currency_symbol}{"{:.7f}".format(total_balance * self.root.stored_data.price_data)}'
+            self.root.account_page.total_value_text.config(text=f"Total {self.root.stored_data.currency_code} Value: {self.root.stored_data.total_balance_value}")
+
+
     #Gets DNR Price
     def get_dnr_price(self):
-        price = wallet_client.get_price_info(currency_code=self.root.stored_data.currency_code)
+        # Served from memory, so the GUI thread never waits for the price APIs
+        price = wallet_client.PriceService.cached_price(self.root.stored_data.currency_code)
+        if price is None:
+            return ""
         formatted_price = Decimal(str(price))
         self.root.stored_data.price_data = formatted_price
         formatted_price_str = "{:.8f}".format(formatted_price)
         return formatted_price_str
+
+
+    def refresh_dnr_price(self):
+        request_queue = self.root.wallet_thread_manager.request_queue
+        on_done = lambda price: request_queue.put(lambda: self.root.gui_utils.update_dnr_price(self.root.event_handler.price_timer, price_refreshed=True))
+        wallet_client.PriceService.prefetch(self.root.stored_data.currency_code, on_done=on_done)
     
 
     #Transaction Methods
     def tx_auth(self):
         self.root.send_page.send_button.focus_set()
         self.root.stored_data.operation_mode = "send"
+        self.root.stored_data.unlock_address = self.root.send_page.send_from_combobox.get()
         self.root.send_page.send_from_combobox.config(state='disabled')
         self.root.send_page.amount_entry.config(state='disabled')
         self.root.send_page.recipient_entry.config(state='disabled')
@@ -2695,8 +2950,8 @@ class WalletOperations:
                                 break
                 
                 msg_str = ""  # Reinitialize msg_str for each transaction
-                node, _ , _ = self.root.settings_page.validate_node_fields()
-                transaction, msg_str = wallet_client.prepareTransaction(filename=None, password=None, totp_code=None, amount=amount, sender=sender, private_key=private_key, receiver=receiver, message=message, node=node, from_gui=True)
+                node = self.root.settings_page.select_node()
+                transaction, msg_str = wallet_client.prepareTransaction(filename=None, password=None, totp_code=None, amount=amount, sender=sender, private_key=private_key, receiver=receiver, message=message, node=node, from_gui=True, history_store=self.root.stored_data.history_store)
                 self.root.send_page.tx_log.config(state='normal')
         
                 if transaction:
@@ -2728,6 +2983,23 @@ class WalletOperations:
         self.root.stored_data.operation_mode = None
     
 
+    def unlock_entry(self, address):
+        if self.root.stored_data.operation_mode is not None or 'load_wallet' in self.root.event_handler.thread_event:
+            self.root.dialogs.messagebox("Error", "Can not show address information while another operation is taking place.")
+            return
+        self.root.stored_data.operation_mode = "address_info"
+        self.root.stored_data.unlock_address = address
+        self.root.wallet_thread_manager.start_thread("load_wallet", self.get_wallet_data, args=(self.root.stored_data.wallet_file, self.show_unlocked_entry), )
+
+
+    def show_unlocked_entry(self):
+        self.root.stored_data.operation_mode = None
+        self.root.stored_data.wallet_authenticated = False
+        address = self.root.stored_data.unlock_address
+        entry_data, entry_type = self.get_entry_data(address)
+        self.callbacks.post_show_address_info(address=address, entry_data=entry_data, entry_type=entry_type)
+
+
     def get_entry_data(self, address=None):
         for entry_type, entries in self.root.stored_data.wallet_data["entry_data"].items():
             if entry_type not in ["key_data", "master_mnemonic"]:
@@ -2993,15 +3265,7 @@ class Callbacks:
         
     
     def set_wallet_data(self, wallet_data, is_import=False, stop_signal=None):
-        # Wait if wallet_data_updated is True, indicating an ongoing GUI update
-        while getattr(self.root.stored_data, 'wallet_data_updated', False):
-            # Check for stop signal during wait to exit if needed
-            if stop_signal and stop_signal.is_set():
-                #print("Stop signal received while waiting. Exiting function.")
-                return False
-            time.sleep(0.1)  # Brief pause to wait for GUI update to complete
-        
-        # Check stop signal again before proceeding with data update
+        # Check stop signal before proceeding with data update
         if stop_signal and stop_signal.is_set():
             #print("Stop signal received. Exiting function.")
             return False
@@ -3017,13 +3281,8 @@ class Callbacks:
                 # Update the stored wallet data for generated entries
                 self.root.stored_data.wallet_data["entry_data"]["entries"] = self.root.stored_data.generated_entries
     
-            # Extend formatted data with the new entry
-            self.root.stored_data.formatted_data.extend([(wallet_data["address"], "", "", "")])
-            # Temporarily store the new address for potential immediate use
-            self.root.stored_data.temporary_address = wallet_data["address"]
-    
-            # Set the flag to True to indicate that new wallet data has been added
-            self.root.stored_data.wallet_data_updated = True
+            # Queue the address, which is added to the accounts treeview by the GUI thread in batches
+            self.root.stored_data.loaded_entries.put(wallet_data["address"])
     
         except Exception as e:
             #print(f"Error updating wallet data: {e}")
@@ -3031,12 +3290,31 @@ class Callbacks:
         return True
     
 
+    def set_balance_snapshot(self, snapshot, snapshot_key):
+        self.root.stored_data.balance_snapshot = snapshot
+        self.root.stored_data.balance_snapshot_key = snapshot_key
+
+
+    def set_history_store(self, history_store):
+        if self.root.stored_data.history_store:
+            self.root.stored_data.history_store.close()
+        self.root.stored_data.history_store = history_store
+
+
     def set_balance_data(self, balance_data, total_balance, total_value, stop_signal=None):
-        self.root.stored_data.balance_data = balance_data
-        self.root.stored_data.total_balance = total_balance
-        self.root.stored_data.total_balance_value = total_value
+        # Called by the balance check thread. The entries that were just added are taken now, since balance_data keeps
+        # growing, and the update is applied on the GUI thread
+        entries = []
         if balance_data:
-            self.root.wallet_operations.update_balance_data(balance_data, stop_signal=stop_signal)
+            for section in ('addresses', 'imported_addresses'):
+                if balance_data["balance_data"].get(section):
+                    entries.append(balance_data["balance_data"][section][-1])
+        self.root.wallet_thread_manager.request_queue.put(lambda: self.root.wallet_operations.update_balance_data(balance_data, entries, total_balance, total_value, stop_signal=stop_signal))
+
+
+    def apply_balance_change(self, address, balance, pending_balance, stop_signal=None):
+        # Called by a balance request thread when a balance that was shown changed
+        self.root.wallet_thread_manager.request_queue.put(lambda: self.root.wallet_operations.apply_balance_change(address, balance, pending_balance, stop_signal))
 
 
     def configure_progress_bar(self, max_value):
@@ -3057,6 +3335,9 @@ class Callbacks:
         price_data = self.root.stored_data.price_data
         warning_agreed = self.root.stored_data.warning_agreed
 
+        self.root.wallet_thread_manager.stop_thread("watch_balance")
+        if self.root.stored_data.history_store:
+            self.root.stored_data.history_store.close()
         self.root.stored_data = StoredData()
         
         if preserve_wallet_data:
@@ -3076,7 +3357,9 @@ class Callbacks:
 
 
     def clear_page_data(self):
-        self.root.account_page.accounts_tree.delete(*self.root.account_page.accounts_tree.get_children())
+        self.root.account_page.accounts_model.clear()
+        self.root.account_page.accounts_tree.reset()
+        self.root.history_page.clear()
         self.root.send_page.send_from_combobox.set('')
         self.root.send_page.send_from_combobox['values'] = []
 
@@ -3110,22 +3393,167 @@ class Callbacks:
             self.root.account_page.accounts_tree.column('Value', minwidth=title_width, stretch=tk.YES)
 
 
+@dataclass
+class AccountRow:
+    address: str
+    balance: Optional[Decimal] = None
+    pending: Optional[Decimal] = None
+    currency: str = "DNR"
+    value: Optional[Decimal] = None
+    value_text: str = ""
+    stale: bool = False
+
+
+class AccountModel:
+    """
+    The rows of the accounts page, with typed balances and an index of the rows by address.
+    The accounts tree renders from this model, so sorting and balance updates never read the widget.
+    """
+    SORT_FIELDS = {"Balance": "balance", "Pending": "pending", "Value": "value"}
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.rows = []
+        self._index = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def index(self, address):
+        return self._index.get(address)
+
+    def tags(self, index):
+        return ('stale',) if self.rows[index].stale else ()
+
+    def values(self, index):
+        row = self.rows[index]
+        values = []
+        for col in self.columns:
+            if col == "Address":
+                values.append(row.address)
+            elif col == "Balance":
+                values.append("" if row.balance is None else f"{row.balance} {row.currency}")
+            elif col == "Pending":
+                values.append("" if row.pending is None else f"{row.pending} {row.currency}")
+            else:
+                values.append(row.value_text)
+        return values
+
+    def add_addresses(self, addresses):
+        """
+        Adds rows without balances. Returns the index of the first new row.
+        """
+        start = len(self.rows)
+        for address in addresses:
+            self._index[address] = len(self.rows)
+            self.rows.append(AccountRow(address))
+        return start
+
+    def set_balance(self, address, amount, pending_balance, currency="DNR", value_text="", currency_symbol="", stale=False):
+        """
+        Sets the balance of an address, adding a row if the address has none. Stale balances are last known
+        balances that have not been fetched from the node yet.
+        Returns the index of the row and whether it was added.
+        """
+        index = self._index.get(address)
+        added = index is None
+        if added:
+            index = self.add_addresses([address])
+        row = self.rows[index]
+        row.balance = self._to_decimal(amount)
+        row.pending = self._to_decimal(pending_balance)
+        row.currency = currency
+        row.value_text = value_text
+        row.value = self._to_decimal(value_text.replace(currency_symbol, "", 1).replace(",", "")) if value_text else None
+        row.stale = stale
+        return index, added
+
+    def sort(self, col, reverse=False):
+        """
+        Sorts the rows by a balance column. Rows without a value are kept after the sorted rows.
+        """
+        attribute = self.SORT_FIELDS[col]
+        known = [row for row in self.rows if getattr(row, attribute) is not None]
+        unknown = [row for row in self.rows if getattr(row, attribute) is None]
+        known.sort(key=lambda row: getattr(row, attribute), reverse=reverse)
+        self.rows = known + unknown
+        self._index = {row.address: index for index, row in enumerate(self.rows)}
+
+    def clear(self):
+        self.rows = []
+        self._index = {}
+
+    @staticmethod
+    def _to_decimal(value):
+        try:
+            return Decimal(str(value))
+        except ArithmeticError:
+            return None
+
+
+class HistoryModel:
+    """
+    The rows of the history page, one per transaction, newest first, with an index of the rows by transaction hash.
+    Rows are only ever appended, as the pages of the history are loaded.
+    """
+    def __init__(self, columns):
+        self.columns = columns
+        self.rows = []
+        self._index = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def index(self, tx_hash):
+        return self._index.get(tx_hash)
+
+    def tags(self, index):
+        return ()
+
+    def values(self, index):
+        return self.rows[index]
+
+    def add_transactions(self, address, transactions):
+        """
+        Adds the rows of transactions of an address. Returns the index of the first new row.
+        """
+        start = len(self.rows)
+        for transaction in transactions:
+            tx_hash = transaction.get('hash')
+            if tx_hash in self._index:
+                continue
+            amount = wallet_client.transaction_amount(address, transaction)
+            if transaction.get('is_coinbase'):
+                kind = "Coinbase"
+            else:
+                kind = "Received" if amount > 0 else "Sent" if amount < 0 else ""
+            self._index[tx_hash] = len(self.rows)
+            self.rows.append((tx_hash, f"{'+' if amount > 0 else ''}{amount} DNR", kind))
+        return start
+
+    def clear(self):
+        self.rows = []
+        self._index = {}
+
+
 @dataclass
 class StoredData:
     wallet_file: Optional[str] = None
     wallet_data: dict = field(default_factory=lambda: {"entry_data": {}})
     generated_entries: dict = field(default_factory=lambda: [])
     imported_entries: dict = field(default_factory=lambda: [])
-    formatted_data: dict = field(default_factory=lambda: [])
-    temporary_address: Optional[str] = None
     wallet_addresses: dict = field(default_factory=lambda: [])
     wallet_authenticated : bool = False
     master_mnemonic: str = ""
+    unlock_address: str = ""
+    balance_snapshot: Optional[dict] = None
+    balance_snapshot_key: Optional[bytes] = None
+    history_store: Optional[HistoryStore] = None
     ask_string_result: Optional[str] = None
     ask_bool_result: Optional[bool] = None
     wallet_loaded: bool = False
     entry_count: int = 0
-    wallet_data_updated: bool = False
+    loaded_entries: queue.Queue = field(default_factory=queue.Queue)
     wallet_deleted: bool = False
 
     balance_data: dict = field(default_factory=lambda: [])
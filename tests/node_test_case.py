@@ -0,0 +1,34 @@
+import os
+import sys
+import tempfile
+import unittest
+
+# Get the absolute path of the repository root
+dir_path = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+# Insert folder paths for modules
+sys.path.insert(0, dir_path)
+
+import wallet_client
+
+
+class NodeTestCase(unittest.TestCase):
+    """
+    A test case against local stand-in nodes.
+
+    Node capabilities are kept in a temporary file, so every test probes its own stand-in nodes, and the
+    balance cache and the node pool are reset after every test.
+    """
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._cache_path = wallet_client.NodeCapabilities.CACHE_PATH
+        wallet_client.NodeCapabilities.CACHE_PATH = os.path.join(self._directory.name, "node_capabilities.json")
+        wallet_client.NodeCapabilities._nodes.clear()
+        wallet_client.BalanceCache.clear()
+
+    def tearDown(self):
+        wallet_client.NodePool.configure([])
+        wallet_client.BalanceCache.clear()
+        wallet_client.NodeCapabilities.CACHE_PATH = self._cache_path
+        wallet_client.NodeCapabilities._nodes.clear()
+        self._directory.cleanup()
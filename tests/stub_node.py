@@ -0,0 +1,103 @@
+import json
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+class StubNode:
+    """
+    A local stand-in for a Denaro node, serving the address information endpoints of the wallet client.
+
+    Every address gets a distinct balance derived from its hash, so results can be matched to the
+    addresses they were requested for. A legacy node answers single-address queries on
+    '/get_address_info' only, while a batch node also answers '/get_addresses_info'. Every request is
+    recorded, and can be delayed to stand in for the round trip to a remote node. The chain tip, the
+    balances and the pending transactions of the node can be changed while it is running.
+    """
+    TIP = 100
+
+    def __init__(self, batch=True, delay=0.0, missing=(), pending=()):
+        """
+        :param batch: Whether the node answers batch address queries.
+        :param delay: The time in seconds every request takes.
+        :param missing: Addresses left out of batch query results.
+        :param pending: Addresses with a pending transaction that does not change their balance.
+        """
+        self.batch = batch
+        self.delay = delay
+        self.missing = set(missing)
+        self.pending = set(pending)
+        self.tip = StubNode.TIP
+        self.balances = {}
+        self.requests = []
+        self._guard = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @staticmethod
+    def balance(address):
+        """
+        Returns the balance the node reports for an address.
+        """
+        return f"{int(hashlib.sha256(address.encode()).hexdigest()[:6], 16) / 1000000:.6f}"
+
+    def address_info(self, address):
+        pending_transactions = [{"tx_hash": "00" * 32, "inputs": [], "outputs": []}] if address in self.pending else []
+        return {"balance": self.balances.get(address, StubNode.balance(address)), "spendable_outputs": [], "pending_transactions": pending_transactions, "transactions": []}
+
+    def count(self, method, path):
+        with self._guard:
+            return sum(1 for request in self.requests if request[0] == method and request[1] == path)
+
+    def _record(self, method, path, addresses):
+        with self._guard:
+            self.requests.append((method, path, addresses))
+
+    def _handler(self):
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def reply(self, body, code=200):
+                data = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                query = parse_qs(url.query)
+                node._record("GET", url.path, query.get('address', []))
+                time.sleep(node.delay)
+                if url.path == '/get_address_info':
+                    self.reply({"ok": True, "result": node.address_info(query['address'][0])})
+                elif url.path == '/get_mining_info':
+                    self.reply({"ok": True, "result": {"last_block": {"id": node.tip, "hash": "00" * 32}}})
+                else:
+                    self.reply({"detail": "Not Found"}, 404)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b"{}")
+                node._record("POST", self.path, body.get('addresses', []))
+                time.sleep(node.delay)
+                if self.path == '/get_addresses_info' and node.batch:
+                    self.reply({"ok": True, "result": {address: node.address_info(address) for address in body['addresses'] if address not in node.missing}})
+                else:
+                    self.reply({"detail": "Not Found"}, 404)
+
+        return Handler
@@ -0,0 +1,85 @@
+import threading
+import unittest
+
+from node_test_case import NodeTestCase, wallet_client
+from stub_node import StubNode
+
+
+class BalanceCacheTest(NodeTestCase):
+    """
+    Tests how the balance requests serve balances from the balance cache, and revalidate them once the chain
+    tip of the node advanced.
+    """
+    def setUp(self):
+        super().setUp()
+        # The chain tip is looked up on every balance check, so tests can move it
+        self._tip_ttl = wallet_client.BalanceCache.TIP_TTL_SECONDS
+        wallet_client.BalanceCache.TIP_TTL_SECONDS = 0
+
+    def tearDown(self):
+        wallet_client.BalanceCache.TIP_TTL_SECONDS = self._tip_ttl
+        super().tearDown()
+
+    @staticmethod
+    def addresses(count):
+        return [f"D{index:040d}" for index in range(count)]
+
+    @staticmethod
+    def balances(node, addresses, **kwargs):
+        records = ((None, {'address': address}) for address in addresses)
+        return {entry['address']: str(balance) for _, entry, balance, _, is_error in wallet_client.iter_balance_info(records, node, **kwargs) if not is_error}
+
+    @staticmethod
+    def queries(node):
+        return node.count("POST", "/get_addresses_info") - 1
+
+    def test_fresh_balances_are_served_from_the_cache(self):
+        addresses = self.addresses(10)
+        with StubNode() as node:
+            first = self.balances(node.url, addresses)
+            second = self.balances(node.url, addresses)
+            self.assertEqual(self.queries(node), 1)
+        self.assertEqual(first, second)
+
+    def test_pending_transactions_are_not_served_from_the_cache(self):
+        # The pending transaction leaves the pending balance at zero, so only the pending flag tells
+        addresses = self.addresses(10)
+        with StubNode(pending=[addresses[4]]) as node:
+            self.balances(node.url, addresses)
+            self.balances(node.url, addresses)
+            self.assertEqual(self.queries(node), 2)
+            self.assertEqual(node.requests[-1][2], [addresses[4]])
+
+    def test_stale_balances_are_requested_again(self):
+        addresses = self.addresses(10)
+        with StubNode() as node:
+            self.balances(node.url, addresses)
+            node.tip += 1
+            node.balances[addresses[2]] = "1.000000"
+            balances = self.balances(node.url, addresses)
+            self.assertEqual(self.queries(node), 2)
+        self.assertEqual(balances[addresses[2]], "1.000000")
+
+    def test_stale_balances_are_served_and_revalidated(self):
+        addresses = self.addresses(10)
+        revalidated = []
+        done = threading.Event()
+
+        def on_revalidated(address, balance, pending_balance):
+            revalidated.append((address, str(balance)))
+            done.set()
+
+        with StubNode() as node:
+            first = self.balances(node.url, addresses)
+            node.tip += 1
+            node.balances[addresses[2]] = "1.000000"
+            second = self.balances(node.url, addresses, on_revalidated=on_revalidated)
+            self.assertTrue(done.wait(5))
+            self.assertEqual(self.queries(node), 2)
+        # The stale balances were yielded, and only the balance that changed was passed on
+        self.assertEqual(first, second)
+        self.assertEqual(revalidated, [(addresses[2], "1.000000")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+from node_test_case import NodeTestCase, wallet_client
+from stub_node import StubNode
+
+
+class BatchAddressQueryTest(NodeTestCase):
+    """
+    Tests the batch address query path of the balance requests against local stand-in nodes, and the
+    fallback to single-address queries on legacy nodes.
+    """
+    @staticmethod
+    def addresses(count):
+        return [f"D{index:040d}" for index in range(count)]
+
+    @staticmethod
+    def balances(node, addresses, **kwargs):
+        records = ((None, {'address': address}) for address in addresses)
+        return [(entry['address'], balance, is_error) for _, entry, balance, _, is_error in wallet_client.iter_balance_info(records, node, use_cache=False, **kwargs)]
+
+    def test_probe_is_cached_per_node(self):
+        with StubNode(batch=True) as batch_node, StubNode(batch=False) as legacy_node:
+            self.assertTrue(wallet_client.supports_batch_query(batch_node.url))
+            self.assertFalse(wallet_client.supports_batch_query(legacy_node.url))
+            self.assertTrue(wallet_client.supports_batch_query(batch_node.url))
+            self.assertFalse(wallet_client.supports_batch_query(legacy_node.url))
+            self.assertEqual(batch_node.count("POST", "/get_addresses_info"), 1)
+            self.assertEqual(legacy_node.count("POST", "/get_addresses_info"), 1)
+
+    def test_batch_node_results_match_addresses(self):
+        addresses = self.addresses(2 * wallet_client.BALANCE_BATCH_SIZE + 7)
+        with StubNode(batch=True) as node:
+            results = self.balances(node.url, addresses)
+            # The probe, then one query per BALANCE_BATCH_SIZE addresses
+            self.assertEqual(node.count("POST", "/get_addresses_info"), 1 + 3)
+            self.assertEqual(node.count("GET", "/get_address_info"), 0)
+        self.assertEqual([address for address, _, _ in results], addresses)
+        for address, balance, is_error in results:
+            self.assertFalse(is_error)
+            self.assertEqual(str(balance), StubNode.balance(address))
+
+    def test_legacy_node_falls_back_to_single_address_queries(self):
+        addresses = self.addresses(25)
+        with StubNode(batch=False) as node:
+            results = self.balances(node.url, addresses, max_requests=4)
+            self.assertEqual(node.count("POST", "/get_addresses_info"), 1)
+            self.assertEqual(node.count("GET", "/get_address_info"), len(addresses))
+        self.assertEqual([address for address, _, _ in results], addresses)
+        for address, balance, is_error in results:
+            self.assertFalse(is_error)
+            self.assertEqual(str(balance), StubNode.balance(address))
+
+    def test_address_missing_from_batch_result_is_an_error(self):
+        addresses = self.addresses(10)
+        with StubNode(batch=True, missing=[addresses[3]]) as node:
+            results = self.balances(node.url, addresses)
+        self.assertEqual([address for address, _, _ in results], addresses)
+        for address, balance, is_error in results:
+            if address == addresses[3]:
+                self.assertTrue(is_error)
+                self.assertIsNone(balance)
+            else:
+                self.assertFalse(is_error)
+                self.assertEqual(str(balance), StubNode.balance(address))
+
+
+if __name__ == "__main__":
+    unittest.main()
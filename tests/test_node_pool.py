@@ -0,0 +1,51 @@
+import time
+import unittest
+
+from node_test_case import NodeTestCase, wallet_client
+from stub_node import StubNode
+
+
+class NodePoolTest(NodeTestCase):
+    """
+    Tests hedged balance requests against a slow stand-in node with a fast backup node.
+    """
+    @staticmethod
+    def pool(*nodes):
+        # The nodes are healthy and equally fast as far as the pool knows, so the first one is asked first
+        wallet_client.NodePool.configure([node.url for node in nodes])
+        for node in nodes:
+            wallet_client.NodePool._record(node.url, latency=0.1, height=node.tip)
+            wallet_client.NodePool._stats[node.url]["healthy"] = True
+
+    def test_every_concurrent_request_can_be_hedged(self):
+        max_requests = 3 * wallet_client.NodePool.MAX_REQUESTS
+        addresses = [f"D{index:040d}" for index in range(max_requests)]
+        with StubNode(batch=False, delay=2) as slow_node, StubNode(batch=False, delay=0.1) as fast_node:
+            self.pool(slow_node, fast_node)
+            # The node is probed for batch queries before the requests are timed
+            self.assertFalse(wallet_client.supports_batch_query(slow_node.url))
+            records = ((None, {'address': address}) for address in addresses)
+            started = time.monotonic()
+            results = list(wallet_client.iter_balance_info(records, slow_node.url, max_requests=max_requests, use_cache=False))
+            elapsed = time.monotonic() - started
+            self.assertEqual(fast_node.count("GET", "/get_address_info"), len(addresses))
+        self.assertEqual([entry['address'] for _, entry, _, _, _ in results], addresses)
+        self.assertFalse(any(is_error for _, _, _, _, is_error in results))
+        # Every request is answered by the backup node after the hedge delay, instead of waiting for a thread
+        self.assertLess(elapsed, 2)
+
+    def test_hedged_answers_are_kept_under_the_node_that_answered(self):
+        address = f"D{0:040d}"
+        with StubNode(batch=False, delay=1.5) as slow_node, StubNode(batch=False) as fast_node:
+            fast_node.tip += 1
+            self.pool(slow_node, fast_node)
+            self.assertFalse(wallet_client.supports_batch_query(slow_node.url))
+            results = list(wallet_client.iter_balance_info([(None, {'address': address})], slow_node.url))
+            self.assertEqual(fast_node.count("GET", "/get_address_info"), 1)
+        self.assertFalse(results[0][4])
+        self.assertIsNone(wallet_client.BalanceCache.get(slow_node.url, address, slow_node.tip))
+        self.assertEqual(wallet_client.BalanceCache.get(fast_node.url, address, fast_node.tip)[2], True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import requests
+from node_test_case import wallet_client
+
+Verification = wallet_client.Verification
+
+
+class ProtocolRaceTest(unittest.TestCase):
+    """
+    Tests which protocol is chosen for a node address without a protocol, when both protocols are probed at once.
+    """
+    @staticmethod
+    def race(delays, protocols=("https://", "http://")):
+        # Each protocol answers after its delay, or fails if it has none
+        def node_tip(full_address):
+            delay = delays.get(full_address.split("://")[0])
+            if delay is None:
+                raise requests.ConnectionError(full_address)
+            time.sleep(delay)
+            return 100
+
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            with mock.patch.object(Verification, "_node_tip", staticmethod(node_tip)):
+                return Verification._race_protocols(executor, "node.example:3006", list(protocols))
+        finally:
+            # A probe that lost the race is not waited for
+            executor.shutdown(wait=False)
+
+    def test_https_is_preferred_when_http_answers_first(self):
+        self.assertEqual(self.race({"https": 0.2, "http": 0.01}), "https://node.example:3006")
+
+    def test_http_is_used_when_https_fails(self):
+        self.assertEqual(self.race({"http": 0.01}), "http://node.example:3006")
+
+    def test_http_is_used_when_https_is_slower_than_the_grace_period(self):
+        started = time.monotonic()
+        self.assertEqual(self.race({"https": Verification.PROTOCOL_GRACE_SECONDS + 1, "http": 0.01}), "http://node.example:3006")
+        self.assertLess(time.monotonic() - started, Verification.PROTOCOL_GRACE_SECONDS + 0.5)
+
+    def test_chosen_protocol_is_preferred(self):
+        self.assertEqual(self.race({"https": 0.01, "http": 0.2}, protocols=("http://", "https://")), "http://node.example:3006")
+
+    def test_no_answer(self):
+        self.assertIsNone(self.race({}))
+
+
+if __name__ == "__main__":
+    unittest.main()
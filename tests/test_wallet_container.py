@@ -0,0 +1,60 @@
+import base64
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from node_test_case import wallet_client
+from denaro.wallet.utils.wallet_container_util import WalletContainerReader
+
+WalletContainer = wallet_client.WalletContainer
+
+
+class WalletContainerTest(unittest.TestCase):
+    """
+    Tests that wallet containers are loaded without reading their entries, and read single entries on demand.
+    """
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self._directory.name, "wallet" + WalletContainer.EXTENSION)
+        self.entries = [base64.b64encode(f"entry {index}".encode()).decode() for index in range(10)]
+        self.imported_entries = [base64.b64encode(f"imported entry {index}".encode()).decode() for index in range(2)]
+        data = {"wallet_data": {"wallet_type": "non-deterministic", "entry_data": {"imported_entries": self.imported_entries, "entries": self.entries}}}
+        WalletContainer.save(self.filename, data)
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def load(self):
+        data, _ = wallet_client._load_data(self.filename, False)
+        return data
+
+    def test_loading_reads_no_entries(self):
+        with mock.patch.object(WalletContainerReader, "get_entry", autospec=True, side_effect=WalletContainerReader.get_entry) as get_entry:
+            entry_data = self.load()["wallet_data"]["entry_data"]
+            self.assertEqual(get_entry.call_count, 0)
+            self.assertEqual(len(entry_data["entries"]), len(self.entries))
+            self.assertEqual(entry_data["entries"][4], self.entries[4])
+            self.assertEqual(get_entry.call_count, 1)
+        self.assertEqual(list(entry_data), ["imported_entries", "entries"])
+        self.assertEqual(list(entry_data["entries"]), self.entries)
+
+    def test_lazy_entries_serialize_like_lists(self):
+        entry_data = self.load()["wallet_data"]["entry_data"]
+        self.assertEqual(json.dumps(entry_data, default=WalletContainer.json_default), json.dumps({"imported_entries": self.imported_entries, "entries": self.entries}))
+        self.assertEqual(entry_data["entries"][2:4], self.entries[2:4])
+
+    def test_container_is_replaced_while_its_entries_are_read_lazily(self):
+        data = wallet_client.WalletJournal.begin(self.load())
+        new_entry = base64.b64encode(b"new entry").decode()
+        data["wallet_data"]["entry_data"]["entries"].append(new_entry)
+        wallet_client.WalletJournal.append(self.filename, data, "entries", [new_entry])
+        self.assertTrue(wallet_client.WalletJournal.compact(self.filename, data))
+        # The loaded entries were read into memory before the container was replaced
+        self.assertEqual(list(data["wallet_data"]["entry_data"]["entries"]), self.entries + [new_entry])
+        self.assertEqual(list(self.load()["wallet_data"]["entry_data"]["entries"]), self.entries + [new_entry])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import base64
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from node_test_case import wallet_client
+
+WalletJournal = wallet_client.WalletJournal
+WalletLock = wallet_client.WalletLock
+
+
+class WalletJournalTest(unittest.TestCase):
+    """
+    Tests compaction of the wallet journal while entries are appended by another writer.
+    """
+    PASSWORD = "Passw0rd!x"
+    HMAC_SALT = b"\x01" * 32
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self._directory.name, "wallet.json")
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def create(self, encrypted=False):
+        data = {"wallet_data": {"wallet_type": "non-deterministic", "entry_data": {"entries": [{"id": 1}]}}}
+        if encrypted:
+            hmac_msg = WalletJournal._hmac_message(data["wallet_data"], data["wallet_data"]["entry_data"]["entries"], None)
+            computed_hmac = wallet_client.Verification.hmac_util(password=self.PASSWORD, hmac_salt=self.HMAC_SALT, hmac_msg=hmac_msg)
+            data["wallet_data"]["hmac"] = base64.b64encode(computed_hmac).decode()
+        with open(self.filename, 'w') as f:
+            json.dump(data, f)
+
+    def load(self):
+        data, _ = wallet_client._load_data(self.filename, False)
+        return data
+
+    def append(self, count, hmac_key=None):
+        # Every writer loads the wallet under the exclusive lock, as the address generation does
+        with WalletLock.exclusive(self.filename):
+            data = WalletJournal.begin(self.load())
+            entries = data["wallet_data"]["entry_data"]["entries"]
+            new_entries = [{"id": len(entries) + position + 1} for position in range(count)]
+            entries.extend(new_entries)
+            WalletJournal.append(self.filename, data, "entries", new_entries, hmac_key=hmac_key)
+
+    def compact_while_appending(self, password=None, hmac_salt=None, hmac_key=None):
+        self.append(3, hmac_key)
+        results = []
+        compaction = threading.Thread(target=lambda: results.append(WalletJournal.compact(self.filename, None, password, hmac_salt)))
+        with WalletLock.exclusive(self.filename):
+            # The compaction is pending on the lock while another entry is appended
+            compaction.start()
+            compaction.join(0.3)
+            self.assertTrue(compaction.is_alive())
+            self.append(1, hmac_key)
+        compaction.join(5)
+        return results
+
+    def test_entries_appended_while_compaction_is_pending_are_kept(self):
+        self.create()
+        self.assertEqual(self.compact_while_appending(), [True])
+        self.assertFalse(os.path.exists(WalletJournal.journal_path(self.filename)))
+        data = self.load()
+        self.assertNotIn("journal_state", data)
+        self.assertEqual([entry["id"] for entry in data["wallet_data"]["entry_data"]["entries"]], [1, 2, 3, 4, 5])
+
+    def test_encrypted_wallet_is_compacted_under_a_fresh_hmac(self):
+        self.create(encrypted=True)
+        hmac_key = wallet_client.Verification.derive_hmac_key(self.PASSWORD, self.HMAC_SALT)
+        self.assertEqual(self.compact_while_appending(self.PASSWORD, self.HMAC_SALT, hmac_key), [True])
+        data = self.load()
+        entries = data["wallet_data"]["entry_data"]["entries"]
+        self.assertEqual([entry["id"] for entry in entries], [1, 2, 3, 4, 5])
+        hmac_msg = WalletJournal._hmac_message(data["wallet_data"], entries, None)
+        stored_hmac = base64.b64decode(data["wallet_data"]["hmac"])
+        self.assertTrue(wallet_client.Verification.hmac_util(stored_hmac=stored_hmac, hmac_msg=hmac_msg, verify=True, hmac_key=hmac_key))
+
+    def test_tampered_journal_is_not_compacted(self):
+        self.create(encrypted=True)
+        hmac_key = wallet_client.Verification.derive_hmac_key(self.PASSWORD, self.HMAC_SALT)
+        self.append(2, hmac_key)
+        path = WalletJournal.journal_path(self.filename)
+        with open(path, 'r') as f:
+            journal = f.read()
+        with open(path, 'w') as f:
+            f.write(journal.replace('{"id": 3}', '{"id": 30}'))
+        with open(self.filename, 'r') as f:
+            wallet = f.read()
+        self.assertFalse(WalletJournal.compact(self.filename, None, self.PASSWORD, self.HMAC_SALT))
+        with open(self.filename, 'r') as f:
+            self.assertEqual(f.read(), wallet)
+        self.assertTrue(os.path.exists(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from node_test_case import wallet_client
+
+if os.name != 'nt':
+    import fcntl
+
+WalletLock = wallet_client.WalletLock
+
+
+@unittest.skipIf(os.name == 'nt', "Lock files are taken with flock")
+class WalletLockTest(unittest.TestCase):
+    """
+    Tests the wallet lock while another process holds the lock file.
+    """
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self._directory.name, "wallet.json")
+        # A lock taken through another open file description conflicts like a lock of another process
+        self._other_process = open(self.filename + WalletLock.LOCK_SUFFIX, 'a')
+        self.lock_other_process(True)
+
+    def tearDown(self):
+        self._other_process.close()
+        self._directory.cleanup()
+
+    def lock_other_process(self, locked):
+        fcntl.flock(self._other_process.fileno(), fcntl.LOCK_EX if locked else fcntl.LOCK_UN)
+
+    def take(self, lock, taken):
+        with lock(self.filename):
+            taken.set()
+
+    def test_waiting_for_another_process_does_not_hold_the_condition(self):
+        state = WalletLock._state(self.filename)
+        for lock in (WalletLock.shared, WalletLock.exclusive):
+            taken = threading.Event()
+            waiter = threading.Thread(target=self.take, args=(lock, taken))
+            waiter.start()
+            self.assertFalse(taken.wait(0.3))
+            # The waiting thread is blocked on the lock file, while the condition stays available
+            self.assertTrue(state.condition.acquire(timeout=1))
+            self.assertTrue(state.acquiring)
+            state.condition.release()
+            self.lock_other_process(False)
+            self.assertTrue(taken.wait(5))
+            waiter.join()
+            self.lock_other_process(True)
+
+    def test_threads_wait_for_the_thread_taking_the_lock_file(self):
+        taken = [threading.Event(), threading.Event()]
+        waiters = [threading.Thread(target=self.take, args=(WalletLock.exclusive, event)) for event in taken]
+        for waiter in waiters:
+            waiter.start()
+        self.assertFalse(any(event.wait(0.3) for event in taken))
+        self.lock_other_process(False)
+        for waiter, event in zip(waiters, taken):
+            self.assertTrue(event.wait(5))
+            waiter.join()
+        self.assertIsNone(WalletLock._state(self.filename).handle)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,6 +8,7 @@ import hashlib
 import logging
 import shutil
 from datetime import datetime
+from denaro.wallet.utils.http_transport_util import HttpTransport
 
 # Get the root logger
 root_logger = logging.getLogger()
@@ -38,7 +39,7 @@ def fetch_from_github_api(url):
     - tuple: A tuple containing the JSON response (dict) and the pagination links (dict), or (None, {}) on failure.
     """
     try:
-        response = requests.get(url)  # Sends an HTTP GET request to the GitHub API
+        response = HttpTransport.get(url)  # Sends an HTTP GET request to the GitHub API
         response.raise_for_status()  # Raises an HTTPError if the HTTP request returned an unsuccessful status code
         return json.loads(response.text), response.links  # Parses the JSON response text and returns it with pagination links
     except requests.RequestException as e:
@@ -233,7 +234,7 @@ def fetch_and_decode_content(extracted_data):
         path = value['path']
         url = value['url']
         # Fetch the file content from GitHub
-        response = requests.get(url)
+        response = HttpTransport.get(url)
         # Check if the request was successful
         if response.status_code == 200:
             # Parse the JSON response to get the base64 encoded content
@@ -8,12 +8,12 @@ import sys
 import threading
 import gc
 import re
-import time
 import shutil
 import requests
 from datetime import datetime
 from decimal import Decimal, ROUND_DOWN, ROUND_UP
-from collections import Counter, OrderedDict
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, Future
 from PIL import Image
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
@@ -30,6 +30,23 @@ from denaro.wallet.utils.wallet_generation_util import generate, generate_from_p
 from denaro.wallet.utils.cryptographic_util import EncryptDecryptUtils, TOTP
 from denaro.wallet.utils.verification_util import Verification
 from denaro.wallet.utils.data_manipulation_util import DataManipulation
+from denaro.wallet.utils.wallet_journal_util import WalletJournal
+from denaro.wallet.utils.wallet_container_util import WalletContainer
+from denaro.wallet.utils.address_index_util import AddressIndex
+from denaro.wallet.utils.wallet_metadata_util import WalletMetadata
+from denaro.wallet.utils.wallet_shard_util import ShardedWallet
+from denaro.wallet.utils.wallet_lock_util import WalletLock
+from denaro.wallet.utils.backup_store_util import BackupStore
+from denaro.wallet.utils.address_sidecar_util import AddressSidecar
+from denaro.wallet.utils.watch_only_util import WatchOnlyWallet
+from denaro.wallet.utils.http_transport_util import HttpTransport
+from denaro.wallet.utils.balance_cache_util import BalanceCache
+from denaro.wallet.utils.balance_snapshot_util import BalanceSnapshot
+from denaro.wallet.utils.history_store_util import HistoryStore, HistoryPager
+from denaro.wallet.utils.address_watcher_util import AddressWatcher
+from denaro.wallet.utils.price_service_util import PriceService
+from denaro.wallet.utils.node_pool_util import NodePool
+from denaro.wallet.utils.node_capabilities_util import NodeCapabilities
 from denaro.wallet.utils.interface_util import UserPrompts
 from denaro.wallet.utils.qr_code_util import QRCodeUtils, _2FA_QR_Dialog
 from denaro.wallet.utils.transaction_utils.transaction_input import TransactionInput
@@ -64,6 +81,11 @@ transaction_message_extension = f"Sent From {wallet_client_version}"
 
 ADDRESS_PATTERN = r'^[DE][1-9A-HJ-NP-Za-km-z]{44}$'
 
+# Balance requests sent to the node at the same time, and the timeout of each request in seconds
+BALANCE_MAX_REQUESTS = 8
+BALANCE_REQUEST_TIMEOUT = 10
+# Addresses per request for nodes that support batch address queries
+BALANCE_BATCH_SIZE = 100
 
 # Filesystem Functions
 def is_wallet_encrypted(data_segment):
@@ -116,10 +138,10 @@ def get_normalized_filepath(filename):
     """
     default_directory="./wallets"
 
-    # Ensure the filename has a .json extension
+    # Ensure the filename has a .json extension, or the wallet container extension
     _, file_extension = os.path.splitext(filename)
     # Add .json extention to the filename if it's not present
-    if file_extension.lower() != ".json":
+    if file_extension.lower() not in [".json", WalletContainer.EXTENSION]:
         filename += ".json"
 
     # Check if the directory part is already specified in the filename
@@ -141,12 +163,23 @@ def _load_data(filename, new_wallet):
     """
     Loads wallet data from a specified file.
     Checks if wallet file exists.
+    Entries held in the wallet journal are merged into the loaded data, and the
+    entries of sharded wallets and wallet containers are attached as lazily loaded
+    lists. The wallet is read under its shared lock.
     """    
     try:
-        with open(filename, 'r') as f:
-            data = json.load(f)
+        with WalletLock.shared(filename):
+            if WalletContainer.is_container(filename):
+                data = WalletContainer.load(filename, lazy=True)
+            else:
+                with open(filename, 'r') as f:
+                    data = json.load(f)
+            if isinstance(data, dict) and "wallet_data" in data and ShardedWallet.is_sharded(data):
+                data = ShardedWallet.attach(filename, data)
+            else:
+                data = WalletJournal.load(filename, data)
         return data, True
-    except (FileNotFoundError, json.JSONDecodeError) as e:
+    except (FileNotFoundError, json.JSONDecodeError, ValueError) as e:
         if new_wallet:
             return {}, False
         else:
@@ -377,9 +410,24 @@ def handle_existing_encrypted_wallet(filename, data, password, totp_code, determ
     # Verify the password and HMAC
     password_verified, hmac_verified, stored_verifier = Verification.verify_password_and_hmac(data, password, hmac_salt, verification_salt, deterministic)
 
+    # Keep a snapshot of the attempt protected data to avoid rewriting an unchanged wallet file
+    data_snapshot = json.dumps([data["wallet_data"]["entry_data"], data["wallet_data"]["totp_secret"]], default=WalletContainer.json_default)
+
     # Based on password verification, update or reset the number of failed attempts
     data, attempts_msg, warning_msg, warning_type, data_erased_msg = DataManipulation.update_or_reset_attempts(data, filename, hmac_salt, password_verified, deterministic, from_gui=from_gui, callback_object=callback_object)
 
+    # Save the updated attempt counters under the exclusive wallet lock
+    if data is not None and json.dumps([data["wallet_data"]["entry_data"], data["wallet_data"]["totp_secret"]], default=WalletContainer.json_default) != data_snapshot:
+        with WalletLock.exclusive(filename):
+            current_data, _ = _load_data(filename, False)
+            if current_data and json.dumps([current_data["wallet_data"]["entry_data"], current_data["wallet_data"]["totp_secret"]], default=WalletContainer.json_default) != data_snapshot:
+                # The wallet was modified since it was loaded, so the attempt counters are updated on its current data
+                data.clear()
+                data.update(current_data)
+                data, attempts_msg, warning_msg, warning_type, data_erased_msg = DataManipulation.update_or_reset_attempts(data, filename, hmac_salt, password_verified, deterministic, from_gui=from_gui, callback_object=callback_object)
+            if data is not None:
+                DataManipulation._save_data(filename, data)
+
     def handle_auth_error_messages():
         auth_error_msg = "Authentication failed or wallet data is corrupted."
         new_line = '\n\n'
@@ -414,8 +462,6 @@ def handle_existing_encrypted_wallet(filename, data, password, totp_code, determ
         DataManipulation.secure_delete([var for var in locals().values() if var is not None])
         handle_auth_error_messages()
         return None, None, None, None, None
-    else:
-        DataManipulation._save_data(filename,data)
 
     # Verify the password and HMAC
     password_verified, hmac_verified, stored_verifier = Verification.verify_password_and_hmac(data, password, hmac_salt, verification_salt, deterministic)
@@ -521,6 +567,16 @@ def decrypt_and_parse_mnemonic(encrypted_json, password, totp_secret, hmac_salt,
 
 # Wallet Orchestrator Functions
 def generateAddressHelper(filename=None, password=None, totp_code=None, new_wallet=False, encrypt=False, use2FA=False, deterministic=False, backup=None, disable_warning=False, overwrite_password=None, amount=1, private_key=None, is_import=False, mnemonic=None, from_gui=False, callback_object=None, stop_signal=None):
+    """Overview:
+        The `generateAddressHelper` function holds the exclusive lock of the wallet file while a wallet is created,
+        or while entries are generated or imported into an existing wallet. The whole read-modify-write cycle is
+        covered, so that concurrent writers can not lose each other's entries. See `_generate_address` for the
+        parameters and return value.
+    """
+    with WalletLock.exclusive(get_normalized_filepath(filename)):
+        return _generate_address(filename=filename, password=password, totp_code=totp_code, new_wallet=new_wallet, encrypt=encrypt, use2FA=use2FA, deterministic=deterministic, backup=backup, disable_warning=disable_warning, overwrite_password=overwrite_password, amount=amount, private_key=private_key, is_import=is_import, mnemonic=mnemonic, from_gui=from_gui, callback_object=callback_object, stop_signal=stop_signal)
+
+def _generate_address(filename=None, password=None, totp_code=None, new_wallet=False, encrypt=False, use2FA=False, deterministic=False, backup=None, disable_warning=False, overwrite_password=None, amount=1, private_key=None, is_import=False, mnemonic=None, from_gui=False, callback_object=None, stop_signal=None):
     """Overview:
         The `generateAddressHelper` function serves as a central orchestrator for facilitating the creation, 
         integration, and management of wallet data. This function is designed to accomodate different scenarios 
@@ -582,6 +638,25 @@ def generateAddressHelper(filename=None, password=None, totp_code=None, new_wall
     #Normalize filename
     filename = get_normalized_filepath(filename)
 
+    # Run preflight checks for an existing wallet using only its header
+    if not new_wallet:
+        wallet_metadata = WalletMetadata.read(filename)
+        if wallet_metadata is None:
+            logging.error(f"Unable to read the wallet file or parse its content: {filename}")
+            return None
+        
+        if wallet_metadata["encrypted"] and not password and not from_gui:
+            logging.error("Wallet is encrypted. A password is required to add additional addresses.")
+            DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+            return None
+        
+        if wallet_metadata["entries"] + wallet_metadata["imported_entries"] >= ShardedWallet.MAX_ENTRIES:
+            if from_gui:
+                callback_object.post_messagebox("Error", "Cannot proceed. Maximum wallet entries reached.")
+            else:
+                print("Cannot proceed. Maximum wallet entries reached.")
+            return None
+
     # Load the existing or new wallet data from a file (filename)
     data, wallet_exists = _load_data(filename, new_wallet)    
     
@@ -590,6 +665,15 @@ def generateAddressHelper(filename=None, password=None, totp_code=None, new_wall
     if not new_wallet and not wallet_exists:
         DataManipulation.secure_delete([var for var in locals().values() if var is not None])
         return None
+
+    # Watch-only wallets only hold addresses, so entries can not be generated or imported into them
+    if not new_wallet and WatchOnlyWallet.is_watch_only(data):
+        if from_gui:
+            callback_object.post_messagebox("Error", "Addresses can not be generated or imported into a watch-only wallet.")
+        else:
+            logging.error("Addresses can not be generated or imported into a watch-only wallet.")
+        DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+        return None
     
     if new_wallet:
         stored_encrypt_param = encrypt
@@ -599,21 +683,8 @@ def generateAddressHelper(filename=None, password=None, totp_code=None, new_wall
 
     # Determine encryption status and wallet type for an existing wallet
     if wallet_exists or not new_wallet:
-        # Convert part of the wallet data to a JSON string
-        data_segment = json.dumps(data["wallet_data"])   
-
-        # Check if the wallet data is encrypted and if a password is provided
-        if is_wallet_encrypted(data_segment) and not password and not new_wallet and not from_gui:
-            logging.error("Wallet is encrypted. A password is required to add additional addresses.")
-            DataManipulation.secure_delete([var for var in locals().values() if var is not None])
-            return None
-        
-        if is_wallet_encrypted(data_segment):
-            # If encrypted and password is provided, set encrypt flag to True
-            encrypt = True
-
-        if not is_wallet_encrypted(data_segment):
-            encrypt = False
+        # Set the encrypt flag based on the loaded wallet data
+        encrypt = WalletMetadata.from_data(data)["encrypted"]
 
         # Check if the existing wallet type is deterministic
         if "wallet_type" in data["wallet_data"] and not new_wallet:
@@ -622,12 +693,16 @@ def generateAddressHelper(filename=None, password=None, totp_code=None, new_wall
         if "imported_entries" in data["wallet_data"]["entry_data"]:
             imported_entries = len(data["wallet_data"]["entry_data"]["imported_entries"])
 
-        if len(data["wallet_data"]["entry_data"]["entries"]) + imported_entries > 255 and not new_wallet:
+        if len(data["wallet_data"]["entry_data"]["entries"]) + imported_entries >= ShardedWallet.MAX_ENTRIES and not new_wallet:
             if from_gui:
                 callback_object.post_messagebox("Error", "Cannot proceed. Maximum wallet entries reached.")
             else:
                 print("Cannot proceed. Maximum wallet entries reached.")
             return None
+
+        # New entries of an existing flat wallet are appended to the wallet journal
+        if not new_wallet and not ShardedWallet.is_sharded(data):
+            WalletJournal.begin(data)
     
     #Handle backup and overwrite for an existing wallet
     if new_wallet and wallet_exists:
@@ -738,11 +813,11 @@ def generateAddressHelper(filename=None, password=None, totp_code=None, new_wall
                     entries_generated = -1
                     logging.info("Generating deterministic wallet data.")
                     for _ in range(amount):
-                        if index + entries_generated < 256:
+                        if index + entries_generated < ShardedWallet.MAX_ENTRIES:
                             entries_generated += 1
                             generated_data = generate(mnemonic_phrase=mnemonic, passphrase=password, index=index+entries_generated, deterministic=True, wallet_version=wallet_version)
                             wallet_data.append(generated_data)
-                        if index + len(wallet_data) >= 256:
+                        if index + len(wallet_data) >= ShardedWallet.MAX_ENTRIES:
                             if from_gui:
                                 callback_object.post_messagebox("Error", "Maximum wallet entries reached.")
                             else:
@@ -773,11 +848,11 @@ def generateAddressHelper(filename=None, password=None, totp_code=None, new_wall
                         entries_generated = -1
                         logging.info("Generating deterministic wallet data.")
                         for _ in range(amount):
-                            if index + entries_generated < 256:
+                            if index + entries_generated < ShardedWallet.MAX_ENTRIES:
                                 entries_generated += 1
                                 generated_data = generate(mnemonic_phrase=mnemonic, passphrase=password, index=index + entries_generated, deterministic=True, wallet_version=wallet_version)
                                 wallet_data.append(generated_data)
-                            if index + len(wallet_data) >= 256:
+                            if index + len(wallet_data) >= ShardedWallet.MAX_ENTRIES:
                                 if from_gui:
                                     callback_object.post_messagebox("Error", "Maximum wallet entries reached.")
                                 else:
@@ -797,11 +872,11 @@ def generateAddressHelper(filename=None, password=None, totp_code=None, new_wall
                 entries_generated = -1
                 logging.info("Generating non-deterministic wallet data.")
                 for _ in range(amount):
-                    if len(data["wallet_data"]["entry_data"]["entries"]) < 256:
+                    if len(data["wallet_data"]["entry_data"]["entries"]) < ShardedWallet.MAX_ENTRIES:
                         generated_data = generate()
                         wallet_data.append(generated_data)
                         entries_generated += 1
-                    if len(data["wallet_data"]["entry_data"]["entries"]) + len(wallet_data) >= 256:
+                    if len(data["wallet_data"]["entry_data"]["entries"]) + len(wallet_data) >= ShardedWallet.MAX_ENTRIES:
                         
                         if from_gui:
                             callback_object.post_messagebox("Error", "Maximum wallet entries reached.")
@@ -841,8 +916,8 @@ def generateAddressHelper(filename=None, password=None, totp_code=None, new_wall
             # Get number of wallet entries
             index = len(data["wallet_data"]["entry_data"]["entries"])
             
-            # Return None if amount of wallet entries are 256 or more
-            if len(data["wallet_data"]["entry_data"]["entries"]) >= 256:
+            # Return None if the maximum amount of wallet entries has been reached
+            if len(data["wallet_data"]["entry_data"]["entries"]) >= ShardedWallet.MAX_ENTRIES:
                 if from_gui:
                     callback_object.post_messagebox("Error", "Maximum wallet entries reached.")
                 else:
@@ -888,44 +963,103 @@ def generateAddressHelper(filename=None, password=None, totp_code=None, new_wall
             encrypted_data_entry = EncryptDecryptUtils.encrypt_data(json.dumps(encrypted_wallet_data), password, totp_secret, hmac_salt, verification_salt, stored_verifier)
             data["wallet_data"]["entry_data"]["entries"].append(encrypted_data_entry)
         else:
+            new_entries = []
             for item in wallet_data:
                 encrypted_wallet_data = generate_encrypted_wallet_data(item, data, password, totp_secret, hmac_salt, verification_salt, stored_verifier, is_import=is_import)
                 encrypted_data_entry = EncryptDecryptUtils.encrypt_data(json.dumps(encrypted_wallet_data), password, totp_secret, hmac_salt, verification_salt, stored_verifier)
+                new_entries.append(encrypted_data_entry)
                 if not is_import:
                     data["wallet_data"]["entry_data"]["entries"].append(encrypted_data_entry)
                 else:
                     data["wallet_data"]["entry_data"]["imported_entries"].append(encrypted_data_entry)
         
-        # Set HMAC message based on the encrypted wallet data
-        if deterministic:
-            hmac_msg = json.dumps(data["wallet_data"]["entry_data"]["entries"]).encode() + json.dumps(data["wallet_data"]["entry_data"]["key_data"]).encode()
-        else:
-            hmac_msg = json.dumps(data["wallet_data"]["entry_data"]["entries"]).encode()
-        
-        if "imported_entries" in data["wallet_data"]["entry_data"]:
-            hmac_msg = json.dumps(data["wallet_data"]["entry_data"]["imported_entries"]).encode() + hmac_msg
+        if new_wallet:
+            # Set HMAC message based on the encrypted wallet data
+            if deterministic:
+                hmac_msg = json.dumps(data["wallet_data"]["entry_data"]["entries"]).encode() + json.dumps(data["wallet_data"]["entry_data"]["key_data"]).encode()
+            else:
+                hmac_msg = json.dumps(data["wallet_data"]["entry_data"]["entries"]).encode()
+            
+            if "imported_entries" in data["wallet_data"]["entry_data"]:
+                hmac_msg = json.dumps(data["wallet_data"]["entry_data"]["imported_entries"]).encode() + hmac_msg
+
+            # Calculate HMAC for wallet's integrity verification
+            hmac_key = Verification.derive_hmac_key(password, hmac_salt)
+            computed_hmac = Verification.hmac_util(hmac_msg=hmac_msg, verify=False, hmac_key=hmac_key)
+            data["wallet_data"]["hmac"] = base64.b64encode(computed_hmac).decode()
 
-        # Calculate HMAC for wallet's integrity verification
-        computed_hmac = Verification.hmac_util(password=password,hmac_salt=hmac_salt,hmac_msg=hmac_msg,verify=False)
-        data["wallet_data"]["hmac"] = base64.b64encode(computed_hmac).decode()
+            # Index the address of the first entry
+            AddressIndex.add(data, AddressIndex.derive_key(hmac_key), "entries", 0, wallet_data["address"])
     else:
         # Prepare unencrypted data to be saved
         if new_wallet:
             unencrypted_data_entry = generate_unencrypted_wallet_data(wallet_data, data)
             data["wallet_data"]["entry_data"]["entries"].append(unencrypted_data_entry)       
         else:
+            new_entries = []
             for item in wallet_data:
                 unencrypted_data_entry = generate_unencrypted_wallet_data(item, data, is_import=is_import)
+                new_entries.append(unencrypted_data_entry)
                 if not is_import:
                     data["wallet_data"]["entry_data"]["entries"].append(unencrypted_data_entry)
                 else:
                     data["wallet_data"]["entry_data"]["imported_entries"].append(unencrypted_data_entry)
     
-    
-    
-    # Save the updated wallet data back to the file
-    logging.info("Saving data to wallet file.")
-    DataManipulation._save_data(filename, data)
+    if new_wallet:
+        # Save the new wallet data to the file
+        logging.info("Saving data to wallet file.")
+        DataManipulation._save_data(filename, data)
+        if encrypt:
+            # Start the address list of the wallet
+            AddressSidecar.write(filename, hmac_key, {"entries": [[1, wallet_data["address"]]], "imported_entries": []})
+        else:
+            AddressSidecar.remove(filename)
+    else:
+        section = "entries" if not is_import else "imported_entries"
+        hmac_key = None
+        address_tags = None
+        if encrypt:
+            hmac_key = Verification.derive_hmac_key(password, hmac_salt)
+            # Index the addresses of the new entries
+            index_key = AddressIndex.derive_key(hmac_key)
+            first_position = len(data["wallet_data"]["entry_data"][section]) - len(new_entries)
+            address_tags = [AddressIndex.add(data, index_key, section, first_position + position, item["address"]) for position, item in enumerate(wallet_data)]
+
+        total_entries = len(data["wallet_data"]["entry_data"]["entries"]) + len(data["wallet_data"]["entry_data"].get("imported_entries", []))
+        if ShardedWallet.is_sharded(data) or total_entries > ShardedWallet.FLAT_LIMIT:
+            # Wallets beyond the flat limit keep their entries in shards, where only the tail shard is rewritten
+            if not ShardedWallet.is_sharded(data):
+                logging.info("Migrating wallet to the sharded layout.")
+                ShardedWallet.migrate(filename, data)
+            logging.info("Saving data to wallet shards.")
+            ShardedWallet.flush(filename, data)
+            if encrypt:
+                computed_hmac = Verification.hmac_util(hmac_msg=ShardedWallet.hmac_message(data, deterministic), verify=False, hmac_key=hmac_key)
+                data["wallet_data"]["hmac"] = base64.b64encode(computed_hmac).decode()
+            DataManipulation._save_data(filename, data)
+            # Journaled entries were moved into the shards
+            WalletJournal.remove(filename)
+            journal_records = 0
+        else:
+            # Append the new entries to the wallet journal rather than rewriting the wallet file
+            logging.info("Appending data to wallet journal.")
+            journal_records = WalletJournal.append(filename, data, section, new_entries, hmac_key=hmac_key, address_tags=address_tags)
+
+        if encrypt:
+            # Add the new addresses to the address list of the wallet
+            counts = AddressSidecar.counts(data)
+            counts[AddressSidecar.SECTIONS.index(section)] = first_position
+            if not AddressSidecar.append(filename, hmac_key, section, [[first_position + position + 1, item["address"]] for position, item in enumerate(wallet_data)], counts):
+                logging.info("The address list of the wallet is out of date and was not updated.")
+        
+        # Fold the journal back into the wallet file once it has grown large enough
+        if journal_records >= WalletJournal.COMPACTION_THRESHOLD:
+            logging.info("Compacting wallet journal.")
+            if from_gui:
+                # The wallet is read again under the lock, so entries appended before the thread runs are folded in
+                threading.Thread(target=WalletJournal.compact, args=(filename, None, password, hmac_salt if encrypt else None), name="compact_wallet", daemon=True).start()
+            else:
+                WalletJournal.compact(filename, data, password, hmac_salt if encrypt else None)
     
     # Extract the newly generated address to be returned
     if "-verbose" in sys.argv:
@@ -967,7 +1101,600 @@ def generateAddressHelper(filename=None, password=None, totp_code=None, new_wall
     return result
 
  
-def decryptWalletEntries(filename, password, totp_code=None, address=[], fields=[], to_json=False, from_gui = False, show=None, callback_object = None, stop_signal=None):
+def compactWallet(filename, password, totp_code=None, from_gui=False, callback_object=None):
+    """Overview:
+        The `compactWallet` function folds the entries held in the wallet journal back into the wallet file.
+        New addresses of an existing wallet are appended to the journal rather than rewriting the whole
+        wallet file. Compaction rewrites the wallet file once with all of its entries and a freshly computed
+        HMAC, and then removes the journal. For encrypted wallets, the password and 2FA code are verified first.
+
+        Parameters:
+        - filename: The path of the wallet file.
+        - password (str): The password of the wallet. Required for encrypted wallets.
+        - totp_code: An optional Time-based One-Time Password, used for Two-Factor Authentication.
+
+        Returns:
+        - bool: True if the wallet was compacted, None otherwise.
+    """
+    filename = get_normalized_filepath(filename)
+    # Hold the exclusive wallet lock from loading the wallet until the journal is folded into it
+    with WalletLock.exclusive(filename):
+        data, wallet_exists = _load_data(filename, False)
+        if not wallet_exists:
+            DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+            return None
+
+        if "journal_state" not in data:
+            if ShardedWallet.is_sharded(data):
+                print("The wallet is sharded and does not use a wallet journal. Nothing to compact.")
+            else:
+                print("The wallet journal is empty. Nothing to compact.")
+            DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+            return None
+
+        hmac_salt = None
+        if WalletMetadata.from_data(data)["encrypted"]:
+            deterministic = data["wallet_data"]["wallet_type"] == "deterministic"
+            hmac_salt, verification_salt, stored_verifier, _, gui_password = handle_existing_encrypted_wallet(filename, data, password, totp_code, deterministic, from_gui=from_gui, callback_object=callback_object)
+            if not hmac_salt or not verification_salt or not stored_verifier:
+                DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+                return None
+            if from_gui:
+                password = gui_password
+
+        result = WalletJournal.compact(filename, data, password, hmac_salt)
+        if result and not from_gui:
+            print(f"Wallet journal compacted into: {filename}")
+        DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not result])
+        return result
+
+def convertWallet(filename, to_format, output=None):
+    """Overview:
+        The `convertWallet` function converts a wallet file between the JSON format and the binary wallet container
+        format. Wallet containers store the wallet entries as raw ciphertext blobs behind an offset table, which allows
+        individual entries to be read from a memory mapping without parsing the rest of the wallet. The wallet data,
+        including its HMAC, is carried over unchanged, so no authentication is required. The source file is kept.
+
+        Parameters:
+        - filename: The path of the wallet file to convert.
+        - to_format (str): Either 'binary' or 'json'.
+        - output (str, optional): The path of the converted wallet file. Defaults to the source path with the
+          extension of the target format.
+
+        Returns:
+        - str: The path of the converted wallet file, or None if the conversion failed.
+    """
+    filename = get_normalized_filepath(filename)
+    if not os.path.exists(filename):
+        logging.error(f"Wallet file does not exist: {filename}")
+        return None
+
+    to_container = to_format == "binary"
+    if to_container == WalletContainer.is_container(filename):
+        logging.error(f"The wallet file is already in {to_format} format.")
+        return None
+
+    if not output:
+        output = os.path.splitext(filename)[0] + (WalletContainer.EXTENSION if to_container else ".json")
+    else:
+        output = get_normalized_filepath(output)
+
+    if os.path.exists(output):
+        logging.error(f"The destination file already exists: {output}")
+        return None
+
+    if WalletContainer.convert(filename, output, to_container):
+        print(f"Wallet converted to {to_format} format at: {output}")
+        return output
+    return None
+
+def listWalletBackups(filename, directory=None):
+    """Overview:
+        The `listWalletBackups` function lists the backup snapshots of a wallet that are held in the backup store,
+        along with the size of the backed up wallet and the number of files in each snapshot.
+
+        Parameters:
+        - filename: The path of the wallet file.
+        - directory (str, optional): The backup directory. Defaults to `./wallets/wallet_backups`.
+
+        Returns:
+        - list: The snapshot manifests.
+    """
+    filename = get_normalized_filepath(filename)
+    snapshots = BackupStore.list_snapshots(filename, directory)
+    if not snapshots:
+        print(f"No backups found for: {filename}")
+        return snapshots
+    print(f"Backups of {os.path.basename(filename)}:\n")
+    print(f"{'Snapshot':<24}{'Created':<22}{'Files':>6}{'Size':>14}")
+    for snapshot in snapshots:
+        created = datetime.fromtimestamp(snapshot["created"]).strftime('%Y-%m-%d %H:%M:%S')
+        size = sum(item["size"] for item in snapshot["files"])
+        print(f"{snapshot['snapshot']:<24}{created:<22}{len(snapshot['files']):>6}{size:>14}")
+    return snapshots
+
+def restoreWalletBackup(filename, snapshot_id, output=None, directory=None):
+    """Overview:
+        The `restoreWalletBackup` function restores a backup snapshot of a wallet from the backup store. The wallet
+        file is restored together with its journal and shards, and every restored file is checked against the digest
+        recorded in the snapshot. Existing files are never overwritten, so a wallet that still exists must be restored
+        to a different path.
+
+        Parameters:
+        - filename: The path of the wallet file the snapshot was created from.
+        - snapshot_id (str): The id of the snapshot, as shown by `listWalletBackups`.
+        - output (str, optional): The path of the restored wallet file. Defaults to the path of the wallet file.
+        - directory (str, optional): The backup directory. Defaults to `./wallets/wallet_backups`.
+
+        Returns:
+        - str: The path of the restored wallet file, or None if the snapshot could not be restored.
+    """
+    filename = get_normalized_filepath(filename)
+    destination = get_normalized_filepath(output) if output else filename
+    try:
+        BackupStore.restore(filename, snapshot_id, destination, directory)
+    except (OSError, ValueError) as e:
+        logging.error(f"Unable to restore backup: {e}")
+        return None
+    print(f"Backup snapshot {snapshot_id} restored to: {destination}")
+    return destination
+
+def rebuildAddressIndex(filename, password, totp_code=None):
+    """Overview:
+        The `rebuildAddressIndex` function rebuilds the keyed address index of an encrypted wallet. The address index maps
+        a keyed hash of each address to the position of its wallet entry, allowing the `send` and `generate paperwallet`
+        sub-commands to decrypt only the entry of the specified address. Every entry of the wallet is decrypted once to
+        rebuild the index, which is useful for wallets created before the index was introduced. Entries held in the
+        wallet journal are compacted into the wallet file in the process. The address list of the wallet, which holds the
+        id and address of every entry, is rebuilt as well.
+
+        Parameters:
+        - filename: The path of the wallet file.
+        - password (str): The password of the wallet.
+        - totp_code: An optional Time-based One-Time Password, used for Two-Factor Authentication.
+
+        Returns:
+        - bool: True if the address index was rebuilt, None otherwise.
+    """
+    wallet_exists, filename, encrypted = initialize_wallet(filename)
+    if not wallet_exists:
+        return None
+
+    if not encrypted:
+        print("The address index is only used by encrypted wallets.")
+        return None
+
+    data, session = open_wallet_session(filename, password, totp_code)
+    if session is None:
+        DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+        return None
+
+    # Collect the id and address of every entry, in the order of the entries
+    addresses = {"entries": [], "imported_entries": []}
+    for entry_type, entry in iter_wallet_entries(data, session, fields=['id', 'address'], progress=_print_decryption_progress, use_sidecar=False):
+        addresses[entry_type].append([entry["id"], entry["address"]])
+    if session["error"]:
+        DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+        return None
+
+    # Hold the exclusive wallet lock from loading the wallet until the index is saved
+    with WalletLock.exclusive(filename):
+        data, _ = _load_data(filename, False)
+        hmac_salt = base64.b64decode(data["wallet_data"]["hmac_salt"])
+        hmac_key = Verification.derive_hmac_key(password, hmac_salt)
+        index_key = AddressIndex.derive_key(hmac_key)
+        data["wallet_data"]["address_index"] = {}
+        for entry_type in ["entries", "imported_entries"]:
+            for position, (_, entry_address) in enumerate(addresses[entry_type]):
+                AddressIndex.add(data, index_key, entry_type, position, entry_address)
+        entry_count = len(data["wallet_data"]["address_index"])
+        AddressSidecar.write(filename, hmac_key, addresses)
+
+        # The index of a sharded wallet is stored in index buckets next to the shards
+        if ShardedWallet.is_sharded(data):
+            ShardedWallet.clear_address_index(filename)
+            ShardedWallet.flush(filename, data)
+            DataManipulation._save_data(filename, data)
+            result = True
+        # The index of journaled entries can only be persisted in the wallet file
+        elif data.get("journal_state", {}).get("records"):
+            result = WalletJournal.compact(filename, data, password, hmac_salt)
+        else:
+            DataManipulation._save_data(filename, data)
+            result = True
+
+    if result:
+        print(f"Address index and address list rebuilt for {entry_count} wallet {'entry' if entry_count == 1 else 'entries'}.")
+    DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not result])
+    return result
+
+def exportWatchOnly(filename, password, totp_code=None, output=None):
+    """Overview:
+        The `exportWatchOnly` function writes a watch-only copy of a wallet. The watch-only wallet holds the id, address and
+        label of every wallet entry, and no private keys or mnemonics. It is stored unencrypted, so the `balance` sub-command
+        and the GUI can open it without a password and without any key derivation, which makes it suitable for unattended
+        monitoring. The addresses of encrypted wallets are read from their address list when it is available. Labels of an
+        existing watch-only wallet at the destination are kept.
+
+        Parameters:
+        - filename: The path of the wallet file.
+        - password (str): The password of the wallet. Required if the wallet is encrypted.
+        - totp_code: An optional Time-based One-Time Password, used for Two-Factor Authentication.
+        - output (str, optional): The path of the watch-only wallet. Defaults to '[WalletName]_watchonly.json' next to
+          the wallet file.
+
+        Returns:
+        - str: The path of the watch-only wallet, or None if it could not be exported.
+    """
+    wallet_exists, filename, encrypted = initialize_wallet(filename)
+    if not wallet_exists:
+        return None
+
+    if encrypted and not password:
+        logging.error("Wallet is encrypted. A password is required.")
+        return None
+
+    output = get_normalized_filepath(output) if output else WatchOnlyWallet.default_path(filename)
+    if WalletContainer.uses_container(output):
+        logging.error("Watch-only wallets are stored in the JSON format.")
+        return None
+    if os.path.normpath(output) == os.path.normpath(filename):
+        logging.error("The watch-only wallet can not replace the wallet it is exported from.")
+        return None
+
+    # Never overwrite a wallet that holds private keys
+    output_metadata = WalletMetadata.read(output)
+    if os.path.exists(output) and (output_metadata is None or output_metadata["wallet_type"] != WatchOnlyWallet.WALLET_TYPE):
+        logging.error(f"The destination file already exists and is not a watch-only wallet: {output}")
+        return None
+
+    data, session = open_wallet_session(filename, password, totp_code, include_mnemonic=False)
+    if session is None:
+        DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+        return None
+
+    if WatchOnlyWallet.is_watch_only(data):
+        logging.error("The wallet is already a watch-only wallet.")
+        return None
+
+    addresses = {"entries": [], "imported_entries": []}
+    for entry_type, entry in iter_wallet_entries(data, session, fields=['id', 'address'], progress=_print_decryption_progress):
+        addresses[entry_type].append([entry["id"], entry["address"]])
+    if session["error"]:
+        DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+        return None
+
+    DataManipulation._save_data(output, WatchOnlyWallet.build(filename, addresses, WatchOnlyWallet.read_labels(output)))
+    entry_count = len(addresses["entries"]) + len(addresses["imported_entries"])
+    print(f"Watch-only wallet with {entry_count} {'entry' if entry_count == 1 else 'entries'} exported to: {output}")
+    result = output
+    DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not result])
+    return result
+
+def open_wallet_session(filename, password, totp_code=None, data=None, from_gui=False, callback_object=None, include_mnemonic=True):
+    """Overview:
+        The `open_wallet_session` function unlocks a wallet once so that its entries can be read with `iter_wallet_entries`.
+        For encrypted wallets, the password, HMAC and Two-Factor Authentication are verified by `handle_existing_encrypted_wallet`,
+        and the resulting cryptographic parameters are kept in the session. The master mnemonic of deterministic wallets is
+        decrypted as well, unless `include_mnemonic` is False, in which case it is decrypted by `load_session_mnemonic` when
+        it is first needed.
+
+        Parameters:
+        - filename: The path of the wallet file.
+        - password (str): The password of the wallet.
+        - totp_code: An optional Time-based One-Time Password, used for Two-Factor Authentication.
+        - data (dict, optional): Wallet data that has already been loaded.
+        - include_mnemonic (bool, optional): Whether to decrypt the master mnemonic of deterministic wallets.
+
+        Returns:
+        - tuple: The wallet data and the wallet session, or (None, None) if the wallet could not be loaded or unlocked.
+    """
+    if data is None:
+        data, wallet_exists = _load_data(filename, False)
+        if not wallet_exists:
+            DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+            return None, None
+
+    deterministic = "wallet_type" in data["wallet_data"] and data["wallet_data"]["wallet_type"] == "deterministic"
+    session = {
+        "encrypted": WalletMetadata.from_data(data)["encrypted"],
+        "deterministic": deterministic,
+        "wallet_version": data["wallet_data"]["version"],
+        "password": password,
+        "totp_secret": None,
+        "hmac_salt": None,
+        "verification_salt": None,
+        "stored_verifier": None,
+        "filename": filename,
+        "hmac_key": None,
+        "addresses": None,
+        "mnemonic": None,
+        "unmatched_addresses": set(),
+        "error": None
+    }
+
+    # Extract cryptographic components for encrypted wallets
+    if session["encrypted"]:
+        hmac_salt, verification_salt, stored_verifier, totp_secret, unlocked_password = handle_existing_encrypted_wallet(filename, data, password, totp_code, deterministic, from_gui=from_gui, callback_object=callback_object)
+        if not all([hmac_salt, verification_salt, stored_verifier]):
+            DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+            return None, None
+        session.update({"hmac_salt": hmac_salt, "verification_salt": verification_salt, "stored_verifier": stored_verifier, "totp_secret": totp_secret})
+        if from_gui:
+            session["password"] = unlocked_password
+
+    if include_mnemonic and deterministic and not load_session_mnemonic(data, session):
+        DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+        return None, None
+
+    result = data, session
+    DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not result and var is not data and var is not session])
+    return result
+
+def load_session_mnemonic(wallet, session, from_gui=False, callback_object=None, stop_signal=None):
+    """Overview:
+        Returns the master mnemonic of a deterministic wallet, decrypting it on first use and keeping it in the wallet session.
+
+        Parameters:
+        - wallet (dict): The wallet data.
+        - session (dict): The wallet session returned by `open_wallet_session`.
+
+        Returns:
+        - str: The master mnemonic, or None if it could not be decrypted.
+    """
+    if not session["mnemonic"]:
+        if session["encrypted"]:
+            session["mnemonic"] = decrypt_and_parse_mnemonic(wallet["wallet_data"]["entry_data"]["key_data"], session["password"], session["totp_secret"], session["hmac_salt"], session["verification_salt"], session["stored_verifier"], from_gui=from_gui, callback_object=callback_object, stop_signal=stop_signal)
+        else:
+            session["mnemonic"] = wallet["wallet_data"]["entry_data"]["master_mnemonic"]
+    return session["mnemonic"]
+
+def load_session_hmac_key(session):
+    """
+    Returns the HMAC key of an unlocked encrypted wallet, deriving it on first use and keeping it in the wallet session.
+    """
+    if session["hmac_key"] is None:
+        session["hmac_key"] = Verification.derive_hmac_key(session["password"], session["hmac_salt"])
+    return session["hmac_key"]
+
+def open_history_store(filename, session):
+    """
+    Opens the history store of an unlocked wallet. The store of an encrypted wallet is keyed with a key derived
+    from the wallet's HMAC key. Returns None if the store can not be opened.
+    """
+    key = HistoryStore.derive_key(load_session_hmac_key(session)) if session["encrypted"] else None
+    return HistoryStore.open(filename, key)
+
+def load_session_addresses(wallet, session):
+    """Overview:
+        Returns the address list of an unlocked encrypted wallet, reading it on first use and keeping it in the wallet session.
+        The address list is read with a single key derivation, without decrypting any wallet entry.
+
+        Parameters:
+        - wallet (dict): The wallet data.
+        - session (dict): The wallet session returned by `open_wallet_session`.
+
+        Returns:
+        - dict: Maps 'entries' and 'imported_entries' to lists of [id, address] pairs, or None if the wallet has no
+          address list that matches its entries.
+    """
+    if not session["encrypted"]:
+        return None
+    if session["addresses"] is None:
+        session["addresses"] = AddressSidecar.read(session["filename"], load_session_hmac_key(session), AddressSidecar.counts(wallet)) or False
+        if not session["addresses"] and os.path.exists(AddressSidecar.path(session["filename"])):
+            logging.warning("The address list of the wallet is out of date. It can be rebuilt using the 'rebuildindex' command.")
+    return session["addresses"] or None
+
+def locate_wallet_address(wallet, session, address):
+    """Overview:
+        Finds the wallet entry of an address without decrypting any wallet entry, using the address index of the wallet
+        and falling back to its address list.
+
+        Parameters:
+        - wallet (dict): The wallet data.
+        - session (dict): The wallet session returned by `open_wallet_session`.
+        - address (str): The address to locate.
+
+        Returns:
+        - tuple: The section and position of the entry, or None if the address could not be located.
+    """
+    if not session["encrypted"]:
+        return None
+    if wallet["wallet_data"].get("address_index") or ShardedWallet.is_sharded(wallet):
+        location = AddressIndex.lookup(wallet, AddressIndex.derive_key(load_session_hmac_key(session)), address)
+        if location:
+            return location
+    addresses = load_session_addresses(wallet, session)
+    if addresses:
+        for section in AddressSidecar.SECTIONS:
+            for position, (_, entry_address) in enumerate(addresses[section]):
+                if entry_address == address:
+                    return section, position
+    return None
+
+def _decrypt_wallet_entry(entry, is_import, session, fields):
+    """
+    Decrypts a single entry of an encrypted wallet and derives the requested fields from it.
+    """
+    password, totp_secret, hmac_salt, verification_salt, stored_verifier = session["password"], session["totp_secret"], session["hmac_salt"], session["verification_salt"], session["stored_verifier"]
+
+    # Decrypt entry data
+    entry_with_encrypted_values = json.loads(EncryptDecryptUtils.decrypt_data(entry, password, totp_secret, hmac_salt, verification_salt, stored_verifier))
+
+    # Decrypt the 'id', 'mnemonic' and 'private_key' fields
+    if 'id' in entry_with_encrypted_values:
+        decrypted_id = EncryptDecryptUtils.decrypt_data(entry_with_encrypted_values['id'], password, totp_secret, hmac_salt, verification_salt, stored_verifier)
+        entry_with_encrypted_values['id'] = int(decrypted_id)
+
+    if 'mnemonic' in entry_with_encrypted_values:
+        decrypted_mnemonic = EncryptDecryptUtils.decrypt_data(entry_with_encrypted_values['mnemonic'], password, totp_secret, hmac_salt, verification_salt, stored_verifier)
+        entry_with_encrypted_values['mnemonic'] = decrypted_mnemonic
+
+    if 'private_key' in entry_with_encrypted_values:
+        decrypted_private_key = EncryptDecryptUtils.decrypt_data(entry_with_encrypted_values['private_key'], password, totp_secret, hmac_salt, verification_salt, stored_verifier)
+        entry_with_encrypted_values['private_key'] = decrypted_private_key
+
+    # Generate data fields based on the deterministic flag
+    if not is_import:
+        if session["deterministic"]:
+            # Generate data for deterministic wallet with index
+            generated_data = generate(mnemonic_phrase=session["mnemonic"], passphrase=password, index=entry_with_encrypted_values['id'] - 1, deterministic=True, fields=fields, wallet_version=session["wallet_version"])
+            if "mnemonic" in generated_data:
+                del generated_data["mnemonic"]
+        else:
+            # Generate data for non-deterministic wallet without index
+            generated_data = generate(mnemonic_phrase=entry_with_encrypted_values['mnemonic'], deterministic=False, fields=fields, wallet_version=session["wallet_version"])
+    else:
+        # Generate data from private key for imported entries
+        generated_data = generate_from_private_key(private_key_hex=entry_with_encrypted_values["private_key"], fields=fields)
+        generated_data["is_import"] = True
+
+    generated_data["id"] = entry_with_encrypted_values['id']
+    DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not generated_data])
+    return generated_data
+
+def _print_decryption_progress(entry_count, entry_total, record):
+    print(f"\rDecrypting wallet entry {entry_count} of {entry_total}", end='')
+    if entry_count >= entry_total:
+        print("\r\n",end='')
+
+def iter_wallet_entries(wallet, session, fields=None, show=None, address=None, entry_positions=None, progress=None, use_sidecar=True):
+    """Overview:
+        The `iter_wallet_entries` generator yields the entries of an unlocked wallet as they are decrypted, so that callers
+        can process each entry without waiting for the whole wallet to be decrypted. Entries of sharded wallets are read one
+        shard at a time, and entries of wallet containers one entry at a time. Entries of unencrypted wallets are yielded as
+        they are stored. If only the 'id' and 'address' fields are requested from an encrypted wallet, they are read from the
+        address list of the wallet instead, so that no entry has to be decrypted.
+
+        Address filters work as in `decryptWalletEntries`: addresses prefixed with '-' are excluded, and if any other
+        addresses are given, only their entries are yielded. Once every entry has been read, the addresses that were not
+        found are logged and kept in the session. If an entry can not be read, e.g. because a shard is corrupted, the error
+        is logged, kept in the session, and no further entries are yielded.
+
+        Parameters:
+        - wallet (dict): The wallet data returned by `open_wallet_session`.
+        - session (dict): The wallet session returned by `open_wallet_session`.
+        - fields (list of str, optional): The fields of each entry record. Defaults to every field.
+        - show (str, optional): 'generated' or 'imported' to only yield the entries of that origin.
+        - address (list of str, optional): Addresses to include or exclude.
+        - entry_positions (dict, optional): Maps 'entries' and/or 'imported_entries' to the positions of the only
+          entries to decrypt. Every other entry is skipped without being read.
+        - progress (callable, optional): Called with the number of entries decrypted so far, the number of entries to
+          decrypt and the entry record, after each entry of an encrypted wallet is decrypted.
+        - use_sidecar (bool, optional): Whether the address list of the wallet may be used. Defaults to True.
+
+        Yields:
+        - tuple: The entry type ('entries' or 'imported_entries') and an OrderedDict with the requested fields of the entry.
+    """
+    fields = list(fields) if fields else ["mnemonic", "id", "private_key", "public_key", "address", "is_import"]
+    ordered_fields = [field for field in ["id", "mnemonic", "private_key", "public_key", "address", "label"] if field in fields]
+    address = address or []
+    include_addresses = set(addr for addr in address if not addr.startswith("-"))
+    exclude_addresses = set(addr[1:] for addr in address if addr.startswith("-"))
+    unmatched_addresses = include_addresses | exclude_addresses
+    # The address is derived for filtering even if it is not part of the record
+    if address and 'address' not in fields:
+        fields.append('address')
+
+    # Select the entries to read
+    entry_data = wallet["wallet_data"]["entry_data"]
+    addresses = None
+    if use_sidecar and session["encrypted"] and entry_positions is None and set(fields) <= {"id", "address", "label", "is_import"}:
+        addresses = load_session_addresses(wallet, session)
+    if addresses:
+        entry_data = addresses
+    selection = []
+    for entry_type in ["entries", "imported_entries"]:
+        if (show == "imported" and entry_type == "entries") or (show == "generated" and entry_type == "imported_entries"):
+            continue
+        entries = entry_data.get(entry_type, [])
+        if entry_positions is not None:
+            positions = [position for position in sorted(entry_positions.get(entry_type, ())) if position < len(entries)]
+            selection.append((entry_type, map(entries.__getitem__, positions), len(positions)))
+        elif entries:
+            selection.append((entry_type, iter(entries), len(entries)))
+    entry_total = sum(count for _, _, count in selection)
+
+    if not addresses and session["deterministic"] and any(entry_type == "entries" for entry_type, _, count in selection if count) and not load_session_mnemonic(wallet, session):
+        return
+
+    entry_count = 0
+    yielded = 0
+    try:
+        for entry_type, entries, _ in selection:
+            is_import = entry_type == "imported_entries"
+            for entry in entries:
+                # Decrypt the entry only if the wallet is encrypted and its address list is not used
+                if addresses:
+                    decrypted_entry = {"id": entry[0], "address": entry[1]}
+                elif session["encrypted"]:
+                    decrypted_entry = _decrypt_wallet_entry(entry, is_import, session, fields)
+                    entry_count += 1
+                    if progress:
+                        progress(entry_count, entry_total, decrypted_entry)
+                else:
+                    decrypted_entry = entry
+
+                # Filter by address
+                entry_address = decrypted_entry.get("address")
+                if address and entry_address:
+                    if entry_address in exclude_addresses:
+                        unmatched_addresses.discard(entry_address)
+                        continue
+                    elif include_addresses:
+                        if entry_address not in include_addresses:
+                            continue
+                        unmatched_addresses.discard(entry_address)
+
+                # Order and filter by specific fields
+                yielded += 1
+                yield entry_type, OrderedDict((field, decrypted_entry[field]) for field in ordered_fields if field in decrypted_entry)
+    except ValueError as e:
+        logging.error(f"Unable to read the wallet entries: {e}")
+        session["error"] = str(e)
+        return
+
+    # Generate warnings after all entries have been processed
+    if address:
+        session["unmatched_addresses"] = unmatched_addresses
+        if unmatched_addresses:
+            logging.warning(f"The following {'address was' if len(unmatched_addresses) == 1 else 'addresses were'} not found: {', '.join(unmatched_addresses)}")
+        if not yielded:
+            logging.warning("All wallet entries have been excluded by the filter. The output will contain no entries.")
+
+def _unlock_gui_entry(wallet, session, callback_object):
+    """
+    Decrypts the wallet entry of the address being used by the GUI, if its private key is not loaded yet, and adds the
+    decrypted fields to the stored entry.
+    """
+    if WatchOnlyWallet.is_watch_only(wallet):
+        callback_object.post_messagebox("Error", "Watch-only wallets do not hold private keys.")
+        return None
+    address = callback_object.root.stored_data.unlock_address
+    stored_entry = callback_object.root.wallet_operations.get_entry_data(address)
+    if not stored_entry:
+        return None
+    stored_entry = stored_entry[0]
+    if "private_key" in stored_entry:
+        return True
+    location = locate_wallet_address(wallet, session, address)
+    attempts = [{location[0]: [location[1]]}, None] if location else [None]
+    for entry_positions in attempts:
+        records = iter_wallet_entries(wallet, session, entry_positions=entry_positions)
+        for _, entry in records:
+            if entry["address"] == address:
+                stored_entry.update(entry)
+                break
+        records.close()
+        if "private_key" in stored_entry or session["error"]:
+            break
+    if "private_key" not in stored_entry:
+        callback_object.post_messagebox("Error", f"Unable to decrypt the wallet entry of {address}.")
+        return None
+    return True
+
+def decryptWalletEntries(filename, password, totp_code=None, address=[], fields=[], to_json=False, from_gui = False, show=None, callback_object = None, stop_signal=None, entry_positions=None):
     """Overview:
         The `decryptWalletEntries` function decrypts wallet entries from an encrypted file. It supports both deterministic 
         and non-deterministic wallet types and executes multiple steps for processing wallet data.
@@ -981,7 +1708,8 @@ def decryptWalletEntries(filename, password, totp_code=None, address=[], fields=
         
         The core decryption process involves iterating through each entry in the wallet data. The decryption relies on the 
         function `decrypt_data`, which performs the multi-layered decryption process, which includes the ChaCha20-Poly1305 
-        and AES-GCM decryption layers.
+        and AES-GCM decryption layers. Entries are decrypted one at a time by the `iter_wallet_entries` generator, using
+        the cryptographic parameters of the wallet session returned by `open_wallet_session`.
     
         For deterministic wallets, the master mnemonic phrase is decrypted using the `decrypt_and_parse_mnemonic`function. 
         Following decryption, the master mnemonic is utilized, along with a user-defined password, and an entry id which, as 
@@ -1023,6 +1751,8 @@ def decryptWalletEntries(filename, password, totp_code=None, address=[], fields=
         - fields (list of str, optional): Fields to decrypt and return.
         - to_json (bool, optional): If True, outputs a JSON string; otherwise, returns a dictionary.
         - show (str, optional): Option to show 'imported', 'generated', or all entries.
+        - entry_positions (dict, optional): Maps 'entries' and/or 'imported_entries' to the positions of the only
+          entries to decrypt. Every other entry is skipped without being read.
     
     Returns:
         - dict or str: Decrypted wallet entries as a dictionary or a JSON string, formatted according to the 'pretty' 
@@ -1041,8 +1771,7 @@ def decryptWalletEntries(filename, password, totp_code=None, address=[], fields=
         return None
 
     # Check if wallet data is encrypted and initialize flags
-    data_segment = json.dumps(data["wallet_data"])
-    is_encrypted = is_wallet_encrypted(data_segment)
+    is_encrypted = WalletMetadata.from_data(data)["encrypted"]
     deterministic = "wallet_type" in data["wallet_data"] and data["wallet_data"]["wallet_type"] == "deterministic"
 
     # Count total entries including imported ones
@@ -1050,60 +1779,43 @@ def decryptWalletEntries(filename, password, totp_code=None, address=[], fields=
     imported_entries_length = len(data["wallet_data"]["entry_data"].get("imported_entries", []))
     combined_length = index + imported_entries_length
     
-    wallet_version = data['wallet_data']['version']
-    
-    # Extract cryptographic components for encrypted wallets
-    if is_encrypted:
+    # Unlock the wallet once for all of its entries
+    data, session = open_wallet_session(filename, password, totp_code, data=data, from_gui=from_gui, callback_object=callback_object, include_mnemonic=False)
+    if session is None:
         if from_gui:
-            hmac_salt, verification_salt, stored_verifier, totp_secret, password = handle_existing_encrypted_wallet(filename, data, password, totp_code, deterministic, from_gui=from_gui, callback_object=callback_object)
-            
-        else:
-            hmac_salt, verification_salt, stored_verifier, totp_secret, _ = handle_existing_encrypted_wallet(filename, data, password, totp_code, deterministic)
-            
-        if not all([hmac_salt, verification_salt, stored_verifier]):
-            if from_gui:
-                callback_object.root.stored_data.wallet_authenticated = False
-            DataManipulation.secure_delete([var for var in locals().values() if var is not None])
-            return None
-        else:
-            if from_gui:
-                callback_object.root.stored_data.wallet_authenticated = True
-                callback_object.root.title(f"{wallet_client_version} GUI ({filename})")
-                if callback_object.get_operation_mode() == "send":
-                    DataManipulation.secure_delete([var for var in locals().values() if var is not None])
-                    return True
-                else:
-                    callback_object.clear_wallet_data()
+            callback_object.root.stored_data.wallet_authenticated = False
+        DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+        return None
 
-        # Handle warnings based on wallet size and command-line arguments
-        if 'send' in sys.argv:
-            print("\nA private key is required to send funds. \nSince a private key has not been provided, the wallet client will attempt to decrypt each entry in the wallet file until it finds the private key associated with the address specified. \nYou can use the '-private-key' argument to make this process alot faster. However, doing this is not secure and can put your funds at risk.\n")
-        
-        if index + imported_entries_length >= 32:
-            logging.warning(f"The encrypted wallet file contains {index} entries and is quite large. Decryption {'and balance requests ' if 'balance' in sys.argv else ''}may take a while.\n")
-    
-    elif from_gui:
+    if from_gui:
         callback_object.root.stored_data.wallet_authenticated = True
-        callback_object.root.title(f"{wallet_client_version} GUI ({filename})")
-        if callback_object.get_operation_mode() == "send":
-            DataManipulation.secure_delete([var for var in locals().values() if var is not None])
-            return True
+        callback_object.root.title(f"{wallet_client_version} GUI ({filename}){' [Watch-Only]' if WatchOnlyWallet.is_watch_only(data) else ''}")
+        if callback_object.get_operation_mode() in ["send", "address_info"]:
+            # Only the entry of the address being used has to be decrypted
+            result = _unlock_gui_entry(data, session, callback_object)
+            DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not result])
+            return result
         else:
             callback_object.clear_wallet_data()
-               
-    elif index + imported_entries_length >= 32 and 'balance' in sys.argv:
-        logging.warning(f"The wallet file contains {index} entries and is quite large. Balance requests may take a while.\n")
+
+    # Handle warnings based on wallet size
+    elif is_encrypted and combined_length >= 32:
+        logging.warning(f"The encrypted wallet file contains {index} entries and is quite large. Decryption may take a while.\n")
     
     if from_gui:
+        # The GUI only lists addresses, which are read from the address list of encrypted wallets when it is available.
+        # Private keys are decrypted when an address is used.
+        if is_encrypted and load_session_addresses(data, session):
+            fields = ["id", "address", "is_import"]
         include_mnemonic = 0
         callback_object.root.stored_data.entry_count = combined_length
-        if is_encrypted and deterministic:
+        if is_encrypted and deterministic and fields != ["id", "address", "is_import"]:
             include_mnemonic = 12
         callback_object.configure_progress_bar(max_value=combined_length+include_mnemonic)
 
     # Special case: If only 'mnemonic' is requested and the wallet is deterministic
     if fields == ["mnemonic"] and deterministic:
-        master_mnemonic = decrypt_and_parse_mnemonic(data["wallet_data"]["entry_data"]["key_data"], password, totp_secret, hmac_salt, verification_salt, stored_verifier, from_gui=from_gui, callback_object=callback_object, stop_signal=stop_signal) if is_encrypted else data["wallet_data"]["entry_data"]["master_mnemonic"]
+        master_mnemonic = load_session_mnemonic(data, session, from_gui=from_gui, callback_object=callback_object, stop_signal=stop_signal)
         if master_mnemonic:
             master_mnemonic_json = json.dumps({"entry_data": {"master_mnemonic": master_mnemonic}}, indent=4)
             print(f"Wallet Data for: {filename}")
@@ -1115,8 +1827,8 @@ def decryptWalletEntries(filename, password, totp_code=None, address=[], fields=
             return None
 
     mnemonic = ""
-    if deterministic:
-        mnemonic = decrypt_and_parse_mnemonic(data["wallet_data"]["entry_data"]["key_data"], password, totp_secret, hmac_salt, verification_salt, stored_verifier, from_gui=from_gui, callback_object=callback_object, stop_signal=stop_signal) if is_encrypted else data["wallet_data"]["entry_data"]["master_mnemonic"]
+    if deterministic and not (from_gui and fields == ["id", "address", "is_import"]):
+        mnemonic = load_session_mnemonic(data, session, from_gui=from_gui, callback_object=callback_object, stop_signal=stop_signal)
         if not mnemonic:
             DataManipulation.secure_delete([var for var in locals().values() if var is not None])
             return None
@@ -1126,160 +1838,50 @@ def decryptWalletEntries(filename, password, totp_code=None, address=[], fields=
         
     generated_entries = []
     imported_entries = []
-    fields = fields or ["mnemonic", "id", "private_key", "public_key", "address", "is_import"]
-    ordered_fields = ["id", "mnemonic", "private_key", "public_key", "address"]
-    
-    entry_count = 0
-    max_entry_count = combined_length
-    
-
-    # Define a function to handle entry decryption and data generation
-    def handle_entry_decryption(entry, is_import):
-        # Decrypt entry data
-        entry_with_encrypted_values = json.loads(EncryptDecryptUtils.decrypt_data(entry, password, totp_secret, hmac_salt, verification_salt, stored_verifier)) if is_encrypted else entry
-
-        # Decrypt the 'id' field for all entries if the wallet is encrypted
-        if 'id' in entry_with_encrypted_values and is_encrypted:
-            decrypted_id = EncryptDecryptUtils.decrypt_data(entry_with_encrypted_values['id'], password, totp_secret, hmac_salt, verification_salt, stored_verifier)
-            entry_with_encrypted_values['id'] = int(decrypted_id)
-
-        # Decrypt the 'mnemonic' field if the wallet is encrypted
-        if 'mnemonic' in entry_with_encrypted_values and is_encrypted:
-            decrypted_mnemonic = EncryptDecryptUtils.decrypt_data(entry_with_encrypted_values['mnemonic'], password, totp_secret, hmac_salt, verification_salt, stored_verifier)
-            entry_with_encrypted_values['mnemonic'] = decrypted_mnemonic
-
-        if 'private_key' in entry_with_encrypted_values and is_encrypted:
-            decrypted_private_key = EncryptDecryptUtils.decrypt_data(entry_with_encrypted_values['private_key'], password, totp_secret, hmac_salt, verification_salt, stored_verifier)
-            entry_with_encrypted_values['private_key'] = decrypted_private_key
-
-        # Generate data fields based on the deterministic flag
-        generated_data = {}
-
-        if not is_import:
-            if deterministic:
-                # Generate data for deterministic wallet with index
-                generated_data = generate(mnemonic_phrase=mnemonic, passphrase=password, index=entry_with_encrypted_values['id'] - 1, deterministic=deterministic, fields=fields, wallet_version=wallet_version)
-                if "mnemonic" in generated_data:
-                    del generated_data["mnemonic"]
-                
-                generated_data["id"] = entry_with_encrypted_values['id']                
+    fields = fields or ["mnemonic", "id", "private_key", "public_key", "address", "label", "is_import"]
 
-            else:
-                # Generate data for non-deterministic wallet without index
-                generated_data = generate(mnemonic_phrase=entry_with_encrypted_values['mnemonic'], deterministic=deterministic, fields=fields, wallet_version=wallet_version)
-        else:
-            # Generate data from private key for imported entries
-            generated_data = generate_from_private_key(private_key_hex=entry_with_encrypted_values["private_key"], fields=fields)
-            generated_data["is_import"] = True
-
-        generated_data["id"] = entry_with_encrypted_values['id']
-        return generated_data
-
-    # Check if address filtering is applied
-    address_filtering_applied = bool(address) and 'address' not in fields
-    if address_filtering_applied:
-        fields.append('address')
-        
-    if show == "imported":
-        combined_length -= index
-    if show == "generated":
-        combined_length -= imported_entries_length   
-    
-
-
-    address_found = False
-    # Main loop for processing entry_data object array
-    for entry_type, entries in data["wallet_data"]["entry_data"].items():
-        # Exclude key_data and master_mnemonic from loop
-        if entry_type not in ["key_data", "master_mnemonic"]:
-            # Seconary nested loop for processing entries
-            for entry in entries:
-                is_import = entry_type == "imported_entries"
-                # Skip decryption and processing if the entry type doesn't match the 'show' parameter
-                if (show == "imported" and not is_import) or (show == "generated" and is_import):
-                    continue
-                # Decrypt the entry only if the wallet is encrypted
-                if is_encrypted:
-                    if entry_count < max_entry_count:
-                        entry_count += 1
-                    decrypted_entry = handle_entry_decryption(entry, is_import)
-                    # Handle decrypted entries when using the 'send' or 'generate paperwallet' sub-commands
-                    if 'send' in sys.argv or 'paperwallet' in sys.argv:
-                        if not from_gui:
-                            print(f"\rDecrypting wallet entry {entry_count} of {combined_length} | Address: {decrypted_entry['address']}", end='')
-                        if address[0] in decrypted_entry['address']:
-                            print("\nAddress Found.\n")                                      
-                            if is_import:
-                                imported_entries.clear()
-                                imported_entries.append(decrypted_entry)
-                            else:
-                                generated_entries.clear()
-                                generated_entries.append(decrypted_entry)
-                            address_found = True
-                            break
-                        else:
-                            if is_import:
-                                imported_entries.clear()
-                            else:
-                                generated_entries.clear()
-                    else:
-                        if not from_gui:
-                            print(f"\rDecrypting wallet entry {entry_count} of {combined_length}", end='')
-                            if entry_count >= combined_length:
-                                print("\r\n",end='')
-                    if from_gui:
-                        if stop_signal.is_set():
-                            #print("Loop 2 inner break 1")
-                            break
-                        else:
-                            #print("Loop 2 still running")
-                            callback_object.root.stored_data.progress_bar_increment = True
-                            time.sleep(0.01)
-                            if not callback_object.set_wallet_data(decrypted_entry, is_import=is_import, stop_signal=stop_signal):
-                                #print("Loop 2 inner break 1-2")
-                                break
-                else:
-                    # For non-encrypted wallets, use the entry as-is
-                    decrypted_entry = entry
-                    if is_import:
-                        decrypted_entry["is_import"] = True
-                    if from_gui:
-                        if stop_signal.is_set():
-                            #print("Loop 2 inner break 2-1")
-                            break
-                        else:
-                            #print("Loop 2 still running")
-                            callback_object.root.stored_data.progress_bar_increment = True
-                            time.sleep(0.01)
-                            if not callback_object.set_wallet_data(decrypted_entry, is_import=is_import, stop_signal=stop_signal):
-                                #print("Loop 2 inner break 2-2")
-                                break
-
-                # Order and filter by specific fields
-                filtered_entry = OrderedDict((field, decrypted_entry[field]) for field in ordered_fields if field in decrypted_entry and field in fields)
-                
-                # Append to the appropriate list
-                if is_import:
-                    imported_entries.append(filtered_entry)
-                else:
-                    generated_entries.append(filtered_entry)
-                
-                if from_gui:
-                    if stop_signal.is_set():
-                        #print("Loop 2 outer break")
-                        break
-                    #else:
-                    #    print("Loop 2 still running")
+    # Decrypt only the entries of the included addresses if they can be located without decryption
+    include_addresses = [addr for addr in address if not addr.startswith("-")] if address else []
+    if is_encrypted and include_addresses and entry_positions is None and not set(fields) <= {"id", "address", "is_import"}:
+        locations = [locate_wallet_address(data, session, addr) for addr in include_addresses]
+        if all(locations):
+            entry_positions = {}
+            for entry_type, position in locations:
+                entry_positions.setdefault(entry_type, []).append(position)
 
+    if from_gui:
+        # The last known balances are shown as the entries are listed, before any request to the node
+        snapshot_key = BalanceSnapshot.derive_key(load_session_hmac_key(session)) if is_encrypted else None
+        callback_object.set_balance_snapshot(BalanceSnapshot.read(filename, snapshot_key), snapshot_key)
+        callback_object.set_history_store(open_history_store(filename, session))
+
+    # Main loop for processing the entry records as they are decrypted
+    records = iter_wallet_entries(data, session, fields=fields, show=show, address=address, entry_positions=entry_positions, progress=None if from_gui else _print_decryption_progress)
+    for entry_type, entry in records:
+        is_import = entry_type == "imported_entries"
         if from_gui:
             if stop_signal.is_set():
-                #print("Loop 1 outer break")
                 break
-            #else:
-            #    print("Loop 1 still running")
-            
-        if address_found:
-            break
+            # The GUI advances the progress bar as it adds the queued entries
+            if not callback_object.set_wallet_data(entry, is_import=is_import, stop_signal=stop_signal):
+                break
+        # Append to the appropriate list
+        if is_import:
+            imported_entries.append(entry)
+        else:
+            generated_entries.append(entry)
+    records.close()
+
+    if session["error"]:
+        if from_gui:
+            callback_object.post_messagebox("Error", f"Unable to read the wallet entries: {session['error']}")
+        DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+        return None
+
+    # Rebuild a missing or out of date address list once every entry has been decrypted
+    complete = not address and not show and entry_positions is None and len(generated_entries) + len(imported_entries) == combined_length
+    if is_encrypted and complete and {"id", "address"} <= set(fields) and (session["addresses"] is False or not os.path.exists(AddressSidecar.path(filename))):
+        AddressSidecar.write(filename, load_session_hmac_key(session), {"entries": [[entry["id"], entry["address"]] for entry in generated_entries], "imported_entries": [[entry["id"], entry["address"]] for entry in imported_entries]})
     
     if from_gui:
         if stop_signal.is_set():
@@ -1290,56 +1892,6 @@ def decryptWalletEntries(filename, password, totp_code=None, address=[], fields=
         DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not result])
         #print("End of decryptWalletEntries")
         return result
-        
-    # Remove 'address' from fields if it was added for filtering
-    if address_filtering_applied:
-        fields.remove('address')
-    
-    # Function to filter entries by address
-    def filter_entries(entries, address_filter, unmatched_addresses):
-        include_addresses = set(addr for addr in address_filter if not addr.startswith("-"))
-        exclude_addresses = set(addr[1:] for addr in address_filter if addr.startswith("-"))
-        
-        filtered = []    
-        for entry in entries:
-            entry_addr = entry.get("address")
-            if entry_addr:
-                if entry_addr in exclude_addresses:
-                    unmatched_addresses.discard(entry_addr)
-                    continue
-                elif include_addresses and entry_addr in include_addresses:
-                    filtered.append(entry)
-                    unmatched_addresses.discard(entry_addr)
-                elif not include_addresses:
-                    filtered.append(entry)    
-        return filtered  
-    
-    unmatched_addresses = set()
-    # Apply address filtering to generated and imported entries separately
-    if address:
-        # Initialize a set to keep track of unmatched addresses
-        unmatched_addresses = set(addr[1:] if addr.startswith("-") else addr for addr in address)
-        
-        generated_entries = filter_entries(generated_entries, address, unmatched_addresses)
-        imported_entries = filter_entries(imported_entries, address, unmatched_addresses)
-        
-        # Generate warnings after all entries have been processed
-        if len(unmatched_addresses) >= 1:
-            #if is_encrypted:
-                #print()
-            logging.warning(f"The following {'address was' if len(unmatched_addresses) == 1 else 'addresses were'} not found: {', '.join(unmatched_addresses)}")
-        
-        # Check if all entries have been excluded after filtering
-        if not generated_entries and not imported_entries:
-            #if is_encrypted and not len(unmatched_addresses) >= 1:
-                #print()
-            logging.warning("All wallet entries have been excluded by the filter. The output will contain no entries.")
-    
-    # Remove 'address' from entries if it wasn't in the original fields list
-    if address_filtering_applied:
-        for entry_list in [generated_entries, imported_entries]:
-            for entry in entry_list:
-                entry.pop('address', None)
 
     # Function to check if all entries in a list are empty
     def are_all_entries_empty(entries):
@@ -1358,14 +1910,13 @@ def decryptWalletEntries(filename, password, totp_code=None, address=[], fields=
     if show != "generated" and imported_entries and not are_all_entries_empty(imported_entries):
         output["entry_data"]["imported_entries"] = imported_entries
     
-    if not "balance" in sys.argv and not "send" in sys.argv and not "paperwallet" in sys.argv:
-        if len(output["entry_data"]) > 0:
-            if not is_encrypted and not len(unmatched_addresses) >= 1:
-                print("\033[F",end='')
-            print(f"\nWallet Data for: {filename}")
-        else:
-            DataManipulation.secure_delete([var for var in locals().values() if var is not None])
-            return None
+    if len(output["entry_data"]) > 0:
+        if not is_encrypted and not session["unmatched_addresses"]:
+            print("\033[F",end='')
+        print(f"\nWallet Data for: {filename}")
+    else:
+        DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+        return None
     
     # Convert to JSON format if requested
     if to_json:
@@ -1561,38 +2112,52 @@ def validate_and_select_node(node):
         it defaults to a pre-defined, reliable node address. This function is essential for ensuring that
         subsequent blockchain operations such as transactionsor balance queries are directed to a valid node.
 
+        Several node addresses can be provided, separated by commas. They make up the node pool, and the
+        fastest healthy node of the pool is selected, while the other nodes back it up.
+
     Parameters:
-        node (str): The node address to validate. If None, a default node address is used.
+        node (str): The node address to validate, or a comma separated list of node addresses. If None, a
+        default node address is used.
 
     Returns:
         str or None: The function returns the node address if the validation is successful or the default 
         node address if no address is provided. It returns None if the provided address is invalid.
     """
-    if node:
-        is_node_valid, node, _, _ = Verification.validate_node_address((node, False), referer="validate_and_select_node")
-        if not is_node_valid:
-            node = 'http://localhost:3006'
-    else:
-        node = 'http://localhost:3006'
+    nodes = []
+    for candidate in (node or "").split(','):
+        if not candidate.strip():
+            continue
+        is_node_valid, candidate, _, _ = Verification.validate_node_address((candidate.strip(), False), referer="validate_and_select_node")
+        if is_node_valid:
+            nodes.append(candidate)
+    if not nodes:
+        nodes = ['http://localhost:3006']
+    NodePool.configure(nodes)
+    # A single node is used as it is, without health checks
+    if len(nodes) > 1:
+        NodePool.check_all()
+    node = NodePool.select(nodes[0])
     DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not node])
     return node
 
 def initialize_wallet(filename):
     ensure_wallet_directories_exist()
     filename = get_normalized_filepath(filename)
-    data, wallet_exists = _load_data(filename, False)
 
-    # Determine if wallet is encrypted
+    # Read the wallet header to determine if the wallet exists and is encrypted
+    wallet_metadata = WalletMetadata.read(filename)
+    wallet_exists = wallet_metadata is not None
     encrypted = False
     if wallet_exists:
-        data_segment = json.dumps(data["wallet_data"])
-        encrypted = is_wallet_encrypted(data_segment)
+        encrypted = wallet_metadata["encrypted"]
+    else:
+        logging.error(f"Unable to read the wallet file or parse its content: {filename}")
        
     result = wallet_exists, filename, encrypted
     DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not result])
     return result
 
-def get_address_and_private_key(filename, password, totp_code, address, private_key):
+def get_address_and_private_key(filename, password, totp_code, address, private_key, on_unlock=None):
     encrypted = False
     
     if filename and address and not private_key:
@@ -1613,22 +2178,52 @@ def get_address_and_private_key(filename, password, totp_code, address, private_
             DataManipulation.secure_delete([var for var in locals().values() if var is not None])
             return None, None
 
-        decrypted_data = decryptWalletEntries(filename=filename, password=password, totp_code=totp_code if totp_code else "", address=[address], fields=['private_key'], to_json=True)
+        # Unlock the wallet once for the address index lookup and the entries
+        data, session = open_wallet_session(filename, password, totp_code)
+        if session is None:
+            DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+            return None, None
 
-        if decrypted_data is not None:
-            decrypted_data = json.loads(decrypted_data)
-            entry_data = decrypted_data.get('entry_data', {})        
-            
-            # Check 'entries' and extract the private key if available
-            entries = entry_data.get('entries')
-            if entries and isinstance(entries, list) and len(entries) > 0:
-                private_key = entries[0].get('private_key')        
-            
-            # If not found in 'entries', check 'imported_entries'
-            if not private_key:
-                imported_entries = entry_data.get('imported_entries')
-                if imported_entries and isinstance(imported_entries, list) and len(imported_entries) > 0:
-                    private_key = imported_entries[0].get('private_key')
+        if WatchOnlyWallet.is_watch_only(data):
+            logging.error("Watch-only wallets do not hold private keys.")
+            DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+            return None, None
+
+        # Let the caller use the unlocked wallet, since the session is wiped on return
+        if on_unlock:
+            on_unlock(filename, session)
+
+        # Use the address index or address list of encrypted wallets to decrypt only the matching entry
+        entry_positions = None
+        location = locate_wallet_address(data, session, address)
+        if location:
+            entry_positions = {location[0]: [location[1]]}
+
+        if encrypted and entry_positions is None and 'send' in sys.argv:
+            print("\nA private key is required to send funds. \nSince a private key has not been provided, the wallet client will attempt to decrypt each entry in the wallet file until it finds the private key associated with the address specified. \nYou can use the '-private-key' argument to make this process alot faster. However, doing this is not secure and can put your funds at risk.\n")
+
+        # Decrypt entries until the entry of the address is found
+        def find_private_key(entry_positions):
+            def print_progress(entry_count, entry_total, record):
+                print(f"\rDecrypting wallet entry {entry_count} of {entry_total} | Address: {record['address']}", end='')
+            for _, entry in iter_wallet_entries(data, session, fields=['private_key', 'address'], entry_positions=entry_positions, progress=print_progress):
+                if entry['address'] == address:
+                    if encrypted:
+                        print("\nAddress Found.\n")
+                    return entry['private_key']
+            if encrypted:
+                print()
+            return None
+
+        private_key = find_private_key(entry_positions)
+
+        # Fall back to decrypting every entry if the address index or address list is out of date
+        if private_key is None and entry_positions is not None and not session["error"]:
+            logging.warning("The address index of the wallet is out of date. It can be rebuilt using the 'rebuildindex' command.")
+            private_key = find_private_key(None)
+
+        if private_key is None and not session["error"]:
+            logging.warning(f"The following address was not found: {address}")
         
         if private_key is None:
             DataManipulation.secure_delete([var for var in locals().values() if var is not None])
@@ -1654,7 +2249,7 @@ def get_address_and_private_key(filename, password, totp_code, address, private_
     DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not result])
     return result
 
-def checkBalance(filename, password, totp_code=None, address = [], node = None, to_json = False, to_file = False, show=None, currency_code=None, currency_symbol=None, address_data=None, from_gui=False, callback_object=None, stop_signal=None):
+def checkBalance(filename, password, totp_code=None, address = [], node = None, to_json = False, to_file = False, show=None, currency_code=None, currency_symbol=None, address_data=None, from_gui=False, callback_object=None, stop_signal=None, max_requests=None, request_timeout=None):
      
     # Select a valid node
     if not from_gui:
@@ -1677,32 +2272,56 @@ def checkBalance(filename, password, totp_code=None, address = [], node = None,
             DataManipulation.secure_delete([var for var in locals().values() if var is not None])
             return None
         
-        # Decrypt wallet entries
-        if not from_gui:
-            address_data = decryptWalletEntries(filename=filename, password=password, totp_code=totp_code if totp_code else "", address=address if address else [], fields=['address','id', "is_import"], to_json=True, show=show, from_gui=from_gui, callback_object=callback_object)
-
-        if not address_data:
-            DataManipulation.secure_delete([var for var in locals().values() if var is not None])
-            return None
+        if from_gui:
+            if not address_data:
+                DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+                return None
+            
+            entry_data = json.loads(address_data)['entry_data']
+            
+            # Count total entries including imported ones
+            index = len(entry_data["entries"])
+            imported_entries_length = len(entry_data.get("imported_entries", []))
+            combined_length = index + imported_entries_length
+            
+            if show:
+                if "imported" in show:
+                    if "imported_entries" in entry_data and "entries" in entry_data:
+                        del entry_data["entries"]
+                
+                if "generated" in show:
+                    if "imported_entries" in entry_data:
+                        del entry_data["imported_entries"]
+            
+            records = ((entry_type, entry) for entry_type in ["entries", "imported_entries"] for entry in entry_data.get(entry_type, []))
+        else:
+            # Unlock the wallet once, and request each balance as soon as its entry is decrypted
+            data, session = open_wallet_session(filename, password, totp_code, include_mnemonic=False)
+            if session is None:
+                DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+                return None
+            
+            # The addresses of encrypted wallets are read from their address list when it is available
+            decrypt_entries = encrypted and load_session_addresses(data, session) is None
+            entry_count = len(data["wallet_data"]["entry_data"]["entries"]) + len(data["wallet_data"]["entry_data"].get("imported_entries", []))
+            if entry_count >= 32:
+                logging.warning(f"The {'encrypted ' if encrypted else ''}wallet file contains {entry_count} entries and is quite large. {'Decryption and balance' if decrypt_entries else 'Balance'} requests may take a while.\n")
+            
+            entry_data = {}
+            records = iter_wallet_entries(data, session, fields=['address', 'id', 'label'], show=show, address=address if address else [])
         
-        entry_data = json.loads(address_data)['entry_data']
         total_balance = 0
         total_pending = 0
         is_import = False
-        
-        # Count total entries including imported ones
-        index = len(entry_data["entries"])
-        imported_entries_length = len(entry_data.get("imported_entries", []))
-        combined_length = index + imported_entries_length
-        
-        if show:
-            if "imported" in show:
-                if "imported_entries" in entry_data and "entries" in entry_data:
-                    del entry_data["entries"]
-            
-            if "generated" in show:
-                if "imported_entries" in entry_data:
-                    del entry_data["imported_entries"]
+        # The balances of a complete check replace the balance snapshot of the wallet
+        snapshot_balances = {}
+        complete = not address and not show
+        if from_gui:
+            snapshot_key = callback_object.root.stored_data.balance_snapshot_key
+            history_store = callback_object.root.stored_data.history_store
+        else:
+            snapshot_key = BalanceSnapshot.derive_key(load_session_hmac_key(session)) if encrypted else None
+            history_store = open_history_store(filename, session)
 
         # No need to get price data if disable_exchange_rate_features is True
         if from_gui and callback_object.root.disable_exchange_rate_features:
@@ -1730,24 +2349,35 @@ def checkBalance(filename, password, totp_code=None, address = [], node = None,
                 # Print balance information
                 print(f"\nDNR/{currency_code} Price: {currency_symbol}{formatted_price_str} {'(Calculated from USD)' if not currency_code == 'USD' else ''}\nBalance Information For: {filename}")
                 print("-"*59)
-                for entry_feild in entry_data:
-                    if entry_feild == "imported_entries":
-                        is_import = True
-                    for entry in entry_data[entry_feild]:
-                        id = entry['id']
-                        address = entry['address']
-                        balance, pending_balance, is_error = get_balance_info(address, node)
-                        # Convert balance to Decimal and perform multiplication
-                        balance_decimal = Decimal(str(balance))
-                        balance_value = balance_decimal * formatted_price
-                        # Format the balance value as a regular decimal string
-                        formatted_balance_value = "{:.7f}".format(balance_value)
-                        if is_error:
-                            break
-                        total_balance += balance
-                        total_pending += pending_balance
-                        # Output the balance in DNR and its value in the chosen currency                  
-                        print(f'{"Imported " if is_import else ""}Address #{id}: {address}\nBalance: {balance} DNR{f" (Pending: {pending_balance} DNR)" if pending_balance != 0 else ""}\n{currency_code} Value: {currency_symbol}{formatted_balance_value}\n')
+                balances = iter_balance_info(records, node, max_requests=max_requests, timeout=request_timeout, history_store=history_store)
+                for entry_type, entry, balance, pending_balance, is_error in balances:
+                    if is_error:
+                        complete = False
+                        break
+                    snapshot_balances[entry['address']] = [str(balance), str(pending_balance)]
+                    is_import = entry_type == "imported_entries"
+                    id = entry['id']
+                    address = entry['address']
+                    # Convert balance to Decimal and perform multiplication
+                    balance_decimal = Decimal(str(balance))
+                    balance_value = balance_decimal * formatted_price
+                    # Format the balance value as a regular decimal string
+                    formatted_balance_value = "{:.7f}".format(balance_value)
+                    total_balance += balance
+                    total_pending += pending_balance
+                    # Labels of watch-only wallets are shown along with the address
+                    label = f"Label: {entry['label']}\n" if entry.get('label') else ""
+                    # Output the balance in DNR and its value in the chosen currency                  
+                    print(f'{"Imported " if is_import else ""}Address #{id}: {address}\n{label}Balance: {balance} DNR{f" (Pending: {pending_balance} DNR)" if pending_balance != 0 else ""}\n{currency_code} Value: {currency_symbol}{formatted_balance_value}\n')
+                balances.close()
+                records.close()
+                if history_store and not from_gui:
+                    history_store.close()
+                if not from_gui and session["error"]:
+                    DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+                    return None
+                if complete:
+                    save_balance_snapshot(filename, snapshot_balances, node, encrypted, snapshot_key)
                 print("\033[F"+"-"*59)
                 # Convert total_balance to Decimal
                 total_balance_decimal = Decimal(str(total_balance))
@@ -1761,69 +2391,78 @@ def checkBalance(filename, password, totp_code=None, address = [], node = None,
                 # Prepare JSON data
                 balance_data = {"balance_data": {"wallet_file_path": filename, "wallet_version":"0.2.2", "addresses": [], "imported_addresses" : [], f"exchange_rate":f'{currency_symbol}{formatted_price}',"total_balance":"", f"total_{currency_code.lower()}_value":"", "lastUpdated": datetime.utcnow().isoformat() + "Z"}}
 
-                if not "imported_entries" in entry_data or entry_data["imported_entries"] == []:
-                    del balance_data["balance_data"]["imported_addresses"]
-
-                if not "entries" in entry_data or entry_data["entries"] == []:
-                    del balance_data["balance_data"]["addresses"]
-
-                for entry_feild in entry_data:
-                    #print("Loop 1 running", filename)
-                    #if from_gui:
-                    #    if stop_signal.is_set():
-                    #        #print("Loop 1 break", filename)
-                    #        break
-                    if not entry_feild == "master_mnemonic":
-                        if entry_feild == "imported_entries":
-                            is_import = True                    
-                        for entry in entry_data[entry_feild]:
-                            #print("Loop 2 running", filename)
-                            #if from_gui:
-                            #    if stop_signal.is_set():
-                            #        #print("Loop 2 break", filename)
-                            #        break
-                            address = entry['address']
-                            balance, pending_balance, is_error = get_balance_info(address, node, from_gui=from_gui, callback_object=callback_object, stop_signal=stop_signal)
-                            if is_error:
-                                break
-                            total_balance += balance
-                            if not is_import:
-                                address_entry = {
-                                    "id": entry['id'],
-                                    "address": address,
-                                    "balance": {
-                                        "currency": "DNR",
-                                        "amount": f'{"{:.6f}".format(Decimal(str(balance)))}',
-                                        f"{currency_code.lower()}_value": f'{currency_symbol}{"{:.7f}".format(Decimal(str(balance * formatted_price)))}'
-                                    }
-                                }
-                                if from_gui:  # Add pending_balance only if from_gui is True
-                                    address_entry["balance"]["pending_balance"] = f'{"{:.6f}".format(Decimal(str(pending_balance)))}'
-                                balance_data["balance_data"]["addresses"].append(address_entry)
-                            else:
-                                imported_address_entry = {
-                                    "id": entry['id'],
-                                    "address": address,
-                                    "balance": {
-                                        "currency": "DNR",
-                                        "amount": f'{"{:.6f}".format(Decimal(str(balance)))}',
-                                        f"{currency_code.lower()}_value": f'{currency_symbol}{"{:.7f}".format(Decimal(str(balance * formatted_price)))}'
-                                    }
-                                }
-                                if from_gui:  # Add pending_balance only if from_gui is True
-                                    imported_address_entry["balance"]["pending_balance"] = f'{"{:.6f}".format(Decimal(str(pending_balance)))}'
-                                balance_data["balance_data"]["imported_addresses"].append(imported_address_entry)                                                                
-                            if from_gui: 
-                                if not stop_signal.is_set():
-                                    callback_object.root.stored_data.progress_bar_increment = True
-                                    callback_object.set_balance_data(balance_data, Decimal(str(total_balance)), f'{currency_symbol}{"{:.7f}".format(Decimal(str(total_balance))*formatted_price)}', stop_signal=stop_signal)
-                                else:
-                                    #print("Loop 2 break", filename)
-                                    break
-                    
-                    if from_gui and stop_signal.is_set():
-                                #print("Loop 1 break", filename)
-                                break
+                # The entries of the GUI are known in advance, while the entries of the wallet file are streamed
+                if from_gui:
+                    if not "imported_entries" in entry_data or entry_data["imported_entries"] == []:
+                        del balance_data["balance_data"]["imported_addresses"]
+
+                    if not "entries" in entry_data or entry_data["entries"] == []:
+                        del balance_data["balance_data"]["addresses"]
+
+                # The GUI shows stale balances right away, and corrects them once they are revalidated
+                on_revalidated = (lambda address, balance, pending_balance: callback_object.apply_balance_change(address, balance, pending_balance, stop_signal=stop_signal)) if from_gui else None
+                balances = iter_balance_info(records, node, max_requests=max_requests, timeout=request_timeout, from_gui=from_gui, callback_object=callback_object, stop_signal=stop_signal, history_store=history_store, on_revalidated=on_revalidated)
+                for entry_type, entry, balance, pending_balance, is_error in balances:
+                    #print("Loop running", filename)
+                    is_import = entry_type == "imported_entries"
+                    address = entry['address']
+                    if is_error:
+                        complete = False
+                        break
+                    snapshot_balances[address] = [str(balance), str(pending_balance)]
+                    total_balance += balance
+                    if not is_import:
+                        address_entry = {
+                            "id": entry['id'],
+                            "address": address,
+                            "balance": {
+                                "currency": "DNR",
+                                "amount": f'{"{:.6f}".format(Decimal(str(balance)))}',
+                                f"{currency_code.lower()}_value": f'{currency_symbol}{"{:.7f}".format(Decimal(str(balance * formatted_price)))}'
+                            }
+                        }
+                        if entry.get('label'):
+                            address_entry["label"] = entry['label']
+                        if from_gui:  # Add pending_balance only if from_gui is True
+                            address_entry["balance"]["pending_balance"] = f'{"{:.6f}".format(Decimal(str(pending_balance)))}'
+                        balance_data["balance_data"]["addresses"].append(address_entry)
+                    else:
+                        imported_address_entry = {
+                            "id": entry['id'],
+                            "address": address,
+                            "balance": {
+                                "currency": "DNR",
+                                "amount": f'{"{:.6f}".format(Decimal(str(balance)))}',
+                                f"{currency_code.lower()}_value": f'{currency_symbol}{"{:.7f}".format(Decimal(str(balance * formatted_price)))}'
+                            }
+                        }
+                        if entry.get('label'):
+                            imported_address_entry["label"] = entry['label']
+                        if from_gui:  # Add pending_balance only if from_gui is True
+                            imported_address_entry["balance"]["pending_balance"] = f'{"{:.6f}".format(Decimal(str(pending_balance)))}'
+                        balance_data["balance_data"]["imported_addresses"].append(imported_address_entry)                                                                
+                    if from_gui: 
+                        if not stop_signal.is_set():
+                            callback_object.root.stored_data.progress_bar_increment = True
+                            callback_object.set_balance_data(balance_data, Decimal(str(total_balance)), f'{currency_symbol}{"{:.7f}".format(Decimal(str(total_balance))*formatted_price)}', stop_signal=stop_signal)
+                        else:
+                            #print("Loop break", filename)
+                            complete = False
+                            break
+                balances.close()
+                records.close()
+                if history_store and not from_gui:
+                    history_store.close()
+                if complete and (from_gui or not session["error"]):
+                    save_balance_snapshot(filename, snapshot_balances, node, encrypted, snapshot_key)
+
+                if not from_gui:
+                    if session["error"]:
+                        DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+                        return None
+                    for addresses_key in ["addresses", "imported_addresses"]:
+                        if not balance_data["balance_data"][addresses_key]:
+                            del balance_data["balance_data"][addresses_key]
                                           
                 #print("Outside loop")
                 if from_gui:
@@ -1871,7 +2510,7 @@ def checkBalance(filename, password, totp_code=None, address = [], node = None,
             DataManipulation.secure_delete([var for var in locals().values() if var is not None])
             return None
       
-def prepareTransaction(filename, password, totp_code, amount, sender, private_key, receiver, message, node, from_gui=None):
+def prepareTransaction(filename, password, totp_code, amount, sender, private_key, receiver, message, node, from_gui=None, history_store=None):
     global transaction_message_extension
     max_message_length = 256 - len(transaction_message_extension) + 3
    
@@ -1888,9 +2527,16 @@ def prepareTransaction(filename, password, totp_code, amount, sender, private_ke
         DataManipulation.secure_delete([var for var in locals().values() if var is not None])
         return None, None
     
-    sender, private_key = get_address_and_private_key(filename, password, totp_code, sender, private_key)
+    # The history store of the wallet is opened while the wallet is unlocked, so that the spendable outputs
+    # of the sender are read from it when they are current
+    opened_stores = []
+    sender, private_key = get_address_and_private_key(filename, password, totp_code, sender, private_key, on_unlock=lambda wallet_filename, session: opened_stores.append(open_history_store(wallet_filename, session)))
+    owned_store = opened_stores[0] if opened_stores else None
+    history_store = history_store or owned_store
     
     if not private_key:
+        if owned_store:
+            owned_store.close()
         DataManipulation.secure_delete([var for var in locals().values() if var is not None])
         return None, None
     
@@ -1910,15 +2556,19 @@ def prepareTransaction(filename, password, totp_code, amount, sender, private_ke
     #Validate receiving address using regex pattern        
     if not re.match(ADDRESS_PATTERN, receiver):
         logging.error("The recieving address is not valid.")
+        if owned_store:
+            owned_store.close()
         DataManipulation.secure_delete([var for var in locals().values() if var is not None])
         return None, "Error: The recieving address is not valid."
 
     # Create the transaction
-    result, msg_str = create_transaction([private_key], sender, receiver, amount, message, node=node)
+    result, msg_str = create_transaction([private_key], sender, receiver, amount, message, node=node, history_store=history_store)
+    if owned_store:
+        owned_store.close()
     DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not result])
     return result, msg_str
     
-def create_transaction(private_key, sender, receiving_address, amount, message: bytes = None, send_back_address=None, node=None):
+def create_transaction(private_key, sender, receiving_address, amount, message: bytes = None, send_back_address=None, node=None, history_store=None):
     
     print(f"\n[{datetime.now()}]\nAttempting to send {amount} DNR from {sender} to {receiving_address}.")
     msg_str = ''
@@ -1930,7 +2580,7 @@ def create_transaction(private_key, sender, receiving_address, amount, message:
     for key in private_key:
         if send_back_address is None:
             send_back_address = sender
-        balance, address_inputs, is_pending, pending_transactions, pending_transaction_hashes, is_error, msg = get_address_info(sender, node)
+        balance, address_inputs, is_pending, pending_transactions, pending_transaction_hashes, is_error, msg = get_address_info(sender, node, history_store)
         msg_str = msg_str + msg
 
         if is_error:
@@ -2000,12 +2650,21 @@ def create_transaction(private_key, sender, receiving_address, amount, message:
     
     # Push transaction to node
     try:
-        response, status_msg = push_transaction_with_fallback(node, transaction.hex())
+        response, status_msg = push_transaction(node, transaction.hex())
+        if response is None:
+            msg_str += f'[{datetime.now()}]\n{status_msg}\n'
+            result = None, msg_str
+            DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not result])
+            return result
 
         #request = requests.post(f'{node}/push_tx', json={'tx_hex': transaction.hex()}, timeout=10)
         #request.raise_for_status()
         #response = request.json()
                 
+        # The outputs of the sender changed, or the stored ones were rejected by the node
+        if history_store is not None:
+            history_store.invalidate(node, sender)
+
         if not response.get('ok'):
             print(response.get('error'))
             msg_str += f'[{datetime.now()}]\n{response.get("error")}\n'
@@ -2042,62 +2701,100 @@ def create_transaction(private_key, sender, receiving_address, amount, message:
         return result
 
 
-def push_transaction_with_fallback(node_url: str, tx_hex: str) -> (dict, str):
+def push_transaction(node, tx_hex):
+    """
+    Pushes a transaction to a node, and to the other nodes of the node pool while the nodes can not be reached.
+    A transaction that a node rejects is not pushed to other nodes.
+
+    Args:
+        node: The base URL of the node to push to first.
+        tx_hex: The hexadecimal representation of the transaction.
+
+    Returns:
+        A tuple containing the JSON response dictionary, or None, and a status message string.
+    """
+    try:
+        result, _ = NodePool.failover(node, lambda candidate: push_transaction_with_fallback(candidate, tx_hex, failover=True))
+    except requests.exceptions.RequestException as e:
+        error_msg = f"Unable to reach a node to push the transaction to: {e}"
+        print(f"\n[{datetime.now()}]\n{error_msg}")
+        return None, error_msg
+    return result
+
+def _is_unreachable(error):
+    # Connection errors, timeouts and server errors are failed over, while other HTTP errors reject the transaction
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    return error.response is not None and error.response.status_code >= 500
+
+def push_transaction_with_fallback(node_url: str, tx_hex: str, failover=False) -> (dict, str):
     """
     Attempts to push a transaction to a node using the new /submit_transaction endpoint.
     If that fails with a 404 (Not Found), it falls back to the legacy /push_tx endpoint.
+    Nodes that are known to only have the legacy endpoint are pushed to on /push_tx directly.
 
     Args:
         node_url: The base URL of the node.
         tx_hex: The hexadecimal representation of the transaction.
+        failover: Whether errors that mean the node can not be reached are raised, so that another node can be tried.
 
     Returns:
         A tuple containing the JSON response dictionary and a status message string.
     """
 
-    # --- Attempt 1: Try the new, preferred endpoint ---
-    new_endpoint = f"{node_url}/submit_tx"
     payload = {'tx_hex': tx_hex}
-    
-    try:
-        print(f"Attempting to submit transaction to modern endpoint: {new_endpoint}")
-        response = requests.post(new_endpoint, json=payload, timeout=10)
-        
-        # If the endpoint doesn't exist on a legacy node, it will return 404
-        if response.status_code == 404:
-            print("Modern endpoint not found, falling back to legacy /push_tx...")
-            # Go to the fallback logic
-            pass
-        else:
-            # For any other status code (200 OK, 403 Forbidden, 500 Error, etc.),
-            # we consider this the final response.
-            response.raise_for_status() # Raise an exception for non-2xx status codes
-            return response.json(), f"Successfully submitted transaction to {new_endpoint}"
 
-    except requests.exceptions.RequestException as e:
-        # This catches connection errors, timeouts, and non-404 HTTP errors
-        error_msg = f"Error during request to modern endpoint {new_endpoint}: {e}"
-        print(f"\n[{datetime.now()}]\n{error_msg}")
-        return None, error_msg
+    # --- Attempt 1: Try the new, preferred endpoint, unless the node is known to be a legacy node ---
+    new_endpoint = f"{node_url}/submit_tx"
+    push_endpoint = NodeCapabilities.supports(node_url, 'push_endpoint')
+    
+    if push_endpoint != 'push_tx':
+        try:
+            print(f"Attempting to submit transaction to modern endpoint: {new_endpoint}")
+            response = HttpTransport.post(new_endpoint, json=payload, timeout=10)
+            
+            # If the endpoint doesn't exist on a legacy node, it will return 404
+            if response.status_code == 404:
+                print("Modern endpoint not found, falling back to legacy /push_tx...")
+                NodeCapabilities.record(node_url, push_endpoint='push_tx')
+                # Go to the fallback logic
+                pass
+            else:
+                # For any other status code (200 OK, 403 Forbidden, 500 Error, etc.),
+                # we consider this the final response.
+                response.raise_for_status() # Raise an exception for non-2xx status codes
+                NodeCapabilities.record(node_url, push_endpoint='submit_tx')
+                return response.json(), f"Successfully submitted transaction to {new_endpoint}"
+    
+        except requests.exceptions.RequestException as e:
+            # This catches connection errors, timeouts, and non-404 HTTP errors
+            if failover and _is_unreachable(e):
+                raise
+            error_msg = f"Error during request to modern endpoint {new_endpoint}: {e}"
+            print(f"\n[{datetime.now()}]\n{error_msg}")
+            return None, error_msg
 
     # --- Attempt 2: Fallback to the legacy endpoint ---
     legacy_endpoint = f"{node_url}/push_tx"
     
     try:
         print(f"Attempting to submit transaction to legacy endpoint: {legacy_endpoint}")
-        response = requests.post(legacy_endpoint, json=payload, timeout=10)
+        response = HttpTransport.post(legacy_endpoint, json=payload, timeout=10)
         response.raise_for_status()
         return response.json(), f"Successfully submitted transaction to {legacy_endpoint}"
         
     except requests.exceptions.RequestException as e:
+        if failover and _is_unreachable(e):
+            raise
         error_msg = f"Error during request to legacy endpoint {legacy_endpoint}: {e}"
         print(f"\n[{datetime.now()}]\n{error_msg}")
         return None, error_msg
     
-def get_address_info(address: str, node: str):
+def get_address_info(address: str, node: str, history_store=None):
     try:
-        # Send the request to the node
-        request = requests.get(f'{node}/get_address_info', {'address': address, 'transactions_count_limit': 0, 'show_pending': True})
+        # The spendable outputs are always requested from the node, since a transaction must never spend outputs
+        # that were already spent. The history store only keeps the answer for display.
+        request, answered_by = NodePool.get(node, '/get_address_info', params={'address': address, 'transactions_count_limit': 0, 'show_pending': True})
         request.raise_for_status()
 
         response = request.json()
@@ -2110,6 +2807,8 @@ def get_address_info(address: str, node: str):
             return result
 
         result = response['result']
+        if history_store is not None:
+            history_store.put_account(answered_by, address, BalanceCache.chain_tip(answered_by), result)
         is_pending = False
         tx_inputs = []
         pending_spent_outputs = []
@@ -2157,12 +2856,70 @@ def get_address_info(address: str, node: str):
         msg_str = f'[{datetime.now()}]\nMissing expected data in response from node. See console output for more details.\n'
         return None, None, None, None, None, True, msg_str
 
-def get_balance_info(address: str, node: str, from_gui= False, callback_object=None, stop_signal=None):
+def calculate_balance(address, result):
+    """
+    Calculates the balance and the pending balance of an account from the address information of the node.
+
+    :param address: The address of the account.
+    :param result: The 'result' of the address information returned by the node.
+    :return: The total balance and pending balance of the account.
+    :raises: KeyError
+    """
+    pending_transactions = result.get('pending_transactions', [])
+    spendable_outputs = result.get('spendable_outputs', [])
+    
+    # Create a set of spendable transaction hashes for easy lookup
+    spendable_hashes = {output['tx_hash'] for output in spendable_outputs}
+    
+    # Ensure the balance is a string before converting to Decimal
+    total_balance = Decimal(str(result['balance']))
+    pending_balance = Decimal('0')
+
+    for transaction in pending_transactions:
+        # Adjust the balance based on inputs
+        for input in transaction.get('inputs', []):
+            if input.get('address') == address and input.get('tx_hash') in spendable_hashes:
+                input_amount = Decimal(str(input.get('amount', '0')))
+                pending_balance -= input_amount
+
+        # Adjust the balance based on outputs
+        for output in transaction.get('outputs', []):
+            if output.get('address') == address:
+                output_amount = Decimal(str(output.get('amount', '0')))
+                pending_balance += output_amount
+
+    # Format the total balance and pending balance to remove unnecessary trailing zeros
+    formatted_total_balance = total_balance.quantize(Decimal('0.000001'), rounding=ROUND_DOWN)
+    formatted_pending_balance = pending_balance.quantize(Decimal('0.000001'), rounding=ROUND_DOWN)
+    return formatted_total_balance, formatted_pending_balance
+
+def has_pending_transactions(result):
+    """
+    Returns whether the address information of the node lists pending transactions or pending spent outputs.
+
+    :param result: The 'result' of the address information returned by the node.
+    :return: True if the account has pending transactions.
+    """
+    return bool(result.get('pending_transactions') or result.get('pending_spent_outputs'))
+
+def save_balance_snapshot(filename, balances, node, encrypted, key):
+    """
+    Saves the balances of a complete balance check as the balance snapshot of a wallet. The snapshot of an
+    encrypted wallet is only saved with its snapshot key, so it is never written in plain JSON.
+    """
+    if encrypted and key is None:
+        return
+    BalanceSnapshot.write(filename, balances, node=node, block=BalanceCache.chain_tip(node), key=key)
+
+def get_balance_info(address: str, node: str, from_gui= False, callback_object=None, stop_signal=None, timeout=None, on_result=None):
     """
     Fetches the account data from the node and calculates the pending balance.
 
     :param address: The address of the account.
     :param node: The node URL to fetch data from.
+    :param timeout: The timeout of the request in seconds. Defaults to BALANCE_REQUEST_TIMEOUT.
+    :param on_result: Called with the address, the account data and the node that answered, if they were fetched.
+        With backup nodes, the answer may come from another node than 'node'.
     :return: The total balance and pending balance of the account.
     :raises: ConnectionError, ValueError, KeyError
     """
@@ -2171,7 +2928,7 @@ def get_balance_info(address: str, node: str, from_gui= False, callback_object=N
     try:        
         #print("Start balance request")
         # Send the request to the node
-        request = requests.get(f'{node}/get_address_info', params={'address': address, 'show_pending': True})
+        request, answered_by = NodePool.get(node, '/get_address_info', params={'address': address, 'show_pending': True}, timeout=timeout or BALANCE_REQUEST_TIMEOUT)
         request.raise_for_status()  # Raises an HTTPError if the HTTP request returned an unsuccessful status code
 
         response = request.json()
@@ -2188,34 +2945,9 @@ def get_balance_info(address: str, node: str, from_gui= False, callback_object=N
             DataManipulation.secure_delete([var for var in locals().values() if var is not None])
             return None, None, True
 
-        pending_transactions = result.get('pending_transactions', [])
-        spendable_outputs = result.get('spendable_outputs', [])
-        
-        # Create a set of spendable transaction hashes for easy lookup
-        spendable_hashes = {output['tx_hash'] for output in spendable_outputs}
-        
-        # Ensure the balance is a string before converting to Decimal
-        total_balance = Decimal(str(result['balance']))
-        pending_balance = Decimal('0')
-
-        for transaction in pending_transactions:
-            # Adjust the balance based on inputs
-            for input in transaction.get('inputs', []):
-                if input.get('address') == address and input.get('tx_hash') in spendable_hashes:
-                    input_amount = Decimal(str(input.get('amount', '0')))
-                    pending_balance -= input_amount
-
-            # Adjust the balance based on outputs
-            for output in transaction.get('outputs', []):
-                if output.get('address') == address:
-                    output_amount = Decimal(str(output.get('amount', '0')))
-                    pending_balance += output_amount
-
-        # Format the total balance and pending balance to remove unnecessary trailing zeros
-        formatted_total_balance = total_balance.quantize(Decimal('0.000001'), rounding=ROUND_DOWN)
-        formatted_pending_balance = pending_balance.quantize(Decimal('0.000001'), rounding=ROUND_DOWN)        
-
-        balance_data = formatted_total_balance, formatted_pending_balance, False
+        balance_data = (*calculate_balance(address, result), False)
+        if on_result:
+            on_result(address, result, answered_by)
         DataManipulation.secure_delete([var for var in locals().values() if var is not None and var is not balance_data])
         return balance_data
     
@@ -2239,69 +2971,420 @@ def get_balance_info(address: str, node: str, from_gui= False, callback_object=N
     #finally:
     #    print("End of balance request")
 
-def get_price_info(currency_code=None):
+def supports_batch_query(node, timeout=None):
     """
-    Fetches and calculates the price of DNR in the specified currency.
+    Overview:
+        Returns whether a node answers batch address queries on '/get_addresses_info'. The node capabilities
+        are consulted first. If they do not tell, the node is probed with an empty query, and the answer is
+        recorded in the node capabilities. A node that can not be reached is probed again next time.
+
+        Parameters:
+        - node: The node URL.
+        - timeout (float, optional): The timeout of the probe in seconds.
+
+        Returns:
+        - bool: True if the node supports batch address queries.
     """
+    supported = NodeCapabilities.supports(node, 'batch_query', timeout)
+    if supported is not None:
+        return supported
     try:
-        # Validate or set default currency code
-        if not currency_code:
-            currency_code = 'USD'
-        currency_code = currency_code.upper()
+        request = HttpTransport.post(f'{node}/get_addresses_info', json={'addresses': [], 'show_pending': True}, timeout=timeout or BALANCE_REQUEST_TIMEOUT, retries=0)
+        supported = request.status_code == 200 and request.json().get('ok') is True
+    except requests.RequestException:
+        return False
+    except ValueError:
+        supported = False
+    NodeCapabilities.record(node, batch_query=supported)
+    logging.info(f"Batch address queries are {'' if supported else 'not '}supported by {node}.")
+    return supported
 
-        try:
-            # CoinMarketCap API request
-            cmc_url = 'https://api.coinmarketcap.com/dexer/v3/dexer/pair-info?dexer-platform-name=bsc&address=0x638da797f50131c7f8fe1b0de864acee773d0bab&t=1705093806632'
-            cmc_response = requests.get(cmc_url)
-            cmc_response.raise_for_status()
-            price_usd = Decimal(cmc_response.json()['data']['priceUsd']).quantize(Decimal('0.0000001'))
-        except requests.RequestException as e:
-            print(f"\nError during request to CoinMarketCap API:\n {e}")
-            print("\nFailed to get the real-world price of Denaro.")
-            price_usd = Decimal('0')
-
-        # Early return for USD
-        if currency_code == 'USD':
-            return price_usd
-        
-        try:
-        # Exchange rate for fiat currencies
-            currency_exchange_rate_url = 'https://open.er-api.com/v6/latest/USD'
-            currency_response = requests.get(currency_exchange_rate_url)
-            currency_response.raise_for_status()
-            rates = currency_response.json()['rates']
-            if currency_code in rates:
-                currency_exchange_rate = Decimal(rates[currency_code]).quantize(Decimal('0.01'))
-                return price_usd * currency_exchange_rate
-        except requests.RequestException as e:
-            print(f"\nError during request to OpenExchangeRate API:\n {e}")
-            print("\nFailed to get the exchange rate of fiat currencies.")
-
-        # Exchange rate for cryptocurrencies
-        try:
-            cryptocurrency_exchange_rate_url = 'https://api.coincap.io/v2/assets'
-            crypto_response = requests.get(cryptocurrency_exchange_rate_url)
-            crypto_response.raise_for_status()
-            crypto_data = crypto_response.json()['data']
-            amount = next((Decimal(item['priceUsd']).quantize(Decimal('0.0000001')) for item in crypto_data if item['symbol'] == currency_code), None)
-            if amount:
-                return price_usd / amount
-        except requests.RequestException as e:
-            print(f"\nError during request to CoinCap API:\n {e}")
-            print("\nFailed to get the exchange rate of crypto-currencies.")
+def get_balance_info_batch(addresses, node, from_gui=False, callback_object=None, stop_signal=None, timeout=None, on_result=None):
+    """
+    Fetches the account data of several addresses with a single batch query and calculates their pending balances.
+
+    :param addresses: The addresses of the accounts.
+    :param node: The node URL to fetch data from.
+    :param timeout: The timeout of the request in seconds. Defaults to BALANCE_REQUEST_TIMEOUT.
+    :param on_result: Called with the address, the account data and the node, for every address that was fetched.
+    :return: A list with the total balance, pending balance and error flag of every address, in order.
+    """
+    failed = [(None, None, True)] * len(addresses)
+    if from_gui and stop_signal.is_set():
+        return failed
+    try:
+        # The query only reads data, so it is retried like any other idempotent request
+        request = HttpTransport.post(f'{node}/get_addresses_info', json={'addresses': list(addresses), 'show_pending': True}, timeout=timeout or BALANCE_REQUEST_TIMEOUT, retries=HttpTransport.RETRIES)
+        request.raise_for_status()
+        response = request.json()
+        if not response.get('ok'):
+            print(f"\n[{datetime.now()}]\n{response.get('error')}")
+            return failed
 
+        results = response.get('result')
+        if results is None:
+            print(f"\n[{datetime.now()}]\nERROR: Missing 'result' key in response")
+            return failed
 
-        return Decimal('0')
+        balances = []
+        for address in addresses:
+            if address not in results:
+                print(f"\n[{datetime.now()}]\nERROR: Missing address {address} in response")
+                balances.append((None, None, True))
+            else:
+                balances.append((*calculate_balance(address, results[address]), False))
+                if on_result:
+                    on_result(address, results[address], node)
+        return balances
 
     except requests.RequestException as e:
-        #logging.error(f"Request Error: {e}")
-        return Decimal('0')
-    except Exception as e:
-        #logging.error(f"General Error: {e}")
-        return Decimal('0')
+        print(f"\n[{datetime.now()}]\nError during request to node:\n {e}")
+        return failed
+    except ValueError as e:
+        print(f"\n[{datetime.now()}]\nError decoding JSON response from node:\n {e}")
+        return failed
+    except KeyError as e:
+        print(f"\n[{datetime.now()}]\nMissing expected data in response from node:\n {e}")
+        return failed
+
+def iter_balance_info(records, node, max_requests=None, timeout=None, from_gui=False, callback_object=None, stop_signal=None, use_cache=True, history_store=None, on_revalidated=None):
+    """
+    Overview:
+        Requests the balances of wallet entries from the node concurrently, and yields them in the order of
+        the entries. Nodes that support batch address queries are asked about BALANCE_BATCH_SIZE addresses
+        per request, and other nodes about one address per request. Entries are taken from 'records' as
+        requests complete, so at most 'max_requests' requests are in flight and entries that are still being
+        decrypted are requested as soon as they are available. Closing the generator cancels the requests
+        that have not started yet.
+
+        Balances fetched at the current chain tip of the node are served from the balance cache without a
+        request, unless the address had pending transactions. With the history store of the wallet, the address
+        information of the node is kept across runs, and balances are also served from it while the tip has not
+        moved. Balances fetched before the tip advanced are stale. With 'on_revalidated', they are served right
+        away and revalidated in the background once every entry was yielded, and the balances that changed are
+        passed to 'on_revalidated'. Without it, they are requested again before they are yielded, since the
+        caller could not show a correction.
+
+        Parameters:
+        - records: An iterable of (entry_type, entry) pairs, where each entry has an 'address'.
+        - node: The node URL to fetch data from.
+        - max_requests (int, optional): The number of concurrent requests. Defaults to BALANCE_MAX_REQUESTS.
+        - timeout (float, optional): The timeout of each request in seconds. Defaults to BALANCE_REQUEST_TIMEOUT.
+        - from_gui, callback_object, stop_signal: Passed on to get_balance_info.
+        - use_cache (bool, optional): Whether balances are served from and stored in the balance cache.
+        - history_store (HistoryStore, optional): The history store of the wallet.
+        - on_revalidated (callable, optional): Called from a request thread with the address, balance and pending
+          balance of every stale balance that changed when it was revalidated.
+
+        Yields:
+        - tuple: (entry_type, entry, balance, pending_balance, is_error) for every entry, in order.
+    """
+    max_requests = max(1, int(max_requests or BALANCE_MAX_REQUESTS))
+    # Requests that are hedged with another node of the pool must not wait for a free thread of the pool
+    NodePool.reserve(max_requests)
+    records = iter(records)
+    tip = BalanceCache.chain_tip(node, timeout) if use_cache else None
+    if supports_batch_query(node, timeout):
+        batch_size = BALANCE_BATCH_SIZE
+        request_balances = lambda chunk, on_result: get_balance_info_batch([entry['address'] for _, entry in chunk], node, from_gui, callback_object, stop_signal, timeout, on_result=on_result)
+    else:
+        batch_size = 1
+        request_balances = lambda chunk, on_result: [get_balance_info(chunk[0][1]['address'], node, from_gui, callback_object, stop_signal, timeout, on_result=on_result)]
+
+    def cached_balance(address):
+        # Returns (balance, pending_balance, fresh) for a balance that can be served without waiting for the node
+        cached = BalanceCache.get(node, address, tip)
+        if cached and cached[3]:
+            return None
+        if cached and cached[2]:
+            return cached[:3]
+        stored = history_store.account(node, address) if history_store is not None else None
+        if stored and not has_pending_transactions(stored[1]):
+            try:
+                balance, pending_balance = calculate_balance(address, stored[1])
+            except (KeyError, ArithmeticError):
+                return None
+            if stored[0] == tip:
+                BalanceCache.put(node, address, tip, balance, pending_balance, False)
+                return balance, pending_balance, True
+            if cached is None:
+                return balance, pending_balance, False
+        return cached[:3] if cached else None
+
+    def fetch(chunk):
+        # Answers are kept under the node that gave them, which is a backup node when a hedged request won
+        answers = {}
+        def on_result(address, result, answered_by):
+            answered_tip = tip if answered_by == node else (BalanceCache.chain_tip(answered_by, timeout) if use_cache else None)
+            answers[address] = (answered_by, answered_tip, has_pending_transactions(result))
+            if history_store is not None:
+                history_store.put_account(answered_by, address, answered_tip, result)
+        balances = request_balances(chunk, on_result)
+        for (_, entry), (balance, pending_balance, is_error) in zip(chunk, balances):
+            if not is_error and entry['address'] in answers:
+                answered_by, answered_tip, has_pending = answers[entry['address']]
+                BalanceCache.put(answered_by, entry['address'], answered_tip, balance, pending_balance, has_pending)
+        return balances
+
+    def revalidate(chunk):
+        for (_, entry), (balance, pending_balance, is_error) in zip(chunk, fetch(chunk)):
+            if not is_error and (balance, pending_balance) != served[entry['address']]:
+                on_revalidated(entry['address'], balance, pending_balance)
+
+    executor = ThreadPoolExecutor(max_workers=max_requests, thread_name_prefix="balance_request")
+    in_flight = deque()
+    chunk = []
+    # Stale balances that were served, by address, and the entries to revalidate
+    served = {}
+    stale = []
+    try:
+        for record in records:
+            cached = cached_balance(record[1]['address']) if tip is not None else None
+            if cached and not cached[2] and on_revalidated is not None:
+                served[record[1]['address']] = cached[:2]
+                stale.append(record)
+            elif cached and not cached[2]:
+                cached = None
+            if cached:
+                # Requests for the entries before this one are sent first, so the order is kept
+                if chunk:
+                    in_flight.append((chunk, executor.submit(fetch, chunk)))
+                    chunk = []
+                response = Future()
+                response.set_result([(*cached[:2], False)])
+                in_flight.append(([record], response))
+            else:
+                chunk.append(record)
+                if len(chunk) >= batch_size:
+                    in_flight.append((chunk, executor.submit(fetch, chunk)))
+                    chunk = []
+            while len(in_flight) >= max_requests or (in_flight and in_flight[0][1].done()):
+                done_chunk, request = in_flight.popleft()
+                for (entry_type, entry), balance in zip(done_chunk, request.result()):
+                    yield (entry_type, entry, *balance)
+        if chunk:
+            in_flight.append((chunk, executor.submit(fetch, chunk)))
+            chunk = []
+        while in_flight:
+            done_chunk, request = in_flight.popleft()
+            for (entry_type, entry), balance in zip(done_chunk, request.result()):
+                yield (entry_type, entry, *balance)
+        # Every entry was yielded, so the caller knows all of them by the time a correction arrives
+        for index in range(0, len(stale), batch_size):
+            executor.submit(revalidate, stale[index:index + batch_size])
+    finally:
+        for _, request in in_flight:
+            request.cancel()
+        executor.shutdown(wait=False)
+
+def refresh_balances(addresses, node, max_requests=None, timeout=None, history_store=None):
+    """
+    Overview:
+        Fetches the balances of addresses through iter_balance_info, for an AddressWatcher.
+
+        Parameters:
+        - addresses (list): The addresses.
+        - node: The node URL to fetch data from.
+        - max_requests, timeout, history_store: Passed on to iter_balance_info.
+
+        Returns:
+        - dict: Maps the addresses whose balance could be fetched to (balance, pending_balance).
+    """
+    balances = {}
+    records = ((None, {'address': address}) for address in addresses)
+    for _, entry, balance, pending_balance, is_error in iter_balance_info(records, node, max_requests=max_requests, timeout=timeout, history_store=history_store):
+        if not is_error:
+            balances[entry['address']] = (balance, pending_balance)
+    return balances
+
+def watchBalances(filename, password, totp_code=None, address=None, node=None, show=None, to_json=False, max_requests=None, request_timeout=None):
+    """
+    Overview:
+        The `watchBalances` function prints the balances of the addresses of a wallet, and then prints every change
+        of a balance until it is interrupted. The addresses are watched with an AddressWatcher, which follows the
+        chain tip of the node and only requests the balances of the addresses that took part in new blocks or
+        have pending transactions.
+
+        Parameters:
+        - filename: The path of the wallet file.
+        - password (str): The password of the wallet.
+        - totp_code: An optional Time-based One-Time Password, used for Two-Factor Authentication.
+        - address (list, optional): The address filter, as for checkBalance.
+        - node (str, optional): The node URL.
+        - show (str, optional): Watches only 'generated' or 'imported' entries.
+        - to_json (bool, optional): Whether every balance is printed as a line of JSON.
+        - max_requests (int, optional): The number of concurrent balance requests.
+        - request_timeout (float, optional): The timeout of each request in seconds.
+    """
+    node = validate_and_select_node(node)
+    if node is None:
+        return None
+
+    wallet_exists, filename, encrypted = initialize_wallet(filename)
+    if not wallet_exists:
+        return None
+
+    if encrypted and not password:
+        logging.error("Wallet is encrypted. A password is required.")
+        return None
+
+    data, session = open_wallet_session(filename, password, totp_code, include_mnemonic=False)
+    if session is None:
+        DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+        return None
+
+    entries = {}
+    for entry_type, entry in iter_wallet_entries(data, session, fields=['address', 'id', 'label'], show=show, address=address if address else []):
+        entries[entry['address']] = f"{'Imported ' if entry_type == 'imported_entries' else ''}Address #{entry['id']}"
+    if session["error"] or not entries:
+        if not session["error"]:
+            logging.error("No addresses to watch.")
+        DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+        return None
+
+    history_store = open_history_store(filename, session)
+    DataManipulation.secure_delete([data, session])
+
+    def on_change(address, balance, pending_balance, previous):
+        if to_json:
+            change = {"timestamp": datetime.utcnow().isoformat() + "Z", "block": watcher.tip, "address": address, "balance": str(balance), "pending_balance": str(pending_balance)}
+            if previous is not None:
+                change["previous_balance"], change["previous_pending_balance"] = str(previous[0]), str(previous[1])
+            print(json.dumps(change, ensure_ascii=False), flush=True)
+            return
+        difference = f" ({'+' if balance > previous[0] else ''}{balance - previous[0]} DNR)" if previous is not None and balance != previous[0] else ""
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {entries[address]}: {address}\nBalance: {balance} DNR{difference}{f' (Pending: {pending_balance} DNR)' if pending_balance != 0 else ''}\n", flush=True)
+
+    watcher = AddressWatcher(node, list(entries), lambda addresses: refresh_balances(addresses, node, max_requests, request_timeout, history_store), on_change, timeout=request_timeout)
+    if not to_json:
+        print(f"\nWatching {len(entries)} address{'es' if len(entries) != 1 else ''} of {filename} on {node}. Press Ctrl+C to stop.")
+        print("-"*59)
+    try:
+        watcher.watch(threading.Event())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if history_store:
+            history_store.close()
+        stats = watcher.stats
+        logging.info(f"Address watcher: {stats['polls']} tip polls, {stats['block_requests']} block requests and {stats['refreshed_addresses']} address refreshes ({stats['full_refreshes']} full refreshes), where refreshing every address on every poll would have taken {stats['polls'] * len(entries)} address refreshes.")
+    return None
+
+def get_price_info(currency_code=None):
+    """
+    Fetches and calculates the price of DNR in the specified currency. The price is served by the price service,
+    which only requests the USD price of DNR and the exchange rates again once they expired.
+    """
+    return PriceService.price(currency_code)
+
+def transaction_amount(address, transaction):
+    """
+    Calculates the amount a transaction moved to or from an address, i.e. its outputs to the address minus its
+    inputs from the address. Inputs that do not name their address are not counted.
+
+    :param address: The address.
+    :param transaction: A transaction of the address history returned by the node.
+    :return: The amount, which is negative if the address spent more than it received.
+    """
+    amount = Decimal('0')
+    for output in transaction.get('outputs', []):
+        if output.get('address') == address:
+            amount += Decimal(str(output.get('amount', '0')))
+    for input in transaction.get('inputs', []):
+        if input.get('address') == address:
+            amount -= Decimal(str(input.get('amount', '0')))
+    return amount.quantize(Decimal('0.000001'), rounding=ROUND_DOWN)
+
+def getTransactionHistory(filename, password, totp_code=None, address=None, node=None, page=1, pages=1, to_json=False, request_timeout=None):
+    """Overview:
+        The `getTransactionHistory` function prints the transactions of an address, newest first, one page of
+        HistoryStore.PAGE_SIZE transactions at a time. Pages are synced from the node into the history store of the
+        wallet, and read from it once they are stored. The page after the last printed one is prefetched, so that
+        it is stored for the next request.
+
+        Parameters:
+        - filename: The path of the wallet file.
+        - password (str): The password of the wallet.
+        - totp_code: An optional Time-based One-Time Password, used for Two-Factor Authentication.
+        - address (str): The address, which must belong to the wallet.
+        - node (str, optional): The node URL.
+        - page (int, optional): The first page to print, starting at 1.
+        - pages (int, optional): The number of pages to print.
+        - to_json (bool, optional): Whether the transactions are printed in JSON format.
+        - request_timeout (float, optional): The timeout of each request in seconds.
+
+        Returns:
+        - list: The printed transactions, or None if the history could not be read.
+    """
+    node = validate_and_select_node(node)
+    if node is None:
+        return None
+
+    if not address or not re.match(ADDRESS_PATTERN, address):
+        logging.error("The wallet address provided is not valid.")
+        return None
+
+    wallet_exists, filename, encrypted = initialize_wallet(filename)
+    if not wallet_exists:
+        return None
+
+    if encrypted and not password:
+        logging.error("Wallet is encrypted. A password is required.")
+        return None
+
+    data, session = open_wallet_session(filename, password, totp_code, include_mnemonic=False)
+    if session is None:
+        DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+        return None
+
+    # As with balances, only the history of an address of the wallet is shown
+    if locate_wallet_address(data, session, address) is None and not any(True for _ in iter_wallet_entries(data, session, fields=['address'], address=[address])):
+        logging.error("The address provided is not associated with the wallet.")
+        DataManipulation.secure_delete([var for var in locals().values() if var is not None])
+        return None
+
+    history_store = open_history_store(filename, session)
+    DataManipulation.secure_delete([data, session])
+    if history_store is None:
+        return None
+
+    pager = HistoryPager(history_store, node, address, timeout=request_timeout)
+    first_page = max(1, int(page or 1)) - 1
+    history = []
+    try:
+        for number in range(first_page, first_page + max(1, int(pages or 1))):
+            transactions = pager.page(number)
+            if transactions is None:
+                logging.error(f"Unable to get the transaction history of {address} from {node}.")
+                break
+            for position, transaction in enumerate(transactions):
+                history.append((number * HistoryStore.PAGE_SIZE + position + 1, transaction))
+            if len(transactions) < HistoryStore.PAGE_SIZE:
+                break
+    finally:
+        pager.close(wait=True)
+    stored, complete = pager.count()
+    history_store.close()
 
-def getTransactionInfo():
-    print()
+    if to_json:
+        history_data = {"history_data": {"wallet_file_path": filename, "address": address, "page": first_page + 1, "transactions": [], "synced_transactions": stored, "complete": complete}}
+        for number, transaction in history:
+            history_data["history_data"]["transactions"].append({"number": number, "amount": str(transaction_amount(address, transaction)), **transaction})
+        print(json.dumps(history_data, indent=4, ensure_ascii=False))
+        return history
+
+    print(f"\nTransaction History For: {address}")
+    print("-"*59)
+    for number, transaction in history:
+        amount = transaction_amount(address, transaction)
+        coinbase = " (Coinbase)" if transaction.get('is_coinbase') else ""
+        message = f"\nMessage: {transaction['message']}" if transaction.get('message') else ""
+        print(f"Transaction #{number}: {transaction.get('hash')}\nAmount: {'+' if amount > 0 else ''}{amount} DNR{coinbase}{message}\n")
+    if not history:
+        print("No transactions found.\n")
+    print("\033[F"+"-"*59)
+    print(f"{stored}{'' if complete else '+'} transactions synced{' (complete)' if complete else ''}.")
+    return history
     
 # Argparse Helper Functions
 def sort_arguments_based_on_input(argument_names):
@@ -2606,7 +3689,7 @@ def main():
     
     # Node URL parser 
     denaro_node = argparse.ArgumentParser(add_help=False)
-    denaro_node.add_argument('-node', type=str, help="Specifies the URL or IP address of a Denaro node.")
+    denaro_node.add_argument('-node', type=str, help="Specifies the URL or IP address of a Denaro node. Several nodes can be specified, separated by commas, in which case the fastest healthy node is used and the other nodes back it up.")
 
     # Wallet argument parser (wallet filename only)
     wallet_parser = argparse.ArgumentParser(add_help=False)
@@ -2647,7 +3730,7 @@ def main():
 
     # Subparser for generating a new address
     parser_generateaddress = generate_subparsers.add_parser('address', help="Generate a new address for an existing wallet", parents=[verbose_parser, wallet_auth_parser])
-    parser_generateaddress.add_argument('-amount', help="Specifies the amount of addresses to generate (Maximum of 256).", type=int)
+    parser_generateaddress.add_argument('-amount', help="Specifies the amount of addresses to generate (Wallets with more than 256 entries are stored in shards).", type=int)
  
     # Subparser for generating a paper wallet
     parser_generatepaperwallet = generate_subparsers.add_parser('paperwallet', help="Used to generate a Denaro paper wallet either by using an address that is associated with a wallet file, or directly via a private key that corresponds to a particular address.", parents=[verbose_parser, wallet_optional_auth_parser])
@@ -2672,7 +3755,31 @@ def main():
 
     # Subparser for backing up wallet
     parser_backupwallet = subparsers.add_parser('backupwallet',help="Used to create a backup of a wallet file.", parents=[verbose_parser, wallet_parser])
-    parser_backupwallet.add_argument('-path', help="Specifies the directory to save the wallet backup file. Defaults to the `./wallets/wallet_backups/` directory if no specific filepath is provided.")
+    parser_backupwallet.add_argument('-path', help="Specifies the directory of the wallet backup store. Defaults to the `./wallets/wallet_backups/` directory if no specific filepath is provided.")
+    backupwallet_subparsers = parser_backupwallet.add_subparsers(dest='backup_action', required=False)
+    backupwallet_subparsers.add_parser('list', help="Lists the backup snapshots of the wallet.", parents=[verbose_parser])
+    parser_backupwallet_restore = backupwallet_subparsers.add_parser('restore', help="Restores a backup snapshot of the wallet.", parents=[verbose_parser])
+    parser_backupwallet_restore.add_argument('-snapshot', help="The id of the snapshot to restore, as shown by the 'list' action.", required=True)
+    parser_backupwallet_restore.add_argument('-output', help="The filename or filepath of the restored wallet. Defaults to the wallet filepath, which must not exist.")
+    
+    # Subparser for converting wallet file formats
+    parser_convertwallet = subparsers.add_parser('convertwallet',help="Used to convert a wallet file between the JSON format and the binary wallet container format.", parents=[verbose_parser, wallet_parser])
+    parser_convertwallet.add_argument('-to', help="Specifies the format to convert the wallet file to.", choices=['binary', 'json'], dest='to_format', required=True)
+    parser_convertwallet.add_argument('-output', help="Specifies the filepath of the converted wallet file. Defaults to the path of the wallet file with the extension of the target format.")
+
+    # Main parser for 'export' command
+    parser_export = subparsers.add_parser('export', help="Export wallet data", parents=[verbose_parser])
+    export_subparsers = parser_export.add_subparsers(dest='command', required=True, help="Sub-commands for exporting wallet data")
+
+    # Subparser for exporting a watch-only wallet
+    parser_exportwatchonly = export_subparsers.add_parser('watchonly', help="Exports a watch-only wallet that holds the ids, addresses and labels of a wallet, without any private keys. Watch-only wallets can be opened without a password.", parents=[verbose_parser, wallet_auth_parser])
+    parser_exportwatchonly.add_argument('-output', help="Specifies the filepath of the watch-only wallet. Defaults to '[WalletName]_watchonly.json' next to the wallet file. Labels of an existing watch-only wallet are kept.")
+
+    # Subparser for rebuilding the address index
+    parser_rebuildindex = subparsers.add_parser('rebuildindex',help="Used to rebuild the keyed address index and the address list of an encrypted wallet, which allow entries to be located and listed without decrypting the entire wallet.", parents=[verbose_parser, wallet_auth_parser])
+
+    # Subparser for compacting the wallet journal
+    parser_compactwallet = subparsers.add_parser('compactwallet',help="Used to fold the entries held in the wallet journal back into the wallet file.", parents=[verbose_parser, wallet_auth_parser])
     
     # Subparser for sending a transaction
     parser_send = subparsers.add_parser('send',help="Main command to initiate a Denaro transaction.", parents=[verbose_parser, denaro_node])
@@ -2697,6 +3804,17 @@ def main():
     parser_balance.add_argument('-show', help="Filters balance information based on entry origin. 'generated' is used to retrieve only the balance information of internally generated wallet entries. 'imported' is used to retrieve only the balance information of imported wallet entries.", choices=['generated', 'imported'])
     parser_balance.add_argument('-json', help="Prints the balance information in JSON format.", action='store_true')
     parser_balance.add_argument('-to-file', help="Saves the output of the balance information to a file. The resulting file will be in JSON format and named as '[WalletName]_balance_[Timestamp].json' and will be stored in '/[WalletDirectory]/balance_information/[WalletName]/'.", dest='to_file', action='store_true')
+    parser_balance.add_argument('-max-requests', help=f"The maximum number of balance requests sent to the node at the same time. Defaults to {BALANCE_MAX_REQUESTS}.", dest='max_requests', type=int)
+    parser_balance.add_argument('-timeout', help=f"The timeout of each balance request in seconds. Defaults to {BALANCE_REQUEST_TIMEOUT}.", type=float)
+    parser_balance.add_argument('-watch', help="Keeps watching the balances after they are printed, and prints every balance that changes until interrupted. Only the addresses that take part in new blocks or have pending transactions are requested again. With -json, every balance is printed as a line of JSON.", action='store_true')
+
+    # Subparser for viewing the transaction history
+    parser_history = subparsers.add_parser('history',help="Used to view the transaction history of an address that is associated with a specified wallet file.", parents=[verbose_parser, denaro_node, wallet_auth_parser])
+    parser_history.add_argument('-address', help="Specifies the address to view the transaction history of.", required=True)
+    parser_history.add_argument('-page', help=f"The page of the transaction history to view, starting at 1 for the newest transactions. Each page holds {HistoryStore.PAGE_SIZE} transactions. Defaults to 1.", type=int, default=1)
+    parser_history.add_argument('-pages', help="The number of consecutive pages to view. Defaults to 1.", type=int, default=1)
+    parser_history.add_argument('-json', help="Prints the transaction history in JSON format.", action='store_true')
+    parser_history.add_argument('-timeout', help=f"The timeout of each request in seconds. Defaults to {BALANCE_REQUEST_TIMEOUT}.", type=float)
        
     args = parser.parse_args()
 
@@ -2735,9 +3853,26 @@ def main():
         args.path = args.path if args.path else None
         ensure_wallet_directories_exist(custom=args.path)        
         filename = get_normalized_filepath(args.wallet)
-        _, wallet_exists = _load_data(filename, False)
-        if wallet_exists:
+        if args.backup_action == 'list':
+            listWalletBackups(filename, args.path)
+        elif args.backup_action == 'restore':
+            restoreWalletBackup(filename, args.snapshot, args.output, args.path)
+        elif WalletMetadata.read(filename) is not None:
             DataManipulation.backup_wallet(filename, args.path)
+        else:
+            logging.error(f"Unable to read the wallet file or parse its content: {filename}")
+
+    elif args.command == 'convertwallet':
+        convertWallet(filename=args.wallet, to_format=args.to_format, output=args.output)
+
+    elif args.command == 'watchonly':
+        exportWatchOnly(filename=args.wallet, password=args.password, totp_code=args.tfacode if args.tfacode else None, output=args.output)
+
+    elif args.command == 'rebuildindex':
+        rebuildAddressIndex(filename=args.wallet, password=args.password, totp_code=args.tfacode if args.tfacode else None)
+
+    elif args.command == 'compactwallet':
+        compactWallet(filename=args.wallet, password=args.password, totp_code=args.tfacode if args.tfacode else None)
 
     elif args.command == 'send':
         check_args(parser, args)
@@ -2757,9 +3892,30 @@ def main():
 
         # Process other arguments
         address, _, _, = process_decryptwallet_filter(args)
-        # Call checkBalance with the updated currency_code and currency_symbol
-        checkBalance(filename=args.wallet, password=args.password, totp_code=args.tfacode if args.tfacode else "", address=address if args.address else None, node=args.node, to_json=args.json, to_file=args.to_file, show=args.show, currency_code=currency_code, currency_symbol=currency_symbol)
+        if args.watch:
+            watchBalances(filename=args.wallet, password=args.password, totp_code=args.tfacode if args.tfacode else "", address=address if args.address else None, node=args.node, show=args.show, to_json=args.json, max_requests=args.max_requests, request_timeout=args.timeout)
+        else:
+            # Call checkBalance with the updated currency_code and currency_symbol
+            checkBalance(filename=args.wallet, password=args.password, totp_code=args.tfacode if args.tfacode else "", address=address if args.address else None, node=args.node, to_json=args.json, to_file=args.to_file, show=args.show, currency_code=currency_code, currency_symbol=currency_symbol, max_requests=args.max_requests, request_timeout=args.timeout)
+
+    elif args.command == 'history':
+        getTransactionHistory(filename=args.wallet, password=args.password, totp_code=args.tfacode if args.tfacode else "", address=args.address, node=args.node, page=args.page, pages=args.pages, to_json=args.json, request_timeout=args.timeout or BALANCE_REQUEST_TIMEOUT)
     
+    # Report wallet lock contention
+    lock_stats = WalletLock.contention_stats()
+    logging.info(f"Wallet lock contention: {lock_stats['contended']} of {lock_stats['shared'] + lock_stats['exclusive']} lock acquisitions waited, {lock_stats['wait_seconds']:.2f}s in total, {lock_stats['max_wait_seconds']:.2f}s at most.")
+
+    # Report the health of the node pool
+    if len(NodePool.nodes()) > 1:
+        for pool_node, stats in NodePool.stats():
+            latency = f"{stats['latency'] * 1000:.0f} ms" if stats['latency'] is not None else "unknown"
+            logging.info(f"Node {pool_node}: {'healthy' if stats['healthy'] else 'unhealthy'}, {latency} latency, block {stats['height']}, {stats['requests']} requests, {stats['failures']} failed, {stats['hedged']} hedged.")
+
+    # Report HTTP connection reuse and latency
+    http_stats = HttpTransport.stats()
+    if http_stats['requests']:
+        logging.info(f"HTTP transport: {http_stats['requests']} requests over {http_stats['connections']} connections ({http_stats['reuse_ratio']:.0%} reused), {http_stats['retries']} retries, {http_stats['failures']} failed, {http_stats['average_latency_seconds'] * 1000:.0f} ms average and {http_stats['max_latency_seconds'] * 1000:.0f} ms longest latency.")
+
     DataManipulation.secure_delete([var for var in locals().values() if var is not None])
 
 if __name__ == "__main__":